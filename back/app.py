@@ -1,309 +1,215 @@
 import requests
-from bs4 import BeautifulSoup
-from flask import Flask, jsonify, request
-import pymongo
-from pydantic import BaseModel
-from google import genai
-from openai import OpenAI
-import time
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 import os
-from dotenv import load_dotenv
-from typing import List
 import json
+from dotenv import load_dotenv
 
-load_dotenv()
-
-API_KEY = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=API_KEY)
+import clients
+import extractor
+import metrics
+from jobs import JobQueue
+from prompts import GEMINI_MODEL, parse_summary, summary_config, summary_prompt
+from vector_search import perform_vector_search
 
-class Project(BaseModel):
-    title: str
-    summary: str
-    features: List[str]
+load_dotenv()
 
-MONGODB_URI = os.getenv("MONGODB_URI")  # Replace with your Atlas connection string
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")  # Replace with your OpenAI API key
-DB_NAME = "hackdavis"
-COLLECTION_NAME = "projects"
 VECTOR_INDEX_NAME = "vector_index_projects"
 
-# Initialize clients
-mongo_client = pymongo.MongoClient(MONGODB_URI)
-db = mongo_client[DB_NAME]
-collection = db[COLLECTION_NAME]
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-
-
+# Clients, caches and the search backend are built on first use by the shared
+# registry (clients.py), so importing this module connects to nothing. Modules that
+# pull in numpy (embeddings, search, batch analysis) are imported where they are used.
 app = Flask(__name__)
 headers = {
     "User-Agent": "Mozilla/5.0 (compatible; WebScraper/1.0)"
 }
+# Results kept per analyzed URL; /analyze pages through them DEFAULT_PAGE_SIZE at a time
+ANALYZE_RESULT_LIMIT = int(os.getenv("ANALYZE_RESULT_LIMIT", "25"))
+# Seconds to wait for Devpost when fetching a project page
+REQUEST_TIMEOUT = 30
+# Long-running work goes through the job queue (workers: python jobs.py worker)
+clients.register("job_queue", lambda: JobQueue(os.getenv("JOBS_DB_PATH", "jobs.db")))
 
-def create_vector_search_index():
-    try:
-        # Check if index already exists
-        existing_indexes = collection.list_search_indexes()
-        for index in existing_indexes:
-            if index["name"] == VECTOR_INDEX_NAME:
-                print("Vector search index already exists. Dropping it to recreate with correct dimensions...")
-                collection.drop_search_index(VECTOR_INDEX_NAME)
-                break
-
-        # Define the vector search index
-        index_definition = {
-            "name": VECTOR_INDEX_NAME,
-            "type": "vectorSearch",
-            "definition": {
-                "fields": [
-                    {
-                        "type": "vector",
-                        "path": "embedding",
-                        "numDimensions": 1536,  # OpenAI text-embedding-ada-002 uses 1536 dimensions
-                        "similarity": "cosine"
-                    },
-                    {
-                        "type": "filter",
-                        "path": "hackathon_title"  # Using hackathon_title as a filter field
-                    }
-                ]
-            }
-        }
-
-        # Create the index
-        collection.create_search_index(index_definition)
-        print("Creating vector search index...")
-
-        # Poll until the index is ready
-        while True:
-            indexes = collection.list_search_indexes()
-            for idx in indexes:
-                if idx["name"] == VECTOR_INDEX_NAME and idx.get("status") == "READY":
-                    print("Vector search index is ready!")
-                    return
-            print("Waiting for index to be ready...")
-            time.sleep(5)
-
-    except Exception as e:
-        print(f"Error creating vector search index: {e}")
-
-# Function to generate embeddings using OpenAI
-def generate_embedding(text):
-    try:
-        response = openai_client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        )
-        return response.data[0].embedding
-    except Exception as e:
-        print(f"Error generating embedding: {e}")
-        return None
-
-# Function to combine summary and features for embedding
-def combine_summary_and_features(doc):
-    print(doc, type(doc))
-    summary = doc['summary']
-    features = doc['features']
-    # Convert features array to a single string
-    features_text = " ".join([str(feature) for feature in features]) if features else ""
-    # Combine summary and features, ensuring no empty result
-    combined_text = f"{summary} {features_text}".strip()
-    return combined_text if combined_text else None
-
-# Function to add embeddings to existing documents
-def add_embedding_to_document():
-    try:
-        # Find documents without an embedding
-        documents = collection.find({"embedding": {"$exists": False}})
-        for doc in documents:
-            combined_text = combine_summary_and_features(doc)
-            if combined_text:
-                embedding = generate_embedding(combined_text)
-                if embedding:
-                    collection.update_one(
-                        {"_id": doc["_id"]},
-                        {"$set": {"embedding": embedding}}
-                    )
-                    print(f"Added embedding for project: {doc['title']}")
-                else:
-                    print(f"Failed to generate embedding for project: {doc['title']}")
-            else:
-                print(f"No valid summary or features for project: {doc['title']}")
-    except Exception as e:
-        print(f"Error adding embeddings: {e}")
+def _batch_analyzer():
+    from batch_analyze import BatchAnalyzer
 
-# Function to perform vector search
-def perform_vector_search(query_text, limit=5, hackathon_filter=None):
-    query_embedding = generate_embedding(query_text)
-    if not query_embedding:
-        return
+    return BatchAnalyzer(
+        clients.gemini(), clients.openai(), clients.search_backend(),
+        summary_cache=clients.summary_cache(), embedding_cache=clients.embedding_cache(),
+        result_cache=clients.result_cache(), limit=ANALYZE_RESULT_LIMIT,
+    )
 
-    vector_search_stage = {
-        "$vectorSearch": {
-            "index": VECTOR_INDEX_NAME,
-            "path": "embedding",
-            "queryVector": query_embedding,
-            "numCandidates": 100,
-            "limit": limit
-        }
-    }
+clients.register("batch_analyzer", _batch_analyzer)
 
-    # Add filter for hackathon_title if provided
-    if hackathon_filter:
-        vector_search_stage["$vectorSearch"]["filter"] = {
-            "hackathon_title": hackathon_filter
-        }
-
-    pipeline = [
-        vector_search_stage,
-        {
-            "$project": {
-                "_id": 1,
-                "title": 1,
-                "summary": 1,
-                "features": 1,
-                "hackathon_title": 1,
-                "score": {"$meta": "vectorSearchScore"}
-            }
-        }
-    ]
-
-    try:
-        results = collection.aggregate(pipeline)
-        print(f"\nSearch results for query: '{query_text}'")
-        for result in results:
-            print(f"Title: {result['title']}, Hackathon: {result['hackathon_title']}, Score: {result['score']}")
-            print(f"Summary: {result['summary']}")
-            print(f"Features: {result['features']}\n")
-        return results
-    except Exception as e:
-        print(f"Error performing vector search: {e}")
+# Build every client and open its connections ahead of the first request, e.g. from
+# gunicorn's post_worker_init hook: post_worker_init = lambda worker: app.warm_up()
+def warm_up():
+    clients.warm_up()
 
 def gemini_summary(doc):
     print(doc, type(doc))
+    summary_cache = clients.summary_cache()
+    if summary_cache is not None:
+        cached = summary_cache.get(doc, GEMINI_MODEL)
+        if cached is not None:
+            return cached
     try:
-        # Create the prompt with project details
-        prompt = f"""
-        Project Title: {doc['title']}
-        Project Description: {doc['description']}
-        Project Story: {doc['story']}
-        
-        Extract the main points in simple words (basically what the project does) and return the data in the following format:
-        {{
-            "title": str,
-            "summary": str,
-            "features": List[str]
-        }}
-        """
-
-        print(prompt, "prompt")
-        
         # Generate content using Gemini
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config={
-                "response_mime_type": "application/json",
-                "response_schema": Project,
-            },
-        )
+        with metrics.span("summarize"):
+            response = clients.gemini().models.generate_content(
+                model=GEMINI_MODEL,
+                contents=summary_prompt([doc]),
+                config=summary_config(),
+            )
+        usage = getattr(response, "usage_metadata", None)
+        metrics.record_tokens(GEMINI_MODEL, "input", getattr(usage, "prompt_token_count", 0))
+        metrics.record_tokens(GEMINI_MODEL, "output", getattr(usage, "candidates_token_count", 0))
 
         print(response.text, "ghello")
-        # Parse the response
-        if response.text:
-            try:
-                # Convert the response to a dictionary
-                response_data = json.loads(response.text)
-                
-                # Convert to Project model
-                project = Project(**response_data)
-                
-                print(project)
-                
-                # Convert back to dictionary for MongoDB
-                return project.model_dump()
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON response: {e}")
-                return None
-        return None
+        # Parse the response into a dictionary for MongoDB
+        summary = parse_summary(response.text)
+        if summary and summary_cache is not None:
+            summary_cache.put(doc, GEMINI_MODEL, summary)
+        return summary
     except Exception as e:
+        metrics.record_error("gemini")
         print(f"Error in gemini_summary: {e}")
         return None
 
-@app.route('/analyze', methods=['POST'])
-def analyze():
-    data = request.get_json()
-    url = data['url']
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    # Remove the built-with section entirely
-    built_with = soup.find(id="built-with")
-    if built_with:
-        built_with.decompose()
-
-    # Title
-    og_title_tag = soup.find("meta", attrs={"property": "og:title"})
-    og_title = og_title_tag['content'] if og_title_tag else "No Title"
-
-    og_desc_tag = soup.find("meta", attrs={"property": "og:description"})
-    og_desc = og_desc_tag['content'] if og_desc_tag else "No Description"
-
-    app_details = soup.find(id="app-details-left")
-    story = ""
-    github = ""
-
-    if app_details:
-        divs = app_details.find_all("div", recursive=False)
-        
-        if len(divs) >= 2:
-            info_div = divs[1]
-
-            for i in info_div:
-
-                if i.name == "h2":
-                    story = story + i.get_text(strip=True) + ": "
-
-                if i.name == "p":
-                    story += i.get_text(strip=True)
+# Stored neighbours of a project already in the collection, or None when the URL is unknown
+def known_neighbours(url):
+    try:
+        neighbour_table = clients.neighbour_table()
+        if neighbour_table is None:
+            return None
+        with metrics.span("neighbours"):
+            return neighbour_table.lookup(url)
+    except Exception as e:
+        print(f"Error reading neighbour table: {e}")
+        return None
 
-                if i.name == "ul":
-                    story = story + i.get_text(strip=True) + ","
+# Scrape, summarize and search for one project URL; returns None when the project could not be summarized
+# or searched, so the failure is not cached
+def run_analysis(url):
+    from embedding_backfill import combine_summary_and_features
 
-        for a in app_details.find_all("a", href=True):
-            href = a['href']
-            if "https://github.com/" in href:
-                github = href
+    with metrics.span("fetch"):
+        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    with metrics.span("parse"):
+        doc = extractor.extract_project(response.content, url)
 
-    if story == "":
-        story = og_desc
+    summary_doc = gemini_summary(doc)
+    print(summary_doc, type(summary_doc))
+    if not summary_doc:
+        return None
 
-    link_tag = soup.select_one(".software-list-content > p > a")
+    # Get search results; enough are kept for a few pages of /analyze
+    search_results = perform_vector_search(
+        combine_summary_and_features(summary_doc), limit=ANALYZE_RESULT_LIMIT, hackathon_filter=None
+    )
+    return search_results.to_list() if search_results is not None else None
 
-    doc = {
-        "title": og_title,
-        "description": og_desc,
-        "story": story.strip(),
-        "github": github,
-        "url": url,
-        "submitted_to": link_tag.text.strip(),
-        "hackathon": link_tag.get("href")
-    }
+# Body: {"url", "page_size"?, "page_token"?, "stream"?, "collapse_duplicates"?}. The response is the
+# list of results for one page (NDJSON lines with stream), and X-Next-Page-Token is set while more remain.
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    from search_results import DEFAULT_PAGE_SIZE, InvalidPageToken, SearchResults
 
-    summary_doc = gemini_summary(doc)
-    print(summary_doc, type(summary_doc))
+    data = request.get_json()
+    url = data['url']
+    json_results = known_neighbours(url)
+    if json_results is None:
+        json_results = clients.result_cache().get_or_compute(url, lambda: run_analysis(url))
+    if json_results is None:
+        return jsonify({"error": "Could not analyze project"}), 502
+    results = SearchResults.wrap(json_results)
+    if data.get('collapse_duplicates'):
+        results = results.collapse_duplicates()
+    try:
+        page = results.page(
+            data.get('page_size', DEFAULT_PAGE_SIZE), data.get('page_token'),
+            query_key=(url, bool(data.get('collapse_duplicates'))),
+        )
+    except (InvalidPageToken, TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    response_headers = {"X-Next-Page-Token": page.next_page_token} if page.next_page_token else {}
+    if data.get('stream'):
+        return Response(page.iter_ndjson(), mimetype="application/x-ndjson", headers=response_headers)
+    return jsonify(page.to_list()), 200, response_headers
+
+# Analyze many URLs at once; one NDJSON line per URL is streamed back as soon as it is ready
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    from batch_analyze import MAX_BATCH_URLS
 
-    # Get search results
-    search_results = perform_vector_search(combine_summary_and_features(summary_doc), limit=5, hackathon_filter=None)
-    
-    # Convert MongoDB results to JSON-serializable format
-    json_results = []
-    for result in search_results:
-        # Convert ObjectId to string if present
-        if '_id' in result:
-            result['_id'] = str(result['_id'])
-        json_results.append(result)
-    
-    return jsonify(json_results)
+    data = request.get_json()
+    urls = data.get('urls') or []
+    if not isinstance(urls, list) or len(urls) > MAX_BATCH_URLS:
+        return jsonify({"error": f"'urls' must be a list of at most {MAX_BATCH_URLS} URLs"}), 400
+
+    def generate():
+        for line in clients.get("batch_analyzer").run(urls):
+            yield json.dumps(line) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+# Per-request stage timings for the Server-Timing header (enabled with SERVER_TIMING=1)
+@app.before_request
+def start_timing():
+    g.metrics_token = metrics.start_request()
+
+@app.after_request
+def add_server_timing(response):
+    token = g.pop("metrics_token", None)
+    if token is not None:
+        timings = metrics.request_timings()
+        metrics.end_request(token)
+        if timings and metrics.server_timing_enabled():
+            response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+    return response
+
+# Prometheus scrape endpoint: stage latency histograms, upstream errors, cache hit rates and tokens
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/analyze/cache', methods=['DELETE'])
+def invalidate_analysis():
+    data = request.get_json()
+    clients.result_cache().invalidate(data['url'])
+    return jsonify({"invalidated": data['url']})
+
+# Reload in-memory search indexes, e.g. after an embedding backfill; Atlas indexes update on their own
+@app.route('/search/refresh', methods=['POST'])
+def refresh_search():
+    search_backend = clients.search_backend()
+    if hasattr(search_backend, "refresh"):
+        search_backend.refresh()
+    return jsonify({"refreshed": hasattr(search_backend, "refresh")})
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    data = request.get_json()
+    try:
+        job_id = clients.get("job_queue").submit(data['kind'], data.get('payload'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"id": job_id, "status": "queued"}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    status = clients.get("job_queue").status(job_id)
+    if status is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    result = clients.get("job_queue").result(job_id)
+    if result is None:
+        return jsonify({"error": "Job not found"}), 404
+    if result["status"] != "done":
+        return jsonify(result), 409
+    return jsonify(result)
 
 if __name__ == '__main__':
     app.run(debug=True)
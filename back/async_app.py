@@ -0,0 +1,122 @@
+"""ASGI serving mode for /analyze (run with ``hypercorn async_app:app``).
+
+Same request and response shape as the Flask app, but the pipeline runs on
+asyncio with async HTTP and model clients, per-upstream concurrency limits,
+per-stage timeouts and coalescing of identical in-flight URLs.
+"""
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from quart import Quart, Response, g, jsonify, request
+
+import metrics
+from async_pipeline import AsyncAnalyzer, StageTimeout, limits_from_env, timeouts_from_env
+from search_results import DEFAULT_PAGE_SIZE, InvalidPageToken, SearchResults
+
+load_dotenv()
+
+
+def default_analyzer():
+    """Build the analyzer over the shared clients (clients.py), the same ones app.py uses."""
+    import httpx
+
+    import clients
+
+    limits = limits_from_env()
+    return AsyncAnalyzer(
+        http_client=httpx.AsyncClient(limits=httpx.Limits(max_connections=limits["devpost"])),
+        genai_client=clients.gemini(),
+        openai_client=clients.openai_async(),
+        search_backend=clients.search_backend(),
+        summary_cache=clients.summary_cache(),
+        embedding_cache=clients.embedding_cache(),
+        result_cache=clients.result_cache(),
+        limits=limits,
+        timeouts=timeouts_from_env(),
+        result_limit=int(os.getenv("ANALYZE_RESULT_LIMIT", "25")),
+        neighbour_table=clients.neighbour_table(),
+    )
+
+
+def create_app(analyzer_factory=default_analyzer):
+    app = Quart(__name__)
+
+    @app.before_serving
+    async def startup():
+        app.analyzer = analyzer_factory()
+
+    @app.after_serving
+    async def shutdown():
+        close = getattr(app.analyzer.http, "aclose", None)
+        if close is not None:
+            await close()
+
+    # Stage timings of the request (spans in the analyzer) as a Server-Timing header, with SERVER_TIMING=1
+    @app.before_request
+    async def start_timing():
+        g.metrics_token = metrics.start_request()
+
+    @app.after_request
+    async def add_server_timing(response):
+        token = g.pop("metrics_token", None)
+        if token is not None:
+            timings = metrics.request_timings()
+            metrics.end_request(token)
+            if timings and metrics.server_timing_enabled():
+                response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    async def metrics_endpoint():
+        return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+    @app.route('/analyze', methods=['POST'])
+    async def analyze():
+        data = await request.get_json()
+        url = data['url']
+        try:
+            json_results = await app.analyzer.analyze(url)
+        except StageTimeout as e:
+            return jsonify({"error": str(e), "stage": e.stage}), 504
+        except Exception as e:
+            print(f"Error analyzing {url}: {e}")
+            return jsonify({"error": "Could not analyze project"}), 502
+        if json_results is None:
+            return jsonify({"error": "Could not analyze project"}), 502
+        results = SearchResults.wrap(json_results)
+        if data.get('collapse_duplicates'):
+            results = results.collapse_duplicates()
+        try:
+            page = results.page(
+                data.get('page_size', DEFAULT_PAGE_SIZE), data.get('page_token'),
+                query_key=(url, bool(data.get('collapse_duplicates'))),
+            )
+        except (InvalidPageToken, TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        response_headers = {"X-Next-Page-Token": page.next_page_token} if page.next_page_token else {}
+        if data.get('stream'):
+            return Response(page.iter_ndjson(), mimetype="application/x-ndjson", headers=response_headers)
+        return jsonify(page.to_list()), 200, response_headers
+
+    @app.route('/analyze/cache', methods=['DELETE'])
+    async def invalidate_analysis():
+        data = await request.get_json()
+        if app.analyzer.result_cache is not None:
+            app.analyzer.result_cache.invalidate(data['url'])
+        return jsonify({"invalidated": data['url']})
+
+    @app.route('/search/refresh', methods=['POST'])
+    async def refresh_search():
+        search_backend = app.analyzer.search_backend
+        if hasattr(search_backend, "refresh"):
+            await asyncio.to_thread(search_backend.refresh)
+        return jsonify({"refreshed": hasattr(search_backend, "refresh")})
+
+    return app
+
+
+app = create_app()
+
+if __name__ == '__main__':
+    app.run(debug=True)
@@ -0,0 +1,185 @@
+"""Async /analyze pipeline: scrape, summarize, embed and search without blocking a worker.
+
+Each upstream (Devpost, Gemini, OpenAI, vector search) has its own concurrency
+limit and per-call timeout. Concurrent requests for the same normalized URL are
+coalesced so only one pipeline runs for them. Blocking pieces (HTML parsing,
+SQLite caches, the search backend) are run in threads.
+"""
+import asyncio
+import os
+
+import extractor
+import metrics
+from embedding_backfill import EMBEDDING_MODEL, EMBEDDING_SHAPE, combine_summary_and_features
+from prompts import GEMINI_MODEL, parse_summary, summary_config, summary_prompt
+from result_cache import normalize_url
+from search_backends import HybridSearchBackend
+from search_results import SearchResults
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; WebScraper/1.0)"
+}
+
+DEFAULT_LIMITS = {"devpost": 16, "gemini": 8, "openai": 16, "search": 8}
+DEFAULT_TIMEOUTS = {"devpost": 15.0, "gemini": 60.0, "openai": 30.0, "search": 10.0}
+# Span names match the synchronous pipeline in app.py
+STAGE_SPANS = {"devpost": "fetch", "gemini": "summarize", "openai": "embed", "search": "search"}
+
+
+class StageTimeout(Exception):
+    def __init__(self, stage, seconds):
+        super().__init__(f"{stage} did not respond within {seconds}s")
+        self.stage = stage
+
+
+def limits_from_env():
+    return {name: int(os.getenv(f"ANALYZE_{name.upper()}_CONCURRENCY", value)) for name, value in DEFAULT_LIMITS.items()}
+
+
+def timeouts_from_env():
+    return {name: float(os.getenv(f"ANALYZE_{name.upper()}_TIMEOUT", value)) for name, value in DEFAULT_TIMEOUTS.items()}
+
+
+class AsyncAnalyzer:
+    def __init__(self, http_client, genai_client, openai_client, search_backend, summary_cache=None,
+                 embedding_cache=None, result_cache=None, limits=None, timeouts=None, result_limit=5,
+                 neighbour_table=None):
+        self.http = http_client
+        self.genai = genai_client
+        self.openai = openai_client
+        self.search_backend = search_backend
+        self.summary_cache = summary_cache
+        self.embedding_cache = embedding_cache
+        self.result_cache = result_cache
+        self.neighbour_table = neighbour_table
+        self.result_limit = result_limit
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.limits = {name: asyncio.Semaphore(value) for name, value in dict(DEFAULT_LIMITS, **(limits or {})).items()}
+        self._inflight = {}
+        self._refreshing = set()
+        self.coalesced = 0
+
+    async def _stage(self, name, awaitable):
+        async with self.limits[name]:
+            try:
+                with metrics.span(STAGE_SPANS[name]):
+                    return await asyncio.wait_for(awaitable, self.timeouts[name])
+            except asyncio.TimeoutError:
+                metrics.record_error(name)
+                raise StageTimeout(name, self.timeouts[name])
+            except Exception:
+                metrics.record_error(name)
+                raise
+
+    async def fetch(self, url):
+        response = await self._stage("devpost", self.http.get(url, headers=HEADERS, follow_redirects=True))
+        response.raise_for_status()
+        return response.content
+
+    async def summarize(self, doc):
+        if self.summary_cache is not None:
+            cached = await asyncio.to_thread(self.summary_cache.get, doc, GEMINI_MODEL)
+            if cached is not None:
+                return cached
+        response = await self._stage("gemini", self.genai.aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=summary_prompt([doc]),
+            config=summary_config(),
+        ))
+        usage = getattr(response, "usage_metadata", None)
+        metrics.record_tokens(GEMINI_MODEL, "input", getattr(usage, "prompt_token_count", 0))
+        metrics.record_tokens(GEMINI_MODEL, "output", getattr(usage, "candidates_token_count", 0))
+        summary = parse_summary(response.text)
+        if summary and self.summary_cache is not None:
+            await asyncio.to_thread(self.summary_cache.put, doc, GEMINI_MODEL, summary)
+        return summary
+
+    async def embed(self, text):
+        if self.embedding_cache is not None:
+            cached = await asyncio.to_thread(
+                self.embedding_cache.get, EMBEDDING_SHAPE.cache_model(EMBEDDING_MODEL), text
+            )
+            if cached is not None:
+                return cached
+        response = await self._stage("openai", self.openai.embeddings.create(
+            model=EMBEDDING_MODEL, input=text, **EMBEDDING_SHAPE.request_options(EMBEDDING_MODEL)
+        ))
+        metrics.record_tokens(EMBEDDING_MODEL, "input", getattr(getattr(response, "usage", None), "total_tokens", 0))
+        embedding = EMBEDDING_SHAPE.apply([response.data[0].embedding], EMBEDDING_MODEL)[0]
+        if self.embedding_cache is not None:
+            await asyncio.to_thread(
+                self.embedding_cache.put, EMBEDDING_SHAPE.cache_model(EMBEDDING_MODEL), text, embedding
+            )
+        return embedding
+
+    async def search(self, vector, text=None):
+        if isinstance(self.search_backend, HybridSearchBackend):
+            call = asyncio.to_thread(self.search_backend.search, vector, self.result_limit, None, text)
+        else:
+            call = asyncio.to_thread(self.search_backend.search, vector, self.result_limit)
+        return await self._stage("search", call)
+
+    async def run(self, url):
+        """The full pipeline for one URL; returns JSON-ready results or None if the project could not be summarized."""
+        content = await self.fetch(url)
+        with metrics.span("parse"):
+            doc = await asyncio.to_thread(extractor.extract_project, content, url)
+        summary = await self.summarize(doc)
+        if not summary:
+            return None
+        text = combine_summary_and_features(summary)
+        if not text:
+            return None
+        results = await self.search(await self.embed(text), text)
+        return SearchResults(results).to_list()
+
+    async def _run_and_store(self, url):
+        results = await self.run(url)
+        if results is not None and self.result_cache is not None:
+            await asyncio.to_thread(self.result_cache.store, url, results)
+        return results
+
+    def _coalesced_run(self, key, url):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        task = asyncio.ensure_future(self._run_and_store(url))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    def _refresh_in_background(self, key, url):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        task = self._coalesced_run(key, url)
+
+        def done(finished):
+            self._refreshing.discard(key)
+            if not finished.cancelled() and finished.exception() is not None:
+                print(f"Error refreshing cached result for {url}: {finished.exception()}")
+
+        task.add_done_callback(done)
+
+    async def analyze(self, url):
+        key = normalize_url(url)
+        if self.neighbour_table is not None:
+            # Known projects: their precomputed neighbours, one indexed lookup (see neighbours.py)
+            try:
+                with metrics.span("neighbours"):
+                    found = await asyncio.to_thread(self.neighbour_table.lookup, url)
+            except Exception as e:
+                print(f"Error reading neighbour table: {e}")
+                found = None
+            if found is not None:
+                return found
+        if self.result_cache is not None:
+            found = await asyncio.to_thread(self.result_cache.lookup, url)
+            if found is not None:
+                value, state = found
+                if state == "stale":
+                    self._refresh_in_background(key, url)
+                return value
+        # shield: one client disconnecting must not cancel the run other callers are waiting on
+        return await asyncio.shield(self._coalesced_run(key, url))
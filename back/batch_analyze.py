@@ -0,0 +1,136 @@
+"""Batch analysis of many Devpost URLs, streamed back one result per URL.
+
+Pages are fetched concurrently over one pooled session. As soon as a chunk of
+pages has been parsed it is summarized in one multi-project Gemini prompt. The
+chunk's summaries are embedded in one embeddings call and searched together
+with ``search_many``. Each URL's result is yielded as soon as its chunk is done.
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import extractor
+import metrics
+from embedding_backfill import EMBEDDING_MODEL, combine_summary_and_features, embed_batch
+from hackathon_analyze import chunk_projects, summarize_chunk_cached
+from prompts import GEMINI_MODEL
+from result_cache import normalize_url
+from search_backends import HybridSearchBackend
+from search_results import SearchResults
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; WebScraper/1.0)"
+}
+MAX_BATCH_URLS = 200
+
+
+class BatchAnalyzer:
+    def __init__(self, gemini_client, openai_client, search_backend, summary_cache=None, embedding_cache=None,
+                 result_cache=None, fetch_workers=16, chunk_workers=4, chunk_size=15, limit=5, timeout=15):
+        self.gemini_client = gemini_client
+        self.openai_client = openai_client
+        self.search_backend = search_backend
+        self.summary_cache = summary_cache
+        self.embedding_cache = embedding_cache
+        self.result_cache = result_cache
+        self.fetch_workers = fetch_workers
+        self.chunk_workers = chunk_workers
+        self.chunk_size = chunk_size
+        self.limit = limit
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=fetch_workers, pool_maxsize=fetch_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, url):
+        with metrics.span("fetch"):
+            response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        with metrics.span("parse"):
+            return extractor.extract_project(response.content, url)
+
+    def analyze_chunk(self, docs):
+        """Summarize, embed and search a chunk of parsed pages; returns one result line per doc."""
+        summaries = [self.summary_cache.get(doc, GEMINI_MODEL) if self.summary_cache else None for doc in docs]
+        missing = [doc for doc, summary in zip(docs, summaries) if summary is None]
+        if missing:
+            fresh = iter(summarize_chunk_cached(missing, self.gemini_client, cache=self.summary_cache))
+            summaries = [summary if summary is not None else next(fresh) for summary in summaries]
+
+        lines = [None] * len(docs)
+        pending = []
+        for position, (doc, summary) in enumerate(zip(docs, summaries)):
+            text = combine_summary_and_features(summary) if summary else None
+            if text:
+                pending.append((position, text))
+            else:
+                lines[position] = {"url": doc["url"], "error": "Could not summarize project"}
+
+        if pending:
+            batch = [({"url": docs[position]["url"]}, text) for position, text in pending]
+            _, vectors = embed_batch(self.openai_client, batch, EMBEDDING_MODEL, cache=self.embedding_cache)
+            with metrics.span("search"):
+                if isinstance(self.search_backend, HybridSearchBackend):
+                    texts = [text for _, text in pending]
+                    all_results = self.search_backend.search_many(vectors, limit=self.limit, query_texts=texts)
+                else:
+                    all_results = self.search_backend.search_many(vectors, limit=self.limit)
+            for (position, _), results in zip(pending, all_results):
+                lines[position] = {"url": docs[position]["url"], "results": SearchResults(results).to_list()}
+                if self.result_cache is not None:
+                    self.result_cache.store(docs[position]["url"], lines[position]["results"])
+        metrics.record_items("analyze", len(docs))
+        return lines
+
+    def run(self, urls):
+        """Yield ``{"url", "results"}`` or ``{"url", "error"}`` for every distinct URL, in completion order."""
+        seen = set()
+        todo = []
+        for url in urls:
+            key = normalize_url(url)
+            if key in seen:
+                continue
+            seen.add(key)
+            if self.result_cache is not None:
+                found = self.result_cache.lookup(url)
+                if found is not None:
+                    yield {"url": url, "results": found[0], "cached": True}
+                    continue
+            todo.append(url)
+
+        if not todo:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool, \
+                ThreadPoolExecutor(max_workers=self.chunk_workers) as chunk_pool:
+            fetches = {fetch_pool.submit(self.fetch, url): url for url in todo}
+            chunks = {}
+            parsed = []
+
+            def submit(docs):
+                for chunk in chunk_projects(docs, max_projects=self.chunk_size):
+                    chunks[chunk_pool.submit(self.analyze_chunk, chunk)] = chunk
+
+            while fetches or chunks:
+                done, _ = wait(list(fetches) + list(chunks), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in fetches:
+                        url = fetches.pop(future)
+                        try:
+                            parsed.append(future.result())
+                        except Exception as e:
+                            yield {"url": url, "error": f"Could not fetch page: {e}"}
+                    else:
+                        chunk = chunks.pop(future)
+                        try:
+                            yield from future.result()
+                        except Exception as e:
+                            for doc in chunk:
+                                yield {"url": doc["url"], "error": f"Could not analyze project: {e}"}
+                # Hand pages on as soon as a full chunk is ready, or when no more pages are coming
+                if len(parsed) >= self.chunk_size or (parsed and not fetches):
+                    submit(parsed)
+                    parsed = []
@@ -0,0 +1,98 @@
+"""Micro-benchmark of the extractor parser backends over fixture project pages.
+
+Uses saved pages from bench/fixtures/*.html when present (e.g. real Devpost pages
+saved with --save or by hand); otherwise renders pages from hackathon_data.json.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+import extractor
+from fixture_site import DEFAULT_DATA, render_project_page, slug_from_url
+
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+
+def rendered_pages(limit):
+    with open(DEFAULT_DATA, "r") as f:
+        data = json.load(f)
+    pages = []
+    for hackathon in data["hackathons"]:
+        for page in hackathon["projects"]:
+            for project in page:
+                html = render_project_page(project, hackathon["url"], hackathon["title"])
+                pages.append((project["url"], html.encode("utf-8")))
+                if len(pages) >= limit:
+                    return pages
+    return pages
+
+
+def saved_pages():
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, "rb") as f:
+            pages.append(("https://devpost.com/software/" + os.path.splitext(os.path.basename(path))[0], f.read()))
+    return pages
+
+
+def normalized(doc):
+    # HTML5 parsers (lxml, selectolax) turn CRLF into LF; html.parser keeps it
+    return {key: value.replace("\r\n", "\n") for key, value in doc.items()}
+
+
+def time_backend(backend, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for url, content in pages:
+            extractor.extract_project(content, url, backend=backend)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=100, help="number of rendered pages when no fixtures are saved")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", action="store_true", help="write the rendered pages to bench/fixtures/")
+    args = parser.parse_args()
+
+    pages = saved_pages()
+    source = FIXTURE_DIR
+    if not pages:
+        pages = rendered_pages(args.pages)
+        source = "rendered from hackathon_data.json"
+        if args.save:
+            os.makedirs(FIXTURE_DIR, exist_ok=True)
+            for url, content in pages:
+                with open(os.path.join(FIXTURE_DIR, slug_from_url(url) + ".html"), "wb") as f:
+                    f.write(content)
+
+    total_kb = sum(len(content) for _, content in pages) / 1024
+    print(f"{len(pages)} pages ({total_kb:.0f} KB) {source}")
+
+    backends = extractor.available_backends()
+    reference = None
+    if "bs4" in backends:
+        reference = [extractor.extract_project(content, url, backend="bs4") for url, content in pages]
+
+    baseline = None
+    for backend in ["bs4"] + [b for b in backends if b != "bs4"]:
+        if backend not in backends:
+            continue
+        elapsed = time_backend(backend, pages, args.repeat)
+        per_page = elapsed / len(pages) * 1000
+        if baseline is None:
+            baseline = elapsed
+        line = f"{backend:>11}: {per_page:8.3f} ms/page  {len(pages) / elapsed:9.1f} pages/s  {baseline / elapsed:6.1f}x"
+        if reference is not None and backend != "bs4":
+            results = [extractor.extract_project(content, url, backend=backend) for url, content in pages]
+            mismatches = sum(1 for a, b in zip(reference, results) if normalized(a) != normalized(b))
+            line += f"  mismatches vs bs4: {mismatches}"
+        print(line)
@@ -0,0 +1,77 @@
+"""Scrape throughput against the local fixture site, with and without the process parse pool.
+
+Each configuration crawls every hackathon of the fixture listing with
+iter_crawl_concurrent and reports pages/second. Parsing in the fetch threads
+serializes on the GIL; with --processes the pages are parsed in a ParsePool, so
+throughput should grow with the number of cores until fetching becomes the limit.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACK_DIR = os.path.dirname(BENCH_DIR)
+sys.path.append(BACK_DIR)
+sys.path.append(os.path.join(BACK_DIR, "webscrap"))
+
+from fixture_site import PROJECT_LINK_PATTERN, FixtureSite
+
+
+def load_scraper():
+    # webscrap/main.py, loaded under its own name so it does not shadow back/main.py
+    spec = importlib.util.spec_from_file_location("scraper", os.path.join(BACK_DIR, "webscrap", "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def crawl(scraper, listing, workers, processes, queue):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        crawled = scraper.crawl_concurrent(
+            listing["hackathons"], workers=workers, per_host=workers, pattern=PROJECT_LINK_PATTERN,
+            parse_processes=processes, parse_queue=queue,
+        )
+    elapsed = time.perf_counter() - started
+    return sum(len(page) for hackathon in crawled for page in hackathon["projects"]), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=770, help="fixture corpus size, scaled from hackathon_data.json")
+    parser.add_argument("--workers", type=int, default=16, help="fetch threads")
+    parser.add_argument("--processes", default=None,
+                        help="comma-separated parse pool sizes to compare (default: 1, 2, 4 ... up to the core count)")
+    parser.add_argument("--queue", type=int, help="max fetched pages waiting to be parsed")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of fixture site delay per page")
+    parser.add_argument("--backend", help="HTML parser backend (bs4 is the slowest and gains the most)")
+    args = parser.parse_args()
+    if args.backend:
+        # Read by extractor in this process and in the spawned parse workers
+        os.environ["HTML_PARSER_BACKEND"] = args.backend
+
+    if args.processes:
+        sizes = [int(size) for size in args.processes.split(",")]
+    else:
+        cores = os.cpu_count() or 1
+        sizes = sorted({min(2 ** i, cores) for i in range(cores.bit_length() + 1)})
+    scraper = load_scraper()
+    with FixtureSite(latency=args.latency, projects=args.projects) as site:
+        listing = site.data_json()
+        print(f"{args.projects} projects, {args.workers} fetch threads, {os.cpu_count()} cores, "
+              f"parser {args.backend or 'default'}")
+        baseline = None
+        for processes in [0] + sizes:
+            pages, elapsed = crawl(scraper, listing, args.workers, processes, args.queue)
+            rate = pages / elapsed
+            baseline = baseline or rate
+            label = "in fetch threads" if not processes else f"{processes} parse processes"
+            print(f"{label:>20}: {pages} pages in {elapsed:6.2f}s  {rate:8.1f} pages/s  {rate / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
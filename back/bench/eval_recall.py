@@ -0,0 +1,105 @@
+"""Recall@k of compact embedding settings against exact full-precision cosine search.
+
+Runs over an embedding store (``--store embeddings``, written by
+embedding_store.py) or, without one, over a synthetic clustered corpus. Queries
+are held-out rows of the corpus. Each setting reports recall@k, stored bytes per
+vector and mean query latency, so the cheapest setting that keeps quality can be
+picked for EMBEDDING_DIMENSIONS / EMBEDDING_COMPACTION / LOCAL_INDEX.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from compact_embeddings import PCAProjection, truncate
+from search_backends import LocalVectorIndex, QuantizedVectorIndex
+
+
+def clustered_corpus(count, dimensions=1536, clusters=64, rank=128, seed=0):
+    """Unit vectors around cluster centres in a low-rank subspace, like real text embeddings."""
+    rng = np.random.default_rng(seed)
+    basis = np.linalg.qr(rng.standard_normal((dimensions, rank)))[0].T.astype(np.float32)
+    spread = (1.0 / np.arange(1, rank + 1) ** 0.5).astype(np.float32)
+    centres = rng.standard_normal((clusters, rank)).astype(np.float32) * spread
+    noise = rng.standard_normal((count, rank)).astype(np.float32) * spread
+    latent = centres[rng.integers(0, clusters, count)] + 0.5 * noise
+    vectors = latent @ basis + 0.02 * rng.standard_normal((count, dimensions)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_vectors(args):
+    if args.store:
+        from embedding_store import open_store
+
+        return np.asarray(open_store(args.store).matrix, dtype=np.float32)
+    return clustered_corpus(args.count, seed=args.seed)
+
+
+def ids(results):
+    return [result["_id"] for result in results]
+
+
+def recall(truth, found, k):
+    return np.mean([len(set(t[:k]) & set(f[:k])) / k for t, f in zip(truth, found)])
+
+
+def evaluate(index, queries, k):
+    started = time.perf_counter()
+    found = [ids(index.search(query, k)) for query in queries]
+    return found, (time.perf_counter() - started) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--store", help="embedding store base path; default is a synthetic corpus")
+    parser.add_argument("--count", type=int, default=20000, help="synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimensions", default="1536,768,512,256,128")
+    parser.add_argument("--rescore", default="1,4,10")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args)
+    rng = np.random.default_rng(args.seed)
+    held_out = rng.choice(len(vectors), min(args.queries, len(vectors) // 10), replace=False)
+    keep = np.setdiff1d(np.arange(len(vectors)), held_out)
+    corpus, queries = vectors[keep], vectors[held_out]
+    docs = [{"_id": int(row)} for row in keep]
+    full_dimensions = corpus.shape[1]
+    print(f"{len(corpus)} vectors x {full_dimensions} dimensions, {len(queries)} queries, recall@{args.k}")
+
+    exact = LocalVectorIndex(corpus, docs)
+    truth, exact_ms = evaluate(exact, queries, args.k)
+    print(f"{'setting':<28} {'recall':>8} {'bytes/vec':>10} {'ms/query':>9}")
+    print(f"{'exact float32':<28} {1.0:>8.3f} {full_dimensions * 4:>10} {exact_ms:>9.2f}")
+
+    pca = PCAProjection.fit(corpus, min(max(int(d) for d in args.dimensions.split(",")), full_dimensions))
+    for dimensions in (int(d) for d in args.dimensions.split(",")):
+        if dimensions > full_dimensions:
+            continue
+        variants = [("truncate", truncate(corpus, dimensions), truncate(queries, dimensions))]
+        if dimensions < full_dimensions:
+            reduced = PCAProjection(pca.mean, pca.components[:dimensions])
+            variants.append(("pca", reduced.transform(corpus), reduced.transform(queries)))
+        for method, reduced_corpus, reduced_queries in variants:
+            index = LocalVectorIndex(reduced_corpus, docs)
+            found, ms = evaluate(index, reduced_queries, args.k)
+            label = f"{method} {dimensions} float32"
+            print(f"{label:<28} {recall(truth, found, args.k):>8.3f} {dimensions * 4:>10} {ms:>9.2f}")
+            for mode in ("int8", "binary"):
+                for rescore in (int(r) for r in args.rescore.split(",")):
+                    quantized = QuantizedVectorIndex(index.matrix, docs, mode, rescore, normalized=True)
+                    found, ms = evaluate(quantized, reduced_queries, args.k)
+                    label = f"{method} {dimensions} {mode} x{rescore}"
+                    per_vector = quantized.code_bytes / len(docs)
+                    print(f"{label:<28} {recall(truth, found, args.k):>8.3f} {per_vector:>10.0f} {ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
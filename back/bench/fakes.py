@@ -0,0 +1,133 @@
+"""Offline stand-ins for the Gemini and OpenAI clients with configurable latency."""
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+EMBEDDING_DIMENSIONS = 1536
+_TITLE = re.compile(r"^Project Title: (.*)$", re.MULTILINE)
+
+
+def fake_embedding(text, dimensions=EMBEDDING_DIMENSIONS):
+    """Deterministic unit vector derived from the text."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def fake_summary_response(contents, many):
+    summaries = [
+        {"title": title, "summary": f"{title} helps people do things.", "features": ["Feature one", "Feature two"]}
+        for title in _TITLE.findall(contents)
+    ]
+    return SimpleNamespace(text=json.dumps(summaries if many else summaries[0]))
+
+
+class _Counter:
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.calls += 1
+
+
+class _FakeModels(_Counter):
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    def generate_content(self, model, contents, config):
+        self.count()
+        time.sleep(self.latency)
+        return fake_summary_response(contents, many=getattr(config["response_schema"], "__origin__", None) is list)
+
+
+class _FakeAsyncModels(_Counter):
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    async def generate_content(self, model, contents, config):
+        self.count()
+        await asyncio.sleep(self.latency)
+        return fake_summary_response(contents, many=getattr(config["response_schema"], "__origin__", None) is list)
+
+
+class FakeGenaiClient:
+    """Mimics ``genai.Client``: ``.models`` for sync calls and ``.aio.models`` for async ones."""
+
+    def __init__(self, latency=0.0):
+        self.models = _FakeModels(latency)
+        self.aio = SimpleNamespace(models=_FakeAsyncModels(latency))
+
+
+def _embedding_response(inputs, dimensions=EMBEDDING_DIMENSIONS):
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    data = [SimpleNamespace(index=i, embedding=fake_embedding(text, dimensions)) for i, text in enumerate(inputs)]
+    return SimpleNamespace(data=data, usage=SimpleNamespace(prompt_tokens=sum(len(t) // 4 for t in inputs)))
+
+
+class _FakeEmbeddings(_Counter):
+    def __init__(self, latency, dimensions=EMBEDDING_DIMENSIONS):
+        super().__init__()
+        self.latency = latency
+        self.dimensions = dimensions
+
+    def create(self, model, input, **kwargs):
+        self.count()
+        time.sleep(self.latency)
+        return _embedding_response(input, self.dimensions)
+
+
+class _FakeAsyncEmbeddings(_Counter):
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    async def create(self, model, input, **kwargs):
+        self.count()
+        await asyncio.sleep(self.latency)
+        return _embedding_response(input)
+
+
+class FakeOpenAI:
+    def __init__(self, latency=0.0, dimensions=EMBEDDING_DIMENSIONS):
+        self.embeddings = _FakeEmbeddings(latency, dimensions)
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, latency=0.0):
+        self.embeddings = _FakeAsyncEmbeddings(latency)
+
+
+def synthetic_corpus(count, seed=0, hackathons=50, dimensions=EMBEDDING_DIMENSIONS, block_rows=65536):
+    """Project documents with random unit embeddings, shaped like the projects collection.
+
+    Vectors are generated block by block, so a 1M-project corpus needs only the
+    final float32 matrix in memory (about 6 GB at 1536 dimensions).
+    """
+    rng = np.random.default_rng(seed)
+    vectors = np.empty((count, dimensions), dtype=np.float32)
+    for start in range(0, count, block_rows):
+        block = rng.standard_normal((min(block_rows, count - start), dimensions)).astype(np.float32)
+        vectors[start:start + len(block)] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    docs = [
+        {
+            "_id": f"p{i}",
+            "title": f"Project {i}",
+            "summary": f"Project {i} summary",
+            "features": [f"feature {i % 17}", f"feature {i % 31}"],
+            "hackathon_title": f"Hackathon {i % hackathons}",
+            "devpost_url": f"https://devpost.com/software/project-{i}",
+        }
+        for i in range(count)
+    ]
+    return vectors, docs
@@ -0,0 +1,240 @@
+"""Local stand-in for Devpost that serves fixture pages built from hackathon_data.json."""
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA = os.path.join(BACK_DIR, "hackathon_data.json")
+NO_SUBMISSIONS = "There are no submissions which match your criteria."
+# Pattern that matches project links served by the stand-in
+PROJECT_LINK_PATTERN = r"^http://127\.0\.0\.1:\d+/software/"
+
+
+# Site header, sidebar and footer so fixture pages weigh roughly what real Devpost pages do
+_NAV = "\n".join(
+    f'<li class="nav-item"><a href="https://devpost.com/hackathons?page={i}" data-track="nav-{i}">Link {i}</a></li>'
+    for i in range(400)
+)
+_SCRIPT = "var CONFIG = " + "{" + ",".join(f'"k{i}": "{"x" * 40}"' for i in range(600)) + "};"
+PAGE_HEADER = f'<header id="site-header"><nav><ul class="menu">{_NAV}</ul></nav></header><script>{_SCRIPT}</script>'
+PAGE_FOOTER = f'<footer id="site-footer"><ul>{_NAV}</ul></footer>'
+
+
+def slug_from_url(url):
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def render_project_page(project, hackathon_url="", hackathon_title=""):
+    """Render a project page with the same structure as devpost.com/software/<slug>."""
+    github = ""
+    if project.get("github"):
+        github = f'<nav class="app-links"><ul><li><a href="{html.escape(project["github"])}">GitHub Repo</a></li></ul></nav>'
+    return f"""<!DOCTYPE html>
+<html>
+<head>
+<meta property="og:title" content="{html.escape(project["title"])}">
+<meta property="og:description" content="{html.escape(project["description"])}">
+<title>{html.escape(project["title"])}</title>
+</head>
+<body>
+{PAGE_HEADER}
+<div id="app-details-left">
+<div id="app-title"><h1>{html.escape(project["title"])}</h1></div>
+<div>
+<p>{html.escape(project["story"])}</p>
+</div>
+<div id="built-with"><h2>Built With</h2><ul class="no-bullet"><li><span class="cp-tag"><a href="https://devpost.com/software/built-with/python">python</a></span></li></ul></div>
+{github}
+</div>
+<div id="submissions">
+<ul class="software-list-with-thumbnail"><li><div class="software-list-content">
+<p><a href="{html.escape(hackathon_url)}">{html.escape(hackathon_title)}</a></p>
+</div></li></ul>
+</div>
+{PAGE_FOOTER}
+</body>
+</html>"""
+
+
+def render_gallery_page(project_urls):
+    """Render one page of a hackathon project gallery."""
+    if not project_urls:
+        return f"<!DOCTYPE html><html><body><p>{NO_SUBMISSIONS}</p></body></html>"
+    items = "\n".join(
+        f'<div class="gallery-item"><a class="block-wrapper-link" href="{html.escape(url)}">{i}</a></div>'
+        for i, url in enumerate(project_urls)
+    )
+    return f"""<!DOCTYPE html>
+<html><body>
+<a href="https://devpost.com/">Devpost</a>
+<div id="submission-gallery">
+{items}
+</div>
+</body></html>"""
+
+
+def scaled_data(data, projects):
+    """Repeat the corpus under new hackathon and project names until it holds ``projects`` projects."""
+    hackathons = []
+    total = 0
+    copy = 0
+    while total < projects:
+        for hackathon in data["hackathons"]:
+            if total >= projects:
+                break
+            suffix = f" #{copy}" if copy else ""
+            pages = []
+            for page in hackathon["projects"]:
+                page = page[:projects - total]
+                total += len(page)
+                if page:
+                    pages.append([
+                        dict(project, title=project["title"] + suffix,
+                             url=project["url"].rstrip("/") + (f"-{copy}" if copy else ""))
+                        for project in page
+                    ])
+            if pages:
+                hackathons.append(dict(hackathon, title=hackathon["title"] + suffix, projects=pages))
+        copy += 1
+    return {"hackathons": hackathons}
+
+
+class FixtureSite:
+    """Serves the scraped corpus back over HTTP on 127.0.0.1.
+
+    With ``projects`` the corpus is scaled (see scaled_data) to that many projects.
+    """
+
+    def __init__(self, data_path=DEFAULT_DATA, latency=0.0, port=0, projects=None):
+        with open(data_path, "r") as f:
+            self.data = json.load(f)
+        if projects is not None:
+            self.data = scaled_data(self.data, projects)
+        self.latency = latency
+        self.last_modified = formatdate(time.time(), usegmt=True)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def hackathon_url(self, index):
+        return f"{self.base_url}/h/{index}/"
+
+    def project_url(self, project):
+        return f"{self.base_url}/software/{slug_from_url(project['url'])}"
+
+    def data_json(self):
+        """Return a webscrap/data.json-shaped listing that points at this server."""
+        hackathons = []
+        for index, hackathon in enumerate(self.data["hackathons"]):
+            hackathons.append({
+                "title": hackathon["title"],
+                "displayed_location": {"location": hackathon["location"]},
+                "url": self.hackathon_url(index),
+                "submission_period_dates": hackathon["submission_dates"],
+                "themes": [{"name": theme} for theme in hackathon["themes"]],
+                "organization_name": hackathon["organization"],
+                "winners_announced": hackathon["winners"],
+            })
+        return {"hackathons": hackathons}
+
+    def _handler(self):
+        site = self
+        projects = {}
+        galleries = {}
+        for index, hackathon in enumerate(self.data["hackathons"]):
+            pages = []
+            for page in hackathon["projects"]:
+                pages.append([slug_from_url(p["url"]) for p in page])
+                for project in page:
+                    projects[slug_from_url(project["url"])] = (project, index)
+            galleries[index] = pages
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body):
+                if site.latency:
+                    time.sleep(site.latency)
+                payload = body.encode("utf-8")
+                etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", site.last_modified)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                match = re.match(r"^/h/(\d+)/project-gallery$", parsed.path)
+                if match:
+                    index = int(match.group(1))
+                    page = int(parse_qs(parsed.query).get("page", ["1"])[0])
+                    pages = galleries.get(index, [])
+                    slugs = pages[page - 1] if 1 <= page <= len(pages) else []
+                    urls = [f"{site.base_url}/software/{slug}" for slug in slugs]
+                    return self._send(200, render_gallery_page(urls))
+
+                match = re.match(r"^/software/([^/]+)$", parsed.path)
+                if match and match.group(1) in projects:
+                    project, index = projects[match.group(1)]
+                    hackathon = site.data["hackathons"][index]
+                    return self._send(200, render_project_page(project, site.hackathon_url(index), hackathon["title"]))
+
+                self._send(404, "Not Found")
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=DEFAULT_DATA)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of delay per response")
+    parser.add_argument("--write-listing", help="write a data.json listing that points at this server")
+    args = parser.parse_args()
+
+    site = FixtureSite(args.data, latency=args.latency, port=args.port)
+    if args.write_listing:
+        with open(args.write_listing, "w") as f:
+            json.dump(site.data_json(), f, indent=2)
+        print(f"Wrote listing to {args.write_listing}")
+    print(f"Serving fixture site on {site.base_url} (project links match {PROJECT_LINK_PATTERN})")
+    site.server.serve_forever()
@@ -0,0 +1,120 @@
+"""Load test for the async /analyze serving mode against local stub upstreams.
+
+Devpost is replaced by the fixture site, Gemini and OpenAI by fake async clients
+with configurable latency, and search by a local index over a synthetic corpus.
+Requests are sent in-process through Quart's test client, or over HTTP to a
+running server with --target.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+# Known-project lookups would skip the pipeline being measured
+os.environ["NEIGHBOUR_COLLECTION"] = ""
+
+from fakes import FakeAsyncOpenAI, FakeGenaiClient, synthetic_corpus
+from fixture_site import FixtureSite
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, latencies, statuses, elapsed):
+    ok = sum(1 for status in statuses if status == 200)
+    print(f"{name}: {len(latencies)} requests in {elapsed:.2f}s -> {len(latencies) / elapsed:.1f} req/s, "
+          f"{ok} OK, p50 {percentile(latencies, 50) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms")
+
+
+async def drive(post, urls, concurrency):
+    latencies = []
+    statuses = []
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(url):
+        async with gate:
+            start = time.perf_counter()
+            status = await post(url)
+            latencies.append(time.perf_counter() - start)
+            statuses.append(status)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(url) for url in urls))
+    return latencies, statuses, time.perf_counter() - start
+
+
+def stub_analyzer_factory(site, gemini_latency, openai_latency, corpus_size):
+    def factory():
+        import httpx
+
+        from async_pipeline import AsyncAnalyzer
+        from search_backends import LocalSearchBackend, LocalVectorIndex
+
+        vectors, docs = synthetic_corpus(corpus_size)
+        index = LocalVectorIndex(vectors, docs)
+        return AsyncAnalyzer(
+            http_client=httpx.AsyncClient(),
+            genai_client=FakeGenaiClient(gemini_latency),
+            openai_client=FakeAsyncOpenAI(openai_latency),
+            search_backend=LocalSearchBackend(lambda: index),
+        )
+    return factory
+
+
+async def run_in_process(args, site, urls):
+    from async_app import create_app
+
+    app = create_app(stub_analyzer_factory(site, args.gemini_latency, args.openai_latency, args.corpus))
+    async with app.test_app() as test_app:
+        client = test_app.test_client()
+
+        async def post(url):
+            response = await client.post("/analyze", json={"url": url})
+            return response.status_code
+
+        latencies, statuses, elapsed = await drive(post, urls, args.concurrency)
+        analyzer = app.analyzer
+        report("async /analyze", latencies, statuses, elapsed)
+        print(f"gemini calls {analyzer.genai.aio.models.calls}, embedding calls {analyzer.openai.embeddings.calls}, "
+              f"coalesced {analyzer.coalesced}")
+
+
+async def run_against_target(args, urls):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=args.target, timeout=120) as client:
+        async def post(url):
+            response = await client.post("/analyze", json={"url": url})
+            return response.status_code
+
+        latencies, statuses, elapsed = await drive(post, urls, args.concurrency)
+        report(f"{args.target}/analyze", latencies, statuses, elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--distinct", type=int, default=50, help="number of distinct project URLs to cycle through")
+    parser.add_argument("--devpost-latency", type=float, default=0.05)
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    parser.add_argument("--openai-latency", type=float, default=0.1)
+    parser.add_argument("--corpus", type=int, default=770, help="projects in the synthetic search corpus")
+    parser.add_argument("--target", help="base URL of a running server instead of the in-process app")
+    args = parser.parse_args()
+
+    with FixtureSite(latency=args.devpost_latency) as site:
+        projects = [p for h in site.data["hackathons"] for page in h["projects"] for p in page][:args.distinct]
+        urls = [site.project_url(projects[i % len(projects)]) for i in range(args.requests)]
+        if args.target:
+            asyncio.run(run_against_target(args, urls))
+        else:
+            asyncio.run(run_in_process(args, site, urls))
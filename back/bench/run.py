@@ -0,0 +1,308 @@
+"""Offline benchmark suite for the scrape -> summarize -> embed -> search pipeline.
+
+Every benchmark drives the real code path against local stand-ins: the fixture
+site for Devpost, fake Gemini and OpenAI clients with configurable latency,
+mongomock (or a local mongod with --mongo-uri) for the projects collection, and
+an in-process search backend over a synthetic corpus. Each reports throughput
+and p50/p99 latency per operation. Results can be saved as a baseline and later
+compared against; a comparison fails when throughput drops or p99 grows by more
+than the tolerance. bench/baselines/bench.json holds reference results with the
+default options; they depend on the machine, so save a local baseline (ignored by
+git) before comparing on other hardware:
+
+    python bench/run.py --compare bench/baselines/bench.json
+    python bench/run.py --save bench_baseline.json
+    python bench/run.py --compare bench_baseline.json
+    python bench/run.py perform_vector_search analyze --corpus 770,100000,1000000 --dimensions 256
+
+--projects scales the scraped corpus (replicated from hackathon_data.json);
+--corpus sets the search corpus sizes, 770 up to 1M.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACK_DIR = os.path.dirname(BENCH_DIR)
+sys.path.append(BACK_DIR)
+sys.path.append(os.path.join(BACK_DIR, "webscrap"))
+# Dummy credentials so modules that read keys at import time still import offline
+for key, value in {"GEMINI_API_KEY": "bench", "OPENAI_API_KEY": "bench", "MONGODB_URI": "mongodb://localhost:1"}.items():
+    os.environ.setdefault(key, value)
+# Every cache and the neighbour table off: each operation does the full work
+for key in ("EMBEDDING_CACHE_PATH", "SUMMARY_CACHE_PATH", "RESULT_CACHE_PATH", "NEIGHBOUR_COLLECTION"):
+    os.environ[key] = ""
+
+from fakes import FakeGenaiClient, FakeOpenAI, synthetic_corpus
+from fixture_site import PROJECT_LINK_PATTERN, FixtureSite
+from load_test import percentile
+
+
+def load_scraper():
+    # webscrap/main.py, loaded under its own name so it does not shadow back/main.py
+    spec = importlib.util.spec_from_file_location("scraper", os.path.join(BACK_DIR, "webscrap", "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def drive(fn, items, concurrency):
+    """Call ``fn`` on every item from ``concurrency`` threads; returns per-call latencies and the wall time."""
+    latencies = []
+
+    def one(item):
+        started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, items))
+    return latencies, time.perf_counter() - started
+
+
+@contextlib.contextmanager
+def timed_calls(module, name, latencies):
+    """Record the latency of every call to ``module.name`` (a batch job's unit of work)."""
+    original = getattr(module, name)
+
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+
+    setattr(module, name, wrapper)
+    try:
+        yield
+    finally:
+        setattr(module, name, original)
+
+
+def result(unit, count, elapsed, latencies):
+    return {
+        "unit": unit,
+        "count": count,
+        "seconds": round(elapsed, 3),
+        "throughput": round(count / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def site_projects(site):
+    return [project for hackathon in site.data["hackathons"] for page in hackathon["projects"] for project in page]
+
+
+def bench_fetch_hackathon_data(args):
+    scraper = load_scraper()
+    with FixtureSite(latency=args.devpost_latency, projects=args.projects) as site:
+        session = scraper.create_session(args.concurrency)
+        urls = [site.project_url(project) for project in site_projects(site)]
+        latencies, elapsed = drive(lambda url: scraper.fetch_hackathon_data(url, session), urls, args.concurrency)
+    return {"fetch_hackathon_data": result("pages", len(urls), elapsed, latencies)}
+
+
+def bench_fetch_project_links(args):
+    scraper = load_scraper()
+    with FixtureSite(latency=args.devpost_latency, projects=args.projects) as site:
+        session = scraper.create_session(args.concurrency)
+        galleries = [
+            scraper.gallery_url({"url": site.hackathon_url(index)}, page)
+            for index, hackathon in enumerate(site.data["hackathons"])
+            for page in range(1, len(hackathon["projects"]) + 1)
+        ]
+        # One operation is a gallery page: its links plus every project page behind them
+        latencies, elapsed = drive(
+            lambda url: scraper.fetch_project_links(url, session, PROJECT_LINK_PATTERN), galleries, args.concurrency
+        )
+    return {"fetch_project_links": result("galleries", len(galleries), elapsed, latencies)}
+
+
+def bench_process_hackathons(args):
+    import hackathon_analyze
+
+    with FixtureSite(projects=args.projects) as site, tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "hackathon_data.json")
+        with open(input_path, "w") as f:
+            json.dump(site.data, f)
+        count = len(site_projects(site))
+        latencies = []
+        started = time.perf_counter()
+        with timed_calls(hackathon_analyze, "summarize_chunk_cached", latencies), \
+                contextlib.redirect_stdout(io.StringIO()):
+            hackathon_analyze.process_hackathons(
+                input_path, os.path.join(tmp, "summaries.jsonl"), gemini_client=FakeGenaiClient(args.gemini_latency),
+                workers=args.concurrency, requests_per_minute=0, cache=None,
+            )
+        elapsed = time.perf_counter() - started
+    # Latency is per summarized chunk (one Gemini request)
+    return {"process_hackathons": result("projects", count, elapsed, latencies)}
+
+
+def bench_add_embedding_to_document(args):
+    import clients
+    import embedding_backfill
+    import main
+
+    mongo = mongo_client(args)
+    if mongo is None:
+        return {}
+    collection = mongo["hackdavis_bench"]["projects"]
+    collection.drop()
+    collection.insert_many([
+        {"title": f"Project {i}", "summary": f"Project {i} helps people do things.",
+         "features": [f"feature {i % 17}", f"feature {i % 31}"]}
+        for i in range(args.projects)
+    ])
+    # main.add_embedding_to_document uses clients.collection(); point it at the bench database
+    clients.register("mongo", lambda: {clients.DB_NAME: {clients.COLLECTION_NAME: collection}})
+    clients.register("openai", lambda: FakeOpenAI(args.openai_latency, args.dimensions))
+    latencies = []
+    started = time.perf_counter()
+    with timed_calls(embedding_backfill, "embed_batch", latencies), contextlib.redirect_stdout(io.StringIO()):
+        main.add_embedding_to_document(max_in_flight=args.concurrency)
+    elapsed = time.perf_counter() - started
+    collection.drop()
+    # Latency is per embedded batch (one embeddings request)
+    return {"add_embedding_to_document": result("documents", args.projects, elapsed, latencies)}
+
+
+def mongo_client(args):
+    if args.mongo_uri:
+        import pymongo
+
+        return pymongo.MongoClient(args.mongo_uri)
+    try:
+        import mongomock
+    except ImportError:
+        print("add_embedding_to_document: skipped (install mongomock or pass --mongo-uri)")
+        return None
+    return mongomock.MongoClient()
+
+
+def use_search_corpus(size, args):
+    """Serve searches from an in-process index over a synthetic corpus of ``size`` projects."""
+    import clients
+    from search_backends import LocalSearchBackend, LocalVectorIndex
+
+    vectors, docs = synthetic_corpus(size, dimensions=args.dimensions)
+    index = LocalVectorIndex(vectors, docs, normalized=True)
+    clients.register("search_backend", lambda: LocalSearchBackend(lambda: index, index_type=args.index))
+    clients.register("openai", lambda: FakeOpenAI(args.openai_latency, args.dimensions))
+    clients.get("search_backend").index
+
+
+def bench_perform_vector_search(args):
+    import main
+
+    results = {}
+    for size in args.corpus:
+        use_search_corpus(size, args)
+        queries = [f"An app that helps students with topic {i}" for i in range(args.queries)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            latencies, elapsed = drive(main.perform_vector_search, queries, args.concurrency)
+        results[f"perform_vector_search@{size}"] = result("queries", len(queries), elapsed, latencies)
+    return results
+
+
+def bench_analyze(args):
+    import app
+    import clients
+    from result_cache import create_result_cache
+
+    results = {}
+    clients.register("gemini", lambda: FakeGenaiClient(args.gemini_latency))
+    with FixtureSite(latency=args.devpost_latency, projects=args.projects) as site:
+        urls = [site.project_url(project) for project in site_projects(site)][:args.queries]
+        for size in args.corpus:
+            use_search_corpus(size, args)
+            # A fresh in-process result cache per corpus, so every URL runs the whole pipeline
+            clients.register("result_cache", lambda: create_result_cache(ttl=3600))
+
+            def post(url):
+                response = app.app.test_client().post("/analyze", json={"url": url})
+                if response.status_code != 200:
+                    raise RuntimeError(f"/analyze {url} returned {response.status_code}")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies, elapsed = drive(post, urls, args.concurrency)
+            results[f"analyze@{size}"] = result("requests", len(urls), elapsed, latencies)
+    return results
+
+
+BENCHMARKS = {
+    "fetch_hackathon_data": bench_fetch_hackathon_data,
+    "fetch_project_links": bench_fetch_project_links,
+    "process_hackathons": bench_process_hackathons,
+    "add_embedding_to_document": bench_add_embedding_to_document,
+    "perform_vector_search": bench_perform_vector_search,
+    "analyze": bench_analyze,
+}
+
+
+def print_report(report, baseline=None, tolerance=0.2):
+    regressions = []
+    for name, stats in report.items():
+        line = (f"{name:<32} {stats['count']:>8} {stats['unit']:<10} {stats['throughput']:>10.1f}/s   "
+                f"p50 {stats['p50_ms']:>9.2f} ms   p99 {stats['p99_ms']:>9.2f} ms")
+        before = (baseline or {}).get(name)
+        if before:
+            slower = 1 - stats["throughput"] / before["throughput"] if before["throughput"] else 0.0
+            tail = stats["p99_ms"] / before["p99_ms"] - 1 if before["p99_ms"] else 0.0
+            line += f"   vs baseline: throughput {-slower:+.0%}, p99 {tail:+.0%}"
+            if slower > tolerance or tail > tolerance:
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("benchmarks", nargs="*", default=list(BENCHMARKS), help=f"any of {', '.join(BENCHMARKS)}")
+    parser.add_argument("--projects", type=int, default=770, help="scraped corpus size, scaled from hackathon_data.json")
+    parser.add_argument("--corpus", default="770", help="comma-separated search corpus sizes, e.g. 770,100000,1000000")
+    parser.add_argument("--dimensions", type=int, default=1536, help="embedding dimensions of the search corpus")
+    parser.add_argument("--index", default="exact", help="local index type: exact, ivf, int8 or binary")
+    parser.add_argument("--queries", type=int, default=200, help="searches and /analyze requests per corpus size")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--devpost-latency", type=float, default=0.0, help="seconds of fixture site delay per page")
+    parser.add_argument("--gemini-latency", type=float, default=0.0)
+    parser.add_argument("--openai-latency", type=float, default=0.0)
+    parser.add_argument("--mongo-uri", help="local mongod for add_embedding_to_document; default is mongomock")
+    parser.add_argument("--save", help="write the results to this baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing, as a fraction")
+    args = parser.parse_args()
+    args.corpus = [int(size) for size in args.corpus.split(",")]
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    report = {}
+    for name in args.benchmarks:
+        report.update(BENCHMARKS[name](args))
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    regressions = print_report(report, baseline, args.tolerance)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Cold-start benchmark: how long importing a serving module takes in a fresh interpreter.
+
+Each run starts ``python -X importtime -c "import <module>"`` in a subprocess,
+records the wall time and the ``-X importtime`` cumulative time, and lists the
+slowest imports the module makes directly. Results can be saved as a baseline and later
+compared against, to catch cold-start regressions. bench/baselines/startup.json holds
+reference results; like bench/run.py's, they depend on the machine:
+
+    python bench/startup_time.py --compare bench/baselines/startup.json
+    python bench/startup_time.py --save startup_baseline.json
+    python bench/startup_time.py --compare startup_baseline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Dummy credentials so modules that read keys at import time still import offline
+OFFLINE_ENV = {"GEMINI_API_KEY": "bench", "OPENAI_API_KEY": "bench", "MONGODB_URI": "mongodb://localhost:1"}
+
+
+def parse_importtime(stderr, module):
+    """Cumulative microseconds of ``module`` and of each import it makes directly."""
+    total = 0
+    children = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        # Each nesting level indents the name by two more spaces
+        name = fields[2].strip()
+        depth = (len(fields[2]) - len(fields[2].lstrip()) - 1) // 2
+        if depth == 0 and name == module:
+            total = int(fields[1])
+        elif depth == 1:
+            children[name] = children.get(name, 0) + int(fields[1])
+    return total, children
+
+
+def measure(module, python=sys.executable):
+    env = dict(os.environ)
+    for key, value in OFFLINE_ENV.items():
+        env.setdefault(key, value)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACK_DIR, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    return (wall,) + parse_importtime(completed.stderr, module)
+
+
+def run(modules, repeat):
+    report = {}
+    for module in modules:
+        walls = []
+        totals = []
+        imports = {}
+        for _ in range(repeat):
+            wall, total, imports = measure(module)
+            walls.append(wall)
+            totals.append(total)
+        report[module] = {
+            "wall_ms": round(statistics.median(walls) * 1000, 1),
+            "import_ms": round(statistics.median(totals) / 1000, 1),
+            "slowest": {name: round(us / 1000, 1) for name, us in sorted(imports.items(), key=lambda i: -i[1])[:8]},
+        }
+    return report
+
+
+def print_report(report, baseline=None, tolerance=0.2):
+    regressions = []
+    for module, stats in report.items():
+        line = f"{module:<20} wall {stats['wall_ms']:>8.1f} ms   imports {stats['import_ms']:>8.1f} ms"
+        if baseline and module in baseline:
+            before = baseline[module]["wall_ms"]
+            change = (stats["wall_ms"] - before) / before if before else 0.0
+            line += f"   baseline {before:>8.1f} ms ({change:+.0%})"
+            if change > tolerance:
+                regressions.append(module)
+        print(line)
+        print("    slowest: " + ", ".join(f"{name} {ms} ms" for name, ms in stats["slowest"].items()))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=["app", "main", "hackathon_analyze", "async_app"])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per module; the median wall time is reported")
+    parser.add_argument("--save", help="write the results to this baseline file")
+    parser.add_argument("--compare", help="baseline file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before failing, as a fraction")
+    args = parser.parse_args()
+
+    report = run(args.modules, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+    regressions = print_report(report, baseline, args.tolerance)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        print(f"Cold-start regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Lazily built service clients and caches, shared by app.py, main.py and hackathon_analyze.py.
+
+Nothing heavy is imported or connected when this module loads. ``google.genai``,
+``openai``, ``pymongo`` and numpy-backed search are imported when a client is
+first asked for, so a worker can start serving before it has paid for every SDK.
+``warm_up()`` builds the clients up front, from a server's post-fork hook or
+before the first request.
+
+Sockets, connection pools and SQLite handles must not be shared across
+``fork()``. The registry drops everything it built in a forked child, so each
+worker process opens its own pooled connections on first use.
+
+Environment: GEMINI_API_KEY, OPENAI_API_KEY, MONGODB_URI, MONGO_MAX_POOL_SIZE,
+EMBEDDING_CACHE_PATH, SUMMARY_CACHE_PATH / SUMMARY_CACHE_TTL, RESULT_CACHE_PATH /
+RESULT_CACHE_REDIS_URL / RESULT_CACHE_TTL / RESULT_CACHE_STALE_TTL /
+RESULT_CACHE_MEMORY_TTL and
+NEIGHBOUR_COLLECTION.
+"""
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_NAME = "hackdavis"
+COLLECTION_NAME = "projects"
+
+
+class ClientRegistry:
+    def __init__(self):
+        self._factories = {}
+        self._warmers = {}
+        self._instances = {}
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+
+    def register(self, name, factory, warm=None):
+        """Add (or replace) how ``name`` is built; ``warm`` is called on it by warm_up()."""
+        with self._lock:
+            self._factories[name] = factory
+            if warm is not None:
+                self._warmers[name] = warm
+            self._instances.pop(name, None)
+
+    def get(self, name):
+        if self._pid != os.getpid():
+            self.reset()
+        # Membership, not truthiness: a disabled cache is built as None
+        if name not in self._instances:
+            with self._lock:
+                if name not in self._instances:
+                    self._instances[name] = self._factories[name]()
+        return self._instances[name]
+
+    def built(self, name):
+        return name in self._instances
+
+    def reset(self):
+        """Forget every instance (without closing it: in a forked child it still belongs to the parent)."""
+        self._lock = threading.RLock()
+        self._instances = {}
+        self._pid = os.getpid()
+
+    def warm_up(self, names=None):
+        """Build ``names`` (default: everything registered) and open their connections."""
+        for name in names or list(self._factories):
+            instance = self.get(name)
+            warm = self._warmers.get(name)
+            if warm is not None:
+                warm(instance)
+
+
+registry = ClientRegistry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=registry.reset)
+
+
+def _gemini():
+    from google import genai
+
+    return genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+
+
+def _openai():
+    from openai import OpenAI
+
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def _openai_async():
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+
+def _mongo():
+    import pymongo
+
+    # connect=False: the pool is opened by the first operation, in the process that runs it
+    return pymongo.MongoClient(
+        os.getenv("MONGODB_URI"), maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "50")), connect=False
+    )
+
+
+def _embedding_cache():
+    from embedding_cache import open_cache
+
+    # Set EMBEDDING_CACHE_PATH to an empty string to disable the cache
+    return open_cache(os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db"))
+
+
+def _summary_cache():
+    from summary_cache import DEFAULT_TTL, open_summary_cache
+
+    # Set SUMMARY_CACHE_PATH to an empty string to disable the cache
+    return open_summary_cache(
+        os.getenv("SUMMARY_CACHE_PATH", "summary_cache.db"), ttl=float(os.getenv("SUMMARY_CACHE_TTL", DEFAULT_TTL))
+    )
+
+
+def _result_cache():
+    from result_cache import create_result_cache
+
+    # /analyze results: fresh for RESULT_CACHE_TTL seconds, then served stale for
+    # RESULT_CACHE_STALE_TTL more while being refreshed in the background
+    return create_result_cache(
+        ttl=float(os.getenv("RESULT_CACHE_TTL", "3600")),
+        stale_ttl=float(os.getenv("RESULT_CACHE_STALE_TTL", "86400")),
+        sqlite_path=os.getenv("RESULT_CACHE_PATH", "result_cache.db"),
+        redis_url=os.getenv("RESULT_CACHE_REDIS_URL"),
+        memory_ttl=float(os.getenv("RESULT_CACHE_MEMORY_TTL", "5")),
+    )
+
+
+def _neighbour_table():
+    from neighbours import open_neighbour_table
+
+    # Known projects are answered from the precomputed neighbour table (python neighbours.py)
+    return open_neighbour_table(mongo()[DB_NAME])
+
+
+def _search_backend():
+    from search_backends import create_search_backend
+
+    # SEARCH_BACKEND=atlas|local picks where similarity search runs; SEARCH_MODE=hybrid adds BM25
+    return create_search_backend(collection())
+
+
+def _warm_search_backend(backend):
+    # Local and hybrid backends load their indexes on first use
+    for attribute in ("index", "lexical"):
+        getattr(backend, attribute, None)
+    inner = getattr(backend, "vector_backend", None)
+    if inner is not None:
+        _warm_search_backend(inner)
+
+
+registry.register("gemini", _gemini)
+registry.register("openai", _openai)
+registry.register("openai_async", _openai_async)
+registry.register("mongo", _mongo, warm=lambda client: client.admin.command("ping"))
+registry.register("embedding_cache", _embedding_cache)
+registry.register("summary_cache", _summary_cache)
+registry.register("search_backend", _search_backend, warm=_warm_search_backend)
+registry.register("result_cache", _result_cache)
+registry.register("neighbour_table", _neighbour_table)
+
+
+def get(name):
+    return registry.get(name)
+
+
+def register(name, factory, warm=None):
+    registry.register(name, factory, warm)
+
+
+def warm_up(names=None):
+    registry.warm_up(names)
+
+
+def gemini():
+    return registry.get("gemini")
+
+
+def openai():
+    return registry.get("openai")
+
+
+def openai_async():
+    return registry.get("openai_async")
+
+
+def mongo():
+    return registry.get("mongo")
+
+
+def collection():
+    return mongo()[DB_NAME][COLLECTION_NAME]
+
+
+def embedding_cache():
+    return registry.get("embedding_cache")
+
+
+def summary_cache():
+    return registry.get("summary_cache")
+
+
+def search_backend():
+    return registry.get("search_backend")
+
+
+def result_cache():
+    return registry.get("result_cache")
+
+
+def neighbour_table():
+    return registry.get("neighbour_table")
@@ -0,0 +1,164 @@
+"""Smaller embeddings: reduced dimensions and quantized codes.
+
+``EmbeddingShape`` says how vectors are shortened before they are stored or
+searched:
+
+* ``native``: ask the API for ``dimensions`` (text-embedding-3 models only).
+  Other models fall back to ``truncate``.
+* ``truncate``: keep the first ``dimensions`` components and renormalize.
+* ``pca``: project onto the top ``dimensions`` principal components. These are
+  fitted once over the corpus and saved with ``python compact_embeddings.py fit-pca``.
+
+The same shape has to be applied to stored vectors and to query vectors, so the
+cache key includes it (``cache_model``). Quantized codes (int8, 1-bit) are used
+only to pick candidates in the local index, and the final ranking is rescored
+with full-precision vectors.
+
+Environment: EMBEDDING_DIMENSIONS, EMBEDDING_COMPACTION (native|truncate|pca) and
+EMBEDDING_PCA_PATH.
+"""
+import argparse
+import os
+
+import numpy as np
+
+FULL_DIMENSIONS = 1536  # text-embedding-ada-002
+NATIVE_MODELS = ("text-embedding-3-small", "text-embedding-3-large")
+# Popcount of every byte value, for Hamming distances over packed bit codes
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def truncate(vectors, dimensions):
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return _normalize(matrix[:, :dimensions])
+
+
+class PCAProjection:
+    def __init__(self, mean, components):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+
+    @property
+    def dimensions(self):
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, matrix, dimensions, sample=50000, seed=0):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if len(matrix) > sample:
+            matrix = matrix[np.sort(np.random.default_rng(seed).choice(len(matrix), sample, replace=False))]
+        mean = matrix.mean(axis=0)
+        # Rows of vt are the principal directions, strongest first
+        _, _, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+        return cls(mean, vt[:dimensions])
+
+    def transform(self, vectors):
+        matrix = np.asarray(vectors, dtype=np.float32)
+        return _normalize((matrix - self.mean) @ self.components.T)
+
+    def save(self, path):
+        np.savez(path, mean=self.mean, components=self.components)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["mean"], data["components"])
+
+
+class EmbeddingShape:
+    def __init__(self, dimensions=None, method="native", pca=None):
+        if method not in ("native", "truncate", "pca"):
+            raise ValueError(f"Unknown compaction {method!r}, expected 'native', 'truncate' or 'pca'")
+        if method == "pca" and pca is None:
+            raise ValueError("pca compaction needs a fitted PCAProjection")
+        self.method = method
+        self.pca = pca
+        self.dimensions = pca.dimensions if pca is not None else dimensions
+
+    @property
+    def full(self):
+        return not self.dimensions or self.dimensions >= FULL_DIMENSIONS and self.method != "pca"
+
+    def _native(self, model):
+        return self.method == "native" and model in NATIVE_MODELS
+
+    def request_options(self, model):
+        """Extra keyword arguments for ``embeddings.create``."""
+        return {"dimensions": self.dimensions} if not self.full and self._native(model) else {}
+
+    def apply(self, vectors, model):
+        """Shorten vectors returned by the API for ``model``; a no-op for full-size embeddings."""
+        if self.full or self._native(model):
+            return vectors
+        if self.method == "pca":
+            return self.pca.transform(vectors).tolist()
+        return truncate(vectors, self.dimensions).tolist()
+
+    def cache_model(self, model):
+        """Name to cache vectors under, so different shapes never share entries."""
+        if self.full:
+            return model
+        return f"{model}@{self.method}{self.dimensions}"
+
+
+def shape_from_env():
+    dimensions = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or None
+    method = os.getenv("EMBEDDING_COMPACTION", "native")
+    pca = PCAProjection.load(os.getenv("EMBEDDING_PCA_PATH", "pca.npz")) if method == "pca" else None
+    return EmbeddingShape(dimensions, method, pca)
+
+
+def quantize_int8(matrix):
+    """Symmetric per-row int8 codes for unit vectors; ``codes @ q`` ranks like ``matrix @ q``."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scale = np.abs(matrix).max(axis=1, keepdims=True)
+    scale[scale == 0] = 1.0
+    return np.round(matrix / scale * 127).astype(np.int8), (scale[:, 0] / 127).astype(np.float32)
+
+
+def quantize_binary(matrix):
+    """One sign bit per dimension, packed eight to a byte."""
+    return np.packbits(np.asarray(matrix) > 0, axis=1)
+
+
+def hamming_scores(codes, query_code):
+    """Number of matching bits between each row of ``codes`` and ``query_code``."""
+    bits = codes.shape[1] * 8
+    return bits - _POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1, dtype=np.int32)
+
+
+if __name__ == "__main__":
+    from embedding_store import StoreWriter, open_store
+
+    parser = argparse.ArgumentParser(description="Fit a PCA projection or write a reduced copy of an embedding store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fit = commands.add_parser("fit-pca", help="fit principal components over an embedding store")
+    fit.add_argument("--store", default="embeddings")
+    fit.add_argument("--dimensions", type=int, required=True)
+    fit.add_argument("--output", default="pca.npz")
+    project = commands.add_parser("project", help="write a store with every vector reduced by EMBEDDING_* settings")
+    project.add_argument("--store", default="embeddings")
+    project.add_argument("--output", required=True)
+    project.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    args = parser.parse_args()
+
+    store = open_store(args.store)
+    if args.command == "fit-pca":
+        projection = PCAProjection.fit(store.matrix, args.dimensions)
+        projection.save(args.output)
+        print(f"Saved {projection.dimensions}-dimension projection to {args.output}")
+    else:
+        shape = shape_from_env()
+        with StoreWriter(args.output, dtype=args.dtype, model=shape.cache_model(store.model)) as writer:
+            for start in range(0, len(store), 10000):
+                rows = store.rows[start:start + 10000]
+                vectors = shape.apply(store.matrix[start:start + 10000], None)
+                for row, vector in zip(rows, vectors):
+                    writer.add({"_id": row["id"], **row}, vector)
+        print(f"Wrote {len(store)} vectors to {args.output}")
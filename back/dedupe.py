@@ -0,0 +1,171 @@
+"""Offline near-duplicate detection over all project embeddings.
+
+Many Devpost projects are resubmitted to several hackathons. This job compares
+every pair of unit vectors with a blocked matrix product: row blocks against
+column blocks of the upper triangle. Memory is bounded by the block sizes, not
+by the number of projects. Pairs at or above ``threshold`` cosine are merged
+with union-find. Every project in a cluster of two or more gets a
+``duplicate_cluster`` id (the id of the cluster's first project), and searches
+can collapse each cluster to one representative.
+
+Run with ``python dedupe.py --store embeddings`` (memory-mapped store) or
+``python dedupe.py`` (vectors read from Mongo); ``--dry-run`` only reports.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from search_backends import DUPLICATE_FIELD
+
+DEFAULT_THRESHOLD = 0.95
+
+
+class UnionFind:
+    def __init__(self, count):
+        self.parent = np.arange(count)
+        self.size = np.ones(count, dtype=np.int64)
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+    def labels(self):
+        return np.array([self.find(item) for item in range(len(self.parent))])
+
+
+def iter_duplicate_pairs(matrix, threshold=DEFAULT_THRESHOLD, block_rows=2048, block_cols=8192):
+    """Yield ``(rows, cols)`` index arrays of pairs i < j whose cosine is at least ``threshold``."""
+    count = len(matrix)
+    for row_start in range(0, count, block_rows):
+        rows = np.asarray(matrix[row_start:row_start + block_rows], dtype=np.float32)
+        for col_start in range(row_start, count, block_cols):
+            cols = np.asarray(matrix[col_start:col_start + block_cols], dtype=np.float32)
+            scores = rows @ cols.T
+            hit_rows, hit_cols = np.nonzero(scores >= threshold)
+            hit_rows += row_start
+            hit_cols += col_start
+            upper = hit_rows < hit_cols
+            if upper.any():
+                yield hit_rows[upper], hit_cols[upper]
+
+
+def cluster_rows(matrix, threshold=DEFAULT_THRESHOLD, **kwargs):
+    """Cluster label (the lowest row in the cluster) per row, or -1 for projects without duplicates."""
+    forest = UnionFind(len(matrix))
+    for rows, cols in iter_duplicate_pairs(matrix, threshold, **kwargs):
+        for a, b in zip(rows.tolist(), cols.tolist()):
+            forest.union(a, b)
+    roots = forest.labels()
+    labels = np.full(len(matrix), -1, dtype=np.int64)
+    first = {}
+    for row, root in enumerate(roots.tolist()):
+        if forest.size[root] > 1:
+            labels[row] = first.setdefault(root, row)
+    return labels
+
+
+def cluster_ids(ids, labels):
+    """Map each project id to its cluster id (the first project's id) or None."""
+    return {doc_id: (ids[label] if label >= 0 else None) for doc_id, label in zip(ids, labels.tolist())}
+
+
+def _filter(doc_id, devpost_url):
+    from bson import ObjectId
+
+    if devpost_url:
+        return {"devpost_url": devpost_url}
+    return {"_id": ObjectId(doc_id) if ObjectId.is_valid(doc_id) else doc_id}
+
+
+def write_clusters(collection, rows, clusters, batch_size=1000):
+    """Set ``duplicate_cluster`` on clustered documents and clear it on the rest; returns the update count."""
+    from pymongo import UpdateOne
+
+    operations = []
+    written = 0
+    for row in rows:
+        cluster = clusters.get(row["id"])
+        update = {"$set": {DUPLICATE_FIELD: cluster}} if cluster else {"$unset": {DUPLICATE_FIELD: ""}}
+        operations.append(UpdateOne(_filter(row["id"], row.get("devpost_url")), update))
+        if len(operations) >= batch_size:
+            written += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        written += collection.bulk_write(operations, ordered=False).modified_count
+    return written
+
+
+def annotate_store(store, clusters):
+    """Record cluster ids in an embedding store's sidecar so local search can collapse without Mongo."""
+    from embedding_store import store_paths
+
+    for row in store.rows:
+        row[DUPLICATE_FIELD] = clusters.get(row["id"])
+    _, meta_path = store_paths(store.base)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(store.meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def load_rows(collection, field="embedding"):
+    rows = []
+    vectors = []
+    for doc in collection.find({field: {"$exists": True}}, {field: 1, "devpost_url": 1}):
+        rows.append({"id": str(doc["_id"]), "devpost_url": doc.get("devpost_url", "")})
+        vectors.append(doc[field])
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return rows, matrix / norms
+
+
+if __name__ == "__main__":
+    import time
+
+    import pymongo
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Find near-duplicate projects and tag them with cluster ids")
+    parser.add_argument("--store", help="embedding store base path; vectors are read from Mongo without it")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--block-rows", type=int, default=2048)
+    parser.add_argument("--dry-run", action="store_true", help="report clusters without writing them")
+    args = parser.parse_args()
+
+    collection = pymongo.MongoClient(os.getenv("MONGODB_URI"))["hackdavis"]["projects"]
+    store = None
+    if args.store:
+        from embedding_store import open_store
+
+        store = open_store(args.store)
+        rows, matrix = store.rows, store.matrix
+    else:
+        rows, matrix = load_rows(collection)
+
+    started = time.perf_counter()
+    labels = cluster_rows(matrix, args.threshold, block_rows=args.block_rows)
+    clusters = cluster_ids([row["id"] for row in rows], labels)
+    clustered = int((labels >= 0).sum())
+    print(f"Compared {len(rows)} projects in {time.perf_counter() - started:.1f}s: "
+          f"{clustered} in {len(set(labels[labels >= 0].tolist()))} duplicate clusters")
+
+    if not args.dry_run:
+        print(f"Updated {write_clusters(collection, rows, clusters)} documents")
+        if store is not None:
+            annotate_store(store, clusters)
@@ -0,0 +1,174 @@
+"""Batched embedding backfill for documents in the projects collection.
+
+Documents without an ``embedding``, or whose text changed since it was computed
+(``embedding_stale``, set by ingest.py), are grouped into batches bounded by count and
+by an estimated token budget, each batch is embedded with one embeddings call,
+and the results are written back with a single ``bulk_write``. A bounded number
+of batches are in flight at once, and rate-limited calls are retried with
+exponential backoff.
+"""
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+from compact_embeddings import shape_from_env
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_TOKENS = 50000
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_MAX_RETRIES = 6
+# EMBEDDING_DIMENSIONS / EMBEDDING_COMPACTION: how vectors are shortened, for documents and queries alike
+EMBEDDING_SHAPE = shape_from_env()
+
+
+def stale_field(field="embedding"):
+    """Flag ingest.py sets when ``field`` no longer matches the text; the old vector is served until replaced."""
+    return field + "_stale"
+
+
+def combine_summary_and_features(doc):
+    summary = doc.get("summary", "")
+    features = doc.get("features", [])
+    # Convert features array to a single string
+    features_text = " ".join([str(feature) for feature in features]) if features else ""
+    # Combine summary and features, ensuring no empty result
+    combined_text = f"{summary} {features_text}".strip()
+    return combined_text if combined_text else None
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text
+    return len(text) // 4 + 1
+
+
+def iter_batches(documents, batch_size=DEFAULT_BATCH_SIZE, max_tokens=DEFAULT_MAX_TOKENS):
+    """Group documents into lists of (doc, text) within the count and token budget."""
+    batch = []
+    tokens = 0
+    for doc in documents:
+        text = combine_summary_and_features(doc)
+        if not text:
+            print(f"No valid summary or features for project: {doc.get('title')}")
+            continue
+        cost = estimate_tokens(text)
+        if batch and (len(batch) >= batch_size or tokens + cost > max_tokens):
+            yield batch
+            batch = []
+            tokens = 0
+        batch.append((doc, text))
+        tokens += cost
+    if batch:
+        yield batch
+
+
+def is_retryable(error):
+    status = getattr(error, "status_code", None)
+    if status == 429 or (status is not None and status >= 500):
+        return True
+    return type(error).__name__ in ("RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError")
+
+
+def embed_texts(openai_client, texts, model=EMBEDDING_MODEL, max_retries=DEFAULT_MAX_RETRIES, base_delay=1.0,
+                shape=None):
+    """Embed a list of texts in one request, retrying rate limits with backoff and jitter."""
+    shape = shape or EMBEDDING_SHAPE
+    attempt = 0
+    while True:
+        try:
+            with metrics.span("embed"):
+                response = openai_client.embeddings.create(model=model, input=texts, **shape.request_options(model))
+            metrics.record_tokens(model, "input", getattr(getattr(response, "usage", None), "total_tokens", 0))
+            # The API returns one item per input, tagged with its position
+            ordered = sorted(response.data, key=lambda item: item.index)
+            return shape.apply([item.embedding for item in ordered], model)
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                metrics.record_error("openai")
+                raise
+            metrics.record_retry("openai")
+            delay = base_delay * (2 ** attempt) * (0.5 + random.random())
+            print(f"Embedding request failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+def embed_batch(openai_client, batch, model=EMBEDDING_MODEL, max_retries=DEFAULT_MAX_RETRIES, cache=None, shape=None):
+    """Embed a list of (doc, text) pairs in one request, serving texts already in ``cache``."""
+    shape = shape or EMBEDDING_SHAPE
+    texts = [text for _, text in batch]
+    cached = cache.get_many(shape.cache_model(model), texts) if cache is not None else {}
+    missing = [text for text in dict.fromkeys(texts) if text not in cached]
+    if missing:
+        vectors = embed_texts(openai_client, missing, model=model, max_retries=max_retries, shape=shape)
+        fresh = dict(zip(missing, vectors))
+        if cache is not None:
+            cache.put_many(shape.cache_model(model), fresh)
+        cached.update(fresh)
+    return batch, [cached[text] for text in texts]
+
+
+def _write_batch(collection, batch, embeddings, field):
+    # Imported here so serving processes that never backfill do not load pymongo at startup
+    from pymongo import UpdateOne
+
+    # Matching the hash read with the text skips documents whose text changed again meanwhile
+    operations = [
+        UpdateOne(
+            {"_id": doc["_id"], "embedding_text_hash": doc.get("embedding_text_hash")},
+            {"$set": {field: embedding}, "$unset": {stale_field(field): ""}},
+        )
+        for (doc, _), embedding in zip(batch, embeddings)
+    ]
+    if operations:
+        with metrics.span("write"):
+            collection.bulk_write(operations, ordered=False)
+        metrics.record_items("embed", len(operations))
+    return len(operations)
+
+
+def backfill_embeddings(collection, openai_client, model=EMBEDDING_MODEL, batch_size=DEFAULT_BATCH_SIZE,
+                        max_tokens=DEFAULT_MAX_TOKENS, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                        max_retries=DEFAULT_MAX_RETRIES, query=None, field="embedding", cache=None):
+    """Embed every document matching ``query`` (default: missing or stale ``field``) and write the vectors back.
+
+    Texts found in ``cache`` (an EmbeddingCache) are not sent to the API.
+
+    Returns a dict of counts: embedded, failed, batches.
+    """
+    if query is None:
+        query = {"$or": [{field: {"$exists": False}}, {stale_field(field): True}]}
+    documents = collection.find(
+        query, {"_id": 1, "title": 1, "summary": 1, "features": 1, "embedding_text_hash": 1}
+    )
+
+    stats = {"embedded": 0, "failed": 0, "batches": 0}
+
+    def collect(done):
+        for future in done:
+            try:
+                batch, embeddings = future.result()
+            except Exception as e:
+                failed_batch = futures.pop(future)
+                stats["failed"] += len(failed_batch)
+                print(f"Failed to embed batch of {len(failed_batch)} projects: {e}")
+                continue
+            futures.pop(future)
+            stats["embedded"] += _write_batch(collection, batch, embeddings, field)
+            stats["batches"] += 1
+            print(f"Added embeddings for {len(batch)} projects ({stats['embedded']} so far)")
+
+    futures = {}
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for batch in iter_batches(documents, batch_size, max_tokens):
+            # Backpressure: never read further ahead than the in-flight limit
+            if len(futures) >= max_in_flight:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                collect(done)
+            futures[pool.submit(embed_batch, openai_client, batch, model, max_retries, cache)] = batch
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    return stats
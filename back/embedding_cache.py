@@ -0,0 +1,140 @@
+"""Content-addressed cache of embeddings.
+
+Entries are keyed by a hash of (model name, embedded text), so the same text is
+never sent to the embeddings API twice. Lookups go through an in-process LRU
+first and then a SQLite file holding float32 vectors. The file is trimmed to
+``max_disk_entries`` by least-recent use.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+
+import metrics
+from lru import LRUCache
+
+DEFAULT_PATH = "embedding_cache.db"
+
+
+def cache_key(model, text):
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _pack(vector):
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob):
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    def __init__(self, path=DEFAULT_PATH, memory_entries=4096, max_disk_entries=500000):
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.memory = LRUCache(memory_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes_since_trim = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def get(self, model, text):
+        return self.get_many(model, [text]).get(text)
+
+    def get_many(self, model, texts):
+        """Return {text: embedding} for every text already cached."""
+        found = {}
+        missing = {}
+        for text in texts:
+            key = cache_key(model, text)
+            vector = self.memory.get(key)
+            if vector is not None:
+                found[text] = vector
+            else:
+                missing[key] = text
+
+        if missing:
+            keys = list(missing)
+            now = time.time()
+            with self._lock:
+                rows = []
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows.extend(self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ).fetchall())
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key, _ in rows]
+                    )
+                    self._conn.commit()
+            for key, blob in rows:
+                vector = _unpack(blob)
+                self.memory.put(key, vector)
+                found[missing[key]] = vector
+
+        self.hits += len(found)
+        self.misses += len(texts) - len(found)
+        metrics.record_cache("embedding", hits=len(found), misses=len(texts) - len(found))
+        return found
+
+    def put(self, model, text, vector):
+        self.put_many(model, {text: vector})
+
+    def put_many(self, model, vectors):
+        """Store {text: embedding} in both tiers."""
+        now = time.time()
+        rows = []
+        for text, vector in vectors.items():
+            key = cache_key(model, text)
+            self.memory.put(key, list(vector))
+            rows.append((key, model, len(vector), _pack(vector), now))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, last_used) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+            self._writes_since_trim += len(rows)
+            if self._writes_since_trim >= 1000:
+                self._trim()
+
+    def _trim(self):
+        # Caller holds the lock. Evict down to 90% so trims are not triggered on every write.
+        self._writes_since_trim = 0
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count <= self.max_disk_entries:
+            return
+        excess = count - int(self.max_disk_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self._conn.commit()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self.memory)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_cache(path):
+    """Open the cache at ``path``, or return None when caching is disabled with an empty path."""
+    return EmbeddingCache(path) if path else None
@@ -0,0 +1,179 @@
+"""Compact on-disk embedding store opened with ``numpy.memmap``.
+
+A store named ``embeddings`` is two files:
+
+* ``embeddings.bin``  -- row-major matrix of unit-normalised vectors (float32 or float16)
+* ``embeddings.json`` -- sidecar with dtype, dimensions, count, model and one row per
+  vector (id, devpost_url, title, summary, features, hackathon_title). Row ``i``
+  starts at byte ``i * row_bytes`` of the ``.bin`` file.
+
+Opening a store maps the matrix read-only, so every worker process shares the
+same page-cache pages and startup does not parse any floats.
+"""
+import json
+import os
+
+import numpy as np
+
+from search_backends import RESULT_FIELDS
+
+FORMAT_VERSION = 1
+DTYPES = {"float32": np.float32, "float16": np.float16}
+
+
+def store_paths(base):
+    return base + ".bin", base + ".json"
+
+
+class EmbeddingStore:
+    def __init__(self, base):
+        bin_path, meta_path = store_paths(base)
+        with open(meta_path, "r") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported embedding store version {self.meta.get('version')}")
+        self.base = base
+        self.dtype = DTYPES[self.meta["dtype"]]
+        self.dimensions = self.meta["dimensions"]
+        self.count = self.meta["count"]
+        self.rows = self.meta["rows"]
+        if self.count:
+            self.matrix = np.memmap(bin_path, dtype=self.dtype, mode="r", shape=(self.count, self.dimensions))
+        else:
+            self.matrix = np.zeros((0, self.dimensions), dtype=self.dtype)
+        self._row_of = None
+
+    @property
+    def model(self):
+        return self.meta.get("model")
+
+    def row_of(self, doc_id):
+        if self._row_of is None:
+            self._row_of = {row["id"]: i for i, row in enumerate(self.rows)}
+        return self._row_of.get(str(doc_id))
+
+    def offset_of(self, row):
+        return row * self.dimensions * np.dtype(self.dtype).itemsize
+
+    def vector(self, doc_id):
+        row = self.row_of(doc_id)
+        return None if row is None else self.matrix[row]
+
+    def __len__(self):
+        return self.count
+
+
+def open_store(base):
+    return EmbeddingStore(base)
+
+
+class StoreWriter:
+    """Writes vectors row by row to temporary files and swaps them in on close."""
+
+    def __init__(self, base, dimensions=None, dtype="float32", model=None):
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {list(DTYPES)}")
+        self.base = base
+        self.dimensions = dimensions
+        self.dtype = dtype
+        self.model = model
+        self.rows = []
+        self._bin_path, self._meta_path = store_paths(base)
+        self._file = open(self._bin_path + ".tmp", "wb")
+
+    def add(self, doc, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        if self.dimensions is None:
+            self.dimensions = len(vector)
+        if len(vector) != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions} dimensions, got {len(vector)}")
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+        self._file.write(vector.astype(DTYPES[self.dtype]).tobytes())
+        row = {"id": str(doc.get("_id", doc.get("devpost_url", len(self.rows))))}
+        row["devpost_url"] = doc.get("devpost_url", "")
+        for field in RESULT_FIELDS:
+            row[field] = doc.get(field)
+        self.rows.append(row)
+
+    def close(self):
+        self._file.close()
+        meta = {
+            "version": FORMAT_VERSION,
+            "dtype": self.dtype,
+            "dimensions": self.dimensions or 0,
+            "count": len(self.rows),
+            "normalized": True,
+            "model": self.model,
+            "rows": self.rows,
+        }
+        with open(self._meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        # Matrix first: a reader that sees the new sidecar always finds a matching matrix
+        os.replace(self._bin_path + ".tmp", self._bin_path)
+        os.replace(self._meta_path + ".tmp", self._meta_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._bin_path + ".tmp")
+
+
+def export_from_collection(collection, base, dtype="float32", model=None, field="embedding"):
+    """Stream every embedded document of the collection into a store."""
+    projection = {key: 1 for key in RESULT_FIELDS}
+    projection.update({field: 1, "devpost_url": 1})
+    with StoreWriter(base, dtype=dtype, model=model) as writer:
+        for doc in collection.find({field: {"$exists": True}}, projection):
+            writer.add(doc, doc[field])
+    return len(writer.rows)
+
+
+def export_from_summaries(path, base, openai_client, dtype="float32", cache=None, batch_size=100):
+    """Embed the records of hackathon_summaries.json(l) and write them into a store."""
+    from embedding_backfill import EMBEDDING_MODEL, embed_batch, iter_batches
+    from records import iter_items
+
+    with StoreWriter(base, dtype=dtype, model=EMBEDDING_MODEL) as writer:
+        for batch in iter_batches(iter_items(path), batch_size=batch_size):
+            batch, embeddings = embed_batch(openai_client, batch, EMBEDDING_MODEL, 6, cache)
+            for (doc, _), embedding in zip(batch, embeddings):
+                writer.add(doc, embedding)
+            print(f"Exported {len(writer.rows)} projects")
+    return len(writer.rows)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Export project embeddings into a memory-mappable store")
+    parser.add_argument("source", choices=["mongo", "summaries"])
+    parser.add_argument("--out", default="embeddings")
+    parser.add_argument("--dtype", choices=list(DTYPES), default="float32")
+    parser.add_argument("--summaries", default="hackathon_summaries.json")
+    args = parser.parse_args()
+
+    if args.source == "mongo":
+        import pymongo
+
+        collection = pymongo.MongoClient(os.getenv("MONGODB_URI"))["hackdavis"]["projects"]
+        count = export_from_collection(collection, args.out, dtype=args.dtype, model="text-embedding-ada-002")
+    else:
+        from openai import OpenAI
+
+        from embedding_cache import open_cache
+
+        count = export_from_summaries(
+            args.summaries, args.out, OpenAI(api_key=os.getenv("OPENAI_API_KEY")), dtype=args.dtype,
+            cache=open_cache(os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db")),
+        )
+    print(f"Wrote {count} embeddings to {args.out}.bin")
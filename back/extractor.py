@@ -0,0 +1,243 @@
+"""Field extraction for Devpost project and gallery pages.
+
+Shared by the scraper and the /analyze endpoint. Only the few nodes we read are
+visited: the og: meta tags, the story block and links of ``#app-details-left``,
+and the "submitted to" link. ``#built-with`` is skipped rather than removed from
+the tree. The parser backend is picked from what is installed (selectolax, then
+lxml, then BeautifulSoup's html.parser) or forced with HTML_PARSER_BACKEND.
+"""
+import os
+import re
+
+NO_SUBMISSIONS = "There are no submissions which match your criteria."
+STORY_TAGS = ("h2", "p", "ul")
+BACKEND_PREFERENCE = ("selectolax", "lxml", "bs4")
+
+
+def _story_piece(tag, text):
+    if tag == "h2":
+        return text + ": "
+    if tag == "ul":
+        return text + ","
+    return text
+
+
+def _project_doc(url, og_title, og_desc, story, github, link_text, link_href):
+    return {
+        "title": og_title if og_title is not None else "No Title",
+        "description": og_desc if og_desc is not None else "No Description",
+        "story": story.strip(),
+        "github": github,
+        "url": url,
+        "submitted_to": link_text.strip() if link_text is not None else "",
+        "hackathon": link_href or "",
+    }
+
+
+def _as_text(content):
+    return content.decode("utf-8", errors="replace") if isinstance(content, bytes) else content
+
+
+def _has_no_submissions(content):
+    if isinstance(content, bytes):
+        return NO_SUBMISSIONS.encode() in content
+    return NO_SUBMISSIONS in content
+
+
+# selectolax backend, lexbor engine when the installed version has it
+def _selectolax_parser():
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser
+    except ImportError:
+        from selectolax.parser import HTMLParser
+        return HTMLParser
+
+
+def _extract_selectolax(content, url):
+    tree = _selectolax_parser()(content)
+
+    def meta(prop):
+        node = tree.css_first(f'meta[property="{prop}"]')
+        if node is None:
+            return None
+        return node.attributes.get("content") or ""
+
+    story = ""
+    github = ""
+    app_details = tree.css_first("#app-details-left")
+    if app_details is not None:
+        divs = [child for child in app_details.iter() if child.tag == "div" and child.id != "built-with"]
+        if len(divs) >= 2:
+            for child in divs[1].iter():
+                if child.tag in STORY_TAGS and child.id != "built-with":
+                    story += _story_piece(child.tag, child.text(deep=True, separator="", strip=True))
+
+        for a in app_details.css("a[href]"):
+            href = a.attributes.get("href") or ""
+            if "https://github.com/" in href and not _inside_built_with_selectolax(a):
+                github = href
+
+    link = tree.css_first(".software-list-content > p > a")
+    return _project_doc(
+        url, meta("og:title"), meta("og:description"), story, github,
+        link.text() if link is not None else None,
+        link.attributes.get("href") if link is not None else None,
+    )
+
+
+def _inside_built_with_selectolax(node):
+    node = node.parent
+    while node is not None:
+        if node.id == "built-with":
+            return True
+        node = node.parent
+    return False
+
+
+def _links_selectolax(content, pattern):
+    tree = _selectolax_parser()(content)
+    hrefs = (a.attributes.get("href") or "" for a in tree.css("a[href]"))
+    return [href for href in hrefs if pattern.match(href)]
+
+
+# lxml backend
+def _lxml_tree(content):
+    from lxml import html as lxml_html
+
+    # Devpost serves UTF-8; without this lxml guesses latin-1 for byte input
+    parser = lxml_html.HTMLParser(encoding="utf-8") if isinstance(content, bytes) else None
+    return lxml_html.fromstring(content, parser=parser)
+
+
+def _extract_lxml(content, url):
+    tree = _lxml_tree(content)
+
+    def meta(prop):
+        values = tree.xpath(f'//meta[@property="{prop}"]')
+        return values[0].get("content", "") if values else None
+
+    def text_of(node):
+        return "".join(t.strip() for t in node.xpath(".//text()"))
+
+    story = ""
+    github = ""
+    app_details = tree.xpath('//*[@id="app-details-left"]')
+    if app_details:
+        app_details = app_details[0]
+        divs = [child for child in app_details if child.tag == "div" and child.get("id") != "built-with"]
+        if len(divs) >= 2:
+            for child in divs[1]:
+                if child.tag in STORY_TAGS and child.get("id") != "built-with":
+                    story += _story_piece(child.tag, text_of(child))
+
+        for href in app_details.xpath('.//a[@href][not(ancestor::*[@id="built-with"])]/@href'):
+            if "https://github.com/" in href:
+                github = href
+
+    links = tree.xpath(
+        '//*[contains(concat(" ", normalize-space(@class), " "), " software-list-content ")]/p/a'
+    )
+    link = links[0] if links else None
+    return _project_doc(
+        url, meta("og:title"), meta("og:description"), story, github,
+        link.text_content() if link is not None else None,
+        link.get("href") if link is not None else None,
+    )
+
+
+def _links_lxml(content, pattern):
+    tree = _lxml_tree(content)
+    return [href for href in tree.xpath("//a/@href") if pattern.match(href)]
+
+
+# BeautifulSoup backend, same walk as the original scraper
+def _extract_bs4(content, url):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+
+    def meta(prop):
+        tag = soup.find("meta", attrs={"property": prop})
+        return tag.get("content", "") if tag else None
+
+    story = ""
+    github = ""
+    app_details = soup.find(id="app-details-left")
+    if app_details:
+        divs = [div for div in app_details.find_all("div", recursive=False) if div.get("id") != "built-with"]
+        if len(divs) >= 2:
+            for child in divs[1]:
+                if child.name in STORY_TAGS and child.get("id") != "built-with":
+                    story += _story_piece(child.name, child.get_text(strip=True))
+
+        for a in app_details.find_all("a", href=True):
+            href = a["href"]
+            if "https://github.com/" in href and not a.find_parent(id="built-with"):
+                github = href
+
+    link = soup.select_one(".software-list-content > p > a")
+    return _project_doc(
+        url, meta("og:title"), meta("og:description"), story, github,
+        link.text if link is not None else None,
+        link.get("href") if link is not None else None,
+    )
+
+
+def _links_bs4(content, pattern):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+    return [a["href"] for a in soup.find_all("a", href=True) if pattern.match(a["href"])]
+
+
+_BACKENDS = {
+    "selectolax": (_extract_selectolax, _links_selectolax, "selectolax"),
+    "lxml": (_extract_lxml, _links_lxml, "lxml"),
+    "bs4": (_extract_bs4, _links_bs4, "bs4"),
+}
+
+
+def backend_available(name):
+    try:
+        __import__(_BACKENDS[name][2])
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends():
+    return [name for name in BACKEND_PREFERENCE if backend_available(name)]
+
+
+_default_backend = None
+
+
+def default_backend():
+    global _default_backend
+    if _default_backend is None:
+        forced = os.getenv("HTML_PARSER_BACKEND")
+        if forced:
+            if forced not in _BACKENDS:
+                raise ValueError(f"Unknown HTML_PARSER_BACKEND {forced!r}, expected one of {list(_BACKENDS)}")
+            _default_backend = forced
+        else:
+            backends = available_backends()
+            if not backends:
+                raise ImportError("No HTML parser available: install selectolax, lxml or beautifulsoup4")
+            _default_backend = backends[0]
+    return _default_backend
+
+
+def extract_project(content, url, backend=None):
+    """Extract the project fields from a Devpost project page (bytes or str)."""
+    return _BACKENDS[backend or default_backend()][0](content, url)
+
+
+def extract_project_links(content, pattern, backend=None):
+    """Return the project links on a gallery page, or 404 once the gallery has no submissions."""
+    if _has_no_submissions(content):
+        return 404
+    if isinstance(pattern, str):
+        pattern = re.compile(pattern)
+    return _BACKENDS[backend or default_backend()][1](content, pattern)
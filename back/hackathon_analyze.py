@@ -1,87 +1,195 @@
-import json
-from typing import List
-from pydantic import BaseModel
-from google import genai
-import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+import clients
+import metrics
+import records
+from embedding_backfill import estimate_tokens
+from prompts import GEMINI_MODEL, parse_summaries, project_prompt, summary_config, summary_prompt
+from rate_limit import RateLimiter
+
 load_dotenv()
 
-API_KEY = os.getenv("GEMINI_API_KEY")
-client = genai.Client(api_key=API_KEY)
-
-class Project(BaseModel):
-    title: str
-    summary: str
-    features: List[str]
-
-def process_hackathons():
-    """Process all hackathons and their projects."""
-    # Read hackathon data
-    with open("hackathon_data.json", "r") as f:
-        data = json.load(f)
-
-    all_results = []
-    devpost_mapping = {}
-    hackathons = data["hackathons"]
-    for hackathon in hackathons:
-        print(f"Processing {hackathon['title']}...")
-        prompt = ""
-        for projectBatch in hackathon["projects"]:
-            for project in projectBatch:
-                devpost_mapping[project["title"]] = project["url"]
-                prompt += f"""
-                Project Title: {project["title"]}
-                Project Description: {project["description"]}
-                Project Story: {project["story"]}
-                """
-        
-        prompt += """
-        Extract the main points in simple words (basically what the project does) and return the data in the following format:
-        {
-            "title": str,
-            "summary": str,
-            "features": List[str]
-        }
-        """
-    
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt,
-            config={
-                "response_mime_type": "application/json",
-                "response_schema": list[Project],
-            },
+# The Gemini client and summary cache come from the shared registry (clients.py) on first use.
+# Set SUMMARY_CACHE_PATH to an empty string to re-summarize everything.
+DEFAULT_CACHE = object()
+
+# Chunks are bounded by prompt size and by project count, which bounds the response length
+DEFAULT_CHUNK_TOKENS = 12000
+DEFAULT_CHUNK_PROJECTS = 15
+DEFAULT_WORKERS = 4
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_RETRIES = 3
+
+def chunk_projects(projects, max_tokens=DEFAULT_CHUNK_TOKENS, max_projects=DEFAULT_CHUNK_PROJECTS):
+    """Split a hackathon's projects into consecutive chunks bounded by estimated tokens and count."""
+    chunks = []
+    chunk = []
+    tokens = 0
+    for project in projects:
+        cost = estimate_tokens(project_prompt(project))
+        if chunk and (len(chunk) >= max_projects or tokens + cost > max_tokens):
+            chunks.append(chunk)
+            chunk = []
+            tokens = 0
+        chunk.append(project)
+        tokens += cost
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def request_summaries(projects, gemini_client, model=GEMINI_MODEL):
+    """One Gemini call for a list of projects; returns the parsed summaries in response order."""
+    with metrics.span("summarize"):
+        response = gemini_client.models.generate_content(
+            model=model,
+            contents=summary_prompt(projects),
+            config=summary_config(many=True),
         )
+    usage = getattr(response, "usage_metadata", None)
+    metrics.record_tokens(model, "input", getattr(usage, "prompt_token_count", 0))
+    metrics.record_tokens(model, "output", getattr(usage, "candidates_token_count", 0))
+    return parse_summaries(response.text)
 
+def match_summaries(projects, summaries):
+    """Pair each project with its summary by title, falling back to response position."""
+    by_title = {}
+    for summary in summaries:
+        by_title.setdefault(summary["title"], summary)
+    matched = []
+    for position, project in enumerate(projects):
+        summary = by_title.pop(project["title"], None)
+        if summary is None and len(summaries) == len(projects):
+            summary = summaries[position]
+        matched.append(summary)
+    return matched
+
+def summarize_chunk(projects, gemini_client=None, limiter=None, model=GEMINI_MODEL, retries=DEFAULT_RETRIES):
+    """Summarize one chunk, retrying failed or incomplete responses and splitting the chunk as a last resort.
+
+    Returns one summary (or None) per input project, in input order.
+    """
+    gemini_client = gemini_client or clients.gemini()
+    matched = [None] * len(projects)
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
         try:
-            # Parse the response text as JSON
-            response_data = json.loads(response.text)
-            print(type(response_data))
-            # Convert each item in the list to a Project model
-            projects = [Project(**item) for item in response_data]
-            print(len(projects))
-            # Convert to dictionary format
-            json_data = [project.model_dump() for project in projects]
-            for project in json_data:
-                print(project)
-                project["hackathon_title"] = hackathon["title"] or ""
-                project["hackathon_location"] = hackathon["location"] or ""
-                project["hackathon_submission_dates"] = hackathon["submission_dates"] or ""
-                project["hackathon_organization"] = hackathon["organization"] or ""
-                project["devpost_url"] = devpost_mapping[project["title"]] if project["title"] in devpost_mapping else ""
-
-            all_results.extend(json_data)
-            print(f"Successfully processed {len(projects)} projects")
+            matched = match_summaries(projects, request_summaries(projects, gemini_client, model))
+            if all(summary is not None for summary in matched):
+                return matched
+            print(f"Response covered {sum(s is not None for s in matched)}/{len(projects)} projects")
         except Exception as e:
+            metrics.record_error("gemini")
             print(f"Error processing response: {str(e)}")
-            # print(f"Response text: {response.text}")
+        if attempt < retries:
+            metrics.record_retry("gemini")
+            time.sleep(min(30, 2 ** attempt) * (0.5 + random.random()))
+
+    if len(projects) > 1:
+        # Halve the chunk so one bad project cannot sink its neighbours
+        middle = len(projects) // 2
+        left = summarize_chunk(projects[:middle], gemini_client, limiter, model, retries=1)
+        right = summarize_chunk(projects[middle:], gemini_client, limiter, model, retries=1)
+        return [old or new for old, new in zip(matched, left + right)]
+    return matched
+
+def summarize_chunk_cached(projects, gemini_client=None, limiter=None, cache=None, model=GEMINI_MODEL):
+    """summarize_chunk that records every successful summary in the summary cache."""
+    summaries = summarize_chunk(projects, gemini_client, limiter, model)
+    if cache is not None:
+        for project, summary in zip(projects, summaries):
+            if summary is not None:
+                cache.put(project, model, summary)
+    return summaries
+
+def cached_summaries(projects, cache, model=GEMINI_MODEL):
+    """Look every project up in the cache; returns one summary or None per project."""
+    if cache is None:
+        return [None] * len(projects)
+    return [cache.get(project, model) for project in projects]
+
+def merge_summaries(cached, fresh):
+    """Fill the cache misses in ``cached`` with ``fresh`` summaries, in order."""
+    fresh = iter(fresh)
+    return [summary if summary is not None else next(fresh, None) for summary in cached]
+
+def finish_summaries(hackathon, projects, summaries):
+    """Attach hackathon fields and the Devpost URL to each successful summary."""
+    results = []
+    for project, summary in zip(projects, summaries):
+        if summary is None:
+            print(f"Failed to summarize {project['title']}")
             continue
+        summary = dict(summary)
+        summary["hackathon_title"] = hackathon["title"] or ""
+        summary["hackathon_location"] = hackathon["location"] or ""
+        summary["hackathon_submission_dates"] = hackathon["submission_dates"] or ""
+        summary["hackathon_organization"] = hackathon["organization"] or ""
+        summary["devpost_url"] = project.get("url", "")
+        results.append(summary)
+    metrics.record_items("summarize", len(results))
+    return results
+
+def process_hackathons(input_path="hackathon_data.json", output_path="hackathon_summaries.json", gemini_client=None,
+                       workers=DEFAULT_WORKERS, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                       chunk_tokens=DEFAULT_CHUNK_TOKENS, chunk_projects_max=DEFAULT_CHUNK_PROJECTS,
+                       cache=DEFAULT_CACHE):
+    """Process all hackathons and their projects.
 
-    # Save all results to file
-    with open("hackathon_summaries.json", "w") as f:
-        json.dump(all_results, f, indent=2)
-    print("Results saved to hackathon_summaries.json")
+    Each hackathon is split into size-bounded chunks, chunks from the next few
+    hackathons run concurrently under a shared rate limit, and results are
+    written back in input order. Hackathons are read one at a time and
+    summaries are streamed to the output file (JSONL for ``.jsonl`` paths), so
+    memory does not grow with the corpus. Projects whose inputs are unchanged
+    since a previous run are served from the summary cache.
+    """
+    gemini_client = gemini_client or clients.gemini()
+    if cache is DEFAULT_CACHE:
+        cache = clients.summary_cache()
+    limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
+    pending = deque()
+
+    def write_oldest(writer):
+        hackathon, projects, cached, futures = pending.popleft()
+        fresh = []
+        for future in futures:
+            fresh.extend(future.result())
+        results = finish_summaries(hackathon, projects, merge_summaries(cached, fresh))
+        writer.write_all(results)
+        print(f"Successfully processed {len(results)}/{len(projects)} projects for {hackathon['title']}")
+
+    with records.open_writer(output_path) as writer, ThreadPoolExecutor(max_workers=workers) as pool:
+        for hackathon, projects in records.iter_hackathons(input_path):
+            print(f"Processing {hackathon['title']}...")
+            cached = cached_summaries(projects, cache)
+            todo = [project for project, summary in zip(projects, cached) if summary is None]
+            chunks = chunk_projects(todo, chunk_tokens, chunk_projects_max)
+            futures = [pool.submit(summarize_chunk_cached, chunk, gemini_client, limiter, cache) for chunk in chunks]
+            pending.append((hackathon, projects, cached, futures))
+            # Keep only a few hackathons in flight so memory stays bounded
+            while len(pending) > workers:
+                write_oldest(writer)
+        while pending:
+            write_oldest(writer)
+    print(f"Results saved to {output_path}")
+    if cache is not None:
+        print(f"Summary cache: {cache.stats()}")
+    print(metrics.summary())
 
 if __name__ == "__main__":
-    process_hackathons() 
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize scraped projects with Gemini")
+    parser.add_argument("--input", default="hackathon_data.json", help="nested JSON or JSONL records")
+    parser.add_argument("--output", default="hackathon_summaries.json", help="a .jsonl path writes one summary per line")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent Gemini requests")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_REQUESTS_PER_MINUTE, help="Gemini requests per minute")
+    parser.add_argument("--chunk-tokens", type=int, default=DEFAULT_CHUNK_TOKENS)
+    parser.add_argument("--chunk-projects", type=int, default=DEFAULT_CHUNK_PROJECTS)
+    args = parser.parse_args()
+    process_hackathons(args.input, args.output, workers=args.workers, requests_per_minute=args.rpm,
+                       chunk_tokens=args.chunk_tokens, chunk_projects_max=args.chunk_projects)
@@ -0,0 +1,167 @@
+"""Incremental ingestion of hackathon_summaries.json(l) into the projects collection.
+
+Records are streamed from the summaries file and upserted with ``bulk_write``
+keyed on ``devpost_url``. Each record carries a ``content_hash``, so unchanged
+records are skipped. When the summary or features change, the stored
+``embedding`` is flagged stale (it keeps serving searches until it is replaced),
+and the next backfill re-embeds exactly those documents.
+"""
+import hashlib
+import json
+import os
+
+from pymongo import ASCENDING, UpdateOne
+
+from embedding_backfill import combine_summary_and_features, stale_field
+from records import iter_items
+
+PROJECT_FIELDS = [
+    "title", "summary", "features", "hackathon_title", "hackathon_location",
+    "hackathon_submission_dates", "hackathon_organization", "devpost_url",
+]
+DEFAULT_BATCH_SIZE = 500
+
+
+def content_hash(record):
+    body = json.dumps({field: record.get(field) for field in PROJECT_FIELDS}, sort_keys=True)
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def embedding_text_hash(record):
+    return hashlib.sha256((combine_summary_and_features(record) or "").encode("utf-8")).hexdigest()
+
+
+def record_key(record):
+    return record.get("devpost_url") or ("", record.get("title"), record.get("hackathon_title"))
+
+
+def record_filter(record):
+    if record.get("devpost_url"):
+        return {"devpost_url": record["devpost_url"]}
+    # A few summaries have no URL; fall back to title within the hackathon
+    return {"devpost_url": "", "title": record.get("title"), "hackathon_title": record.get("hackathon_title")}
+
+
+def ensure_indexes(collection):
+    """Create the lookup indexes if they are missing."""
+    existing = collection.index_information()
+    if "devpost_url_1" not in existing:
+        collection.create_index(
+            [("devpost_url", ASCENDING)], unique=True, partialFilterExpression={"devpost_url": {"$gt": ""}}
+        )
+    if "hackathon_title_1" not in existing:
+        collection.create_index([("hackathon_title", ASCENDING)])
+
+
+def _existing_hashes(collection, batch):
+    urls = [record["devpost_url"] for record in batch if record.get("devpost_url")]
+    clauses = [{"devpost_url": {"$in": urls}}] if urls else []
+    clauses.extend(record_filter(record) for record in batch if not record.get("devpost_url"))
+    found = {}
+    if clauses:
+        projection = {
+            "devpost_url": 1, "title": 1, "hackathon_title": 1, "summary": 1, "features": 1,
+            "content_hash": 1, "embedding_text_hash": 1,
+        }
+        for doc in collection.find({"$or": clauses}, projection):
+            found[record_key(doc)] = doc
+    return found
+
+
+def _ingest_batch(collection, batch, stats, on_change=None):
+    # The same project can appear twice in one file; the last record wins
+    batch = list({record_key(record): record for record in batch}.values())
+    existing = _existing_hashes(collection, batch)
+    operations = []
+    changed = []
+    for record in batch:
+        digest = content_hash(record)
+        current = existing.get(record_key(record))
+        if current is not None and current.get("content_hash") == digest:
+            stats["unchanged"] += 1
+            continue
+
+        text_digest = embedding_text_hash(record)
+        update = {"$set": {field: record.get(field) for field in PROJECT_FIELDS}}
+        update["$set"]["content_hash"] = digest
+        update["$set"]["embedding_text_hash"] = text_digest
+        if current is None:
+            stats["queued_for_embedding"] += 1
+        elif (current.get("embedding_text_hash") or embedding_text_hash(current)) != text_digest:
+            # Documents ingested before the hash existed are compared on their stored text
+            update["$set"][stale_field()] = True
+            stats["queued_for_embedding"] += 1
+        operations.append(UpdateOne(record_filter(record), update, upsert=True))
+        changed.append(dict(record, _id=current["_id"]) if current is not None else dict(record))
+        stats["inserted" if current is None else "updated"] += 1
+
+    if operations:
+        result = collection.bulk_write(operations, ordered=False)
+        if on_change is not None:
+            # New documents get their _id from the upsert, keyed by operation index
+            for index, _id in result.upserted_ids.items():
+                changed[index]["_id"] = _id
+            on_change(changed)
+
+
+def ingest_summaries(collection, path, batch_size=DEFAULT_BATCH_SIZE, on_change=None):
+    """Upsert every record of ``path`` into ``collection``; returns counts.
+
+    ``on_change`` is called with each list of inserted/updated records, with their ``_id``, after it is written.
+    """
+    ensure_indexes(collection)
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0, "queued_for_embedding": 0}
+    batch = []
+    for record in iter_items(path):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            _ingest_batch(collection, batch, stats, on_change)
+            batch = []
+    if batch:
+        _ingest_batch(collection, batch, stats, on_change)
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import pymongo
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Load hackathon summaries into the projects collection")
+    parser.add_argument("path", nargs="?", default="hackathon_summaries.json")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--embed", choices=["none", "now", "queue"], default="queue",
+                        help="re-embed changed records inline, via the job queue, or not at all")
+    parser.add_argument("--lexical-index", default=os.getenv("LEXICAL_INDEX_PATH", "lexical_index.json"),
+                        help="BM25 index for hybrid search to update in place; empty to skip")
+    args = parser.parse_args()
+
+    collection = pymongo.MongoClient(os.getenv("MONGODB_URI"))["hackdavis"]["projects"]
+    lexical = None
+    if args.lexical_index and os.path.exists(args.lexical_index):
+        from lexical_index import BM25Index
+
+        lexical = BM25Index.load(args.lexical_index)
+    on_change = lexical.update_many if lexical is not None else None
+    stats = ingest_summaries(collection, args.path, batch_size=args.batch_size, on_change=on_change)
+    print(f"Ingested {args.path}: {stats}")
+    if lexical is not None and (stats["inserted"] or stats["updated"]):
+        lexical.save(args.lexical_index)
+        print(f"Updated lexical index {args.lexical_index}: {len(lexical)} projects")
+
+    if stats["queued_for_embedding"]:
+        if args.embed == "now":
+            import main
+            from neighbours import collection_from_env, refresh
+
+            main.add_embedding_to_document()
+            table = collection_from_env(collection.database)
+            if table is not None:
+                print(f"Refreshed neighbour table: {refresh(collection, table)}")
+        elif args.embed == "queue":
+            from jobs import JobQueue
+
+            job_id = JobQueue(os.getenv("JOBS_DB_PATH", "jobs.db")).submit("embed")
+            print(f"Queued embedding job {job_id}")
@@ -0,0 +1,338 @@
+"""SQLite-backed job queue and worker processes for long-running analysis work.
+
+Jobs are rows in ``jobs.db``. Every job kind is tied to the upstream it mostly
+waits on (Devpost, Gemini or OpenAI). A worker only claims a job while fewer
+than that upstream's limit are running across all workers, so slow model calls
+cannot crowd out everything else. Claims carry a lease: jobs whose worker died
+go back to the queue once the lease expires. Workers renew the lease while a
+job runs, and an expired lease counts as a failed attempt. Run workers with
+``python jobs.py worker --processes 4``.
+
+Files named in a payload (``input``, ``output``, ``checkpoint``) are resolved
+inside JOBS_DATA_DIR (default: this directory); jobs naming anything outside it
+are rejected at submission.
+"""
+import importlib.util
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+import uuid
+from multiprocessing import Process
+
+DEFAULT_PATH = "jobs.db"
+DEFAULT_LEASE = 3600
+BACK_DIR = os.path.dirname(os.path.abspath(__file__))
+PATH_FIELDS = ("input", "output", "checkpoint")
+
+# kind -> upstream it is limited by
+JOB_UPSTREAMS = {
+    "analyze": "gemini",
+    "scrape": "devpost",
+    "summarize": "gemini",
+    "embed": "openai",
+}
+DEFAULT_UPSTREAM_LIMITS = {"devpost": 2, "gemini": 4, "openai": 2}
+
+
+def data_dir():
+    return os.path.realpath(os.getenv("JOBS_DATA_DIR", BACK_DIR))
+
+
+def job_path(payload, field, default):
+    """``payload[field]`` (or ``default``) resolved inside the data directory; ValueError if it escapes it."""
+    root = data_dir()
+    path = os.path.realpath(os.path.join(root, payload.get(field) or default))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"{field} must be a path inside {root}")
+    return path
+
+
+def validate_payload(payload):
+    if not isinstance(payload, dict):
+        raise ValueError("payload must be a JSON object")
+    for field in PATH_FIELDS:
+        value = payload.get(field)
+        if value is not None:
+            if not isinstance(value, str):
+                raise ValueError(f"{field} must be a string")
+            job_path(payload, field, "")
+
+
+def upstream_limits_from_env():
+    return {
+        name: int(os.getenv(f"JOBS_{name.upper()}_CONCURRENCY", value))
+        for name, value in DEFAULT_UPSTREAM_LIMITS.items()
+    }
+
+
+class JobQueue:
+    def __init__(self, path=DEFAULT_PATH, upstream_limits=None, lease=DEFAULT_LEASE):
+        self.path = path
+        self.upstream_limits = upstream_limits or upstream_limits_from_env()
+        self.lease = lease
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, upstream TEXT NOT NULL, payload TEXT NOT NULL,"
+            " status TEXT NOT NULL, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+            " max_attempts INTEGER NOT NULL, worker TEXT, created_at REAL NOT NULL, started_at REAL,"
+            " finished_at REAL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if "heartbeat_at" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, upstream, created_at)")
+
+    def submit(self, kind, payload=None, max_attempts=3):
+        if kind not in JOB_UPSTREAMS:
+            raise ValueError(f"Unknown job kind {kind!r}, expected one of {sorted(JOB_UPSTREAMS)}")
+        validate_payload(payload or {})
+        job_id = uuid.uuid4().hex
+        self._conn.execute(
+            "INSERT INTO jobs (id, kind, upstream, payload, status, max_attempts, created_at)"
+            " VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, kind, JOB_UPSTREAMS[kind], json.dumps(payload or {}), max_attempts, time.time()),
+        )
+        return job_id
+
+    def claim(self, worker):
+        """Atomically move the oldest runnable job to 'running' and return it, or None."""
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Jobs whose worker stopped renewing its lease: the lost run counts as an attempt
+            self._conn.execute(
+                "UPDATE jobs SET worker = NULL, error = 'lease expired', finished_at = ?,"
+                " status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END"
+                " WHERE status = 'running' AND COALESCE(heartbeat_at, started_at) < ?",
+                (now, now - self.lease),
+            )
+            running = dict(self._conn.execute(
+                "SELECT upstream, COUNT(*) FROM jobs WHERE status = 'running' GROUP BY upstream"
+            ).fetchall())
+            open_upstreams = [
+                name for name, limit in self.upstream_limits.items() if running.get(name, 0) < limit
+            ]
+            if not open_upstreams:
+                self._conn.execute("COMMIT")
+                return None
+            placeholders = ",".join("?" * len(open_upstreams))
+            row = self._conn.execute(
+                f"SELECT id, kind, payload, attempts FROM jobs WHERE status = 'queued' AND upstream IN ({placeholders})"
+                " ORDER BY created_at LIMIT 1",
+                open_upstreams,
+            ).fetchone()
+            if row is None:
+                self._conn.execute("COMMIT")
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, heartbeat_at = ?,"
+                " attempts = attempts + 1 WHERE id = ?",
+                (worker, now, now, row[0]),
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return {"id": row[0], "kind": row[1], "payload": json.loads(row[2]), "attempts": row[3] + 1}
+
+    def renew(self, job_id, worker):
+        """Extend the lease of a running job; False once the job is no longer this worker's."""
+        cursor = self._conn.execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time(), job_id, worker),
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id, result):
+        self._conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL, finished_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id),
+        )
+
+    def fail(self, job_id, error):
+        """Requeue the job if it has attempts left, otherwise mark it failed."""
+        self._conn.execute(
+            "UPDATE jobs SET error = ?, finished_at = ?,"
+            " status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,"
+            " worker = NULL WHERE id = ?",
+            (error, time.time(), job_id),
+        )
+
+    def status(self, job_id):
+        row = self._conn.execute(
+            "SELECT id, kind, status, attempts, error, created_at, started_at, finished_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ["id", "kind", "status", "attempts", "error", "created_at", "started_at", "finished_at"]
+        return dict(zip(keys, row))
+
+    def result(self, job_id):
+        row = self._conn.execute("SELECT status, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "result": json.loads(row[1]) if row[1] is not None else None}
+
+    def counts(self):
+        return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def close(self):
+        self._conn.close()
+
+
+# Task handlers. Heavy modules are imported inside the worker process only.
+def run_analyze(payload):
+    import app
+
+    results = app.run_analysis(payload["url"])
+    if results is None:
+        raise RuntimeError(f"Could not analyze {payload['url']}")
+    return results
+
+
+def _load_webscrap_module(filename, module_name):
+    # Loaded by path: webscrap/ on sys.path would make `import main` find webscrap/main.py in later jobs
+    if module_name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(BACK_DIR, "webscrap", filename + ".py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[module_name]
+
+
+def load_scraper():
+    """webscrap/main.py as ``webscrap_main``; the checkpoint module it imports by plain name is loaded first."""
+    _load_webscrap_module("checkpoint", "checkpoint")
+    return _load_webscrap_module("main", "webscrap_main")
+
+
+def run_scrape(payload):
+    scraper = load_scraper()
+    CheckpointStore = scraper.CheckpointStore
+
+    with open(job_path(payload, "input", os.path.join("webscrap", "data.json")), "r") as f:
+        listing = json.load(f)
+    output = job_path(payload, "output", os.path.join("webscrap", "hackathon_data.json"))
+    checkpoint = CheckpointStore(job_path(payload, "checkpoint", "")) if payload.get("checkpoint") else None
+    try:
+        scraper.write_output(output, scraper.iter_crawl_concurrent(
+            listing["hackathons"],
+            workers=payload.get("workers", 16),
+            per_host=payload.get("per_host", 8),
+            checkpoint=checkpoint,
+            parse_processes=payload.get("parse_processes", 0),
+        ))
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    return {"output": output}
+
+
+def run_summarize(payload):
+    import hackathon_analyze
+
+    output = job_path(payload, "output", "hackathon_summaries.json")
+    hackathon_analyze.process_hackathons(job_path(payload, "input", "hackathon_data.json"), output)
+    return {"output": output}
+
+
+def run_embed(payload):
+    import clients
+    import main
+    from neighbours import collection_from_env, refresh
+
+    stats = main.add_embedding_to_document(batch_size=payload.get("batch_size", 100))
+    if stats is None:
+        raise RuntimeError("Embedding backfill failed")
+    # New embeddings change the neighbour table; only the affected lists are rewritten
+    table = collection_from_env(clients.mongo()[clients.DB_NAME])
+    if table is not None and stats["embedded"]:
+        stats["neighbours"] = refresh(clients.collection(), table)
+    return stats
+
+
+HANDLERS = {
+    "analyze": run_analyze,
+    "scrape": run_scrape,
+    "summarize": run_summarize,
+    "embed": run_embed,
+}
+
+
+def renew_lease(path, job_id, worker, interval, stop):
+    """Renew a running job's lease every ``interval`` seconds until ``stop`` is set."""
+    queue = JobQueue(path)
+    try:
+        while not stop.wait(interval):
+            if not queue.renew(job_id, worker):
+                break
+    finally:
+        queue.close()
+
+
+def work(path=DEFAULT_PATH, poll_interval=1.0, max_jobs=None):
+    """Claim and run jobs until ``max_jobs`` have been processed (forever if None)."""
+    queue = JobQueue(path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    print(f"Worker {worker} polling {path}")
+    while max_jobs is None or processed < max_jobs:
+        job = queue.claim(worker)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        print(f"Running {job['kind']} job {job['id']} (attempt {job['attempts']})")
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=renew_lease, args=(path, job["id"], worker, queue.lease / 3, stop), daemon=True
+        )
+        heartbeat.start()
+        try:
+            queue.complete(job["id"], HANDLERS[job["kind"]](job["payload"]))
+        except Exception as e:
+            traceback.print_exc()
+            queue.fail(job["id"], f"{type(e).__name__}: {e}")
+        finally:
+            stop.set()
+            heartbeat.join()
+        processed += 1
+    queue.close()
+
+
+def start_workers(processes, path=DEFAULT_PATH, poll_interval=1.0):
+    workers = [Process(target=work, args=(path, poll_interval), daemon=True) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Job queue workers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    worker_parser = sub.add_parser("worker", help="run worker processes")
+    worker_parser.add_argument("--processes", type=int, default=4)
+    worker_parser.add_argument("--poll-interval", type=float, default=1.0)
+    submit_parser = sub.add_parser("submit", help="queue a job")
+    submit_parser.add_argument("kind", choices=sorted(JOB_UPSTREAMS))
+    submit_parser.add_argument("--payload", default="{}", help="JSON payload")
+    parser.add_argument("--db", default=os.getenv("JOBS_DB_PATH", DEFAULT_PATH))
+    args = parser.parse_args()
+
+    if args.command == "submit":
+        print(JobQueue(args.db).submit(args.kind, json.loads(args.payload)))
+    else:
+        for process in start_workers(args.processes, args.db, args.poll_interval):
+            process.join()
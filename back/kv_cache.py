@@ -0,0 +1,89 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class SQLiteCache:
+    """JSON values in a SQLite table with a TTL and a size bound.
+
+    ``get`` returns ``(value, age_seconds)`` so callers can decide how to treat
+    entries that are close to expiry. Expired rows are removed lazily, and the
+    least recently used rows are evicted once the table grows past ``max_entries``.
+    """
+
+    def __init__(self, path, table="cache", ttl=None, max_entries=100000):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes_since_trim = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used)")
+        self._conn.commit()
+
+    def get(self, key, max_age=None):
+        """Return (value, age) or None. ``max_age`` overrides the TTL for this lookup."""
+        now = time.time()
+        limit = max_age if max_age is not None else self.ttl
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            age = now - row[1]
+            if limit is not None and age > limit:
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0]), age
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._conn.commit()
+            self._writes_since_trim += 1
+            if self._writes_since_trim >= 500:
+                self._trim(now)
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def _trim(self, now):
+        # Caller holds the lock
+        self._writes_since_trim = 0
+        if self.ttl is not None:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl,))
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        if count > self.max_entries:
+            excess = count - int(self.max_entries * 0.9)
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN"
+                f" (SELECT key FROM {self.table} ORDER BY last_used LIMIT ?)", (excess,)
+            )
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,166 @@
+"""In-process BM25 inverted index over project titles, summaries and features.
+
+Embeddings miss exact matches on project names, technologies and hackathon
+names, so hybrid search combines this index with vector search (see
+``HybridSearchBackend``). Title and features matches are weighted above summary
+text. Long queries (a whole summary) keep only their ``max_query_terms`` rarest
+terms and skip terms found in most documents, so a query scans a few short
+posting lists rather than the corpus.
+
+The index is updated one document at a time (``add`` / ``update_many``, wired to
+``ingest.py``). It is saved as JSON holding the indexed fields, and the postings
+are rebuilt on load.
+"""
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+DEFAULT_PATH = "lexical_index.json"
+FORMAT_VERSION = 1
+FIELD_WEIGHTS = {"title": 3.0, "features": 2.0, "hackathon_title": 1.5, "summary": 1.0}
+STORED_FIELDS = ["_id", "devpost_url", "title", "summary", "features", "hackathon_title"]
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with "
+    "their they them which who can our we you your using used uses use app project".split()
+)
+_TOKEN = re.compile(r"[a-z0-9]+(?:[+#]+|\.js)?")
+
+
+def tokenize(text):
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def doc_key(doc):
+    return doc.get("devpost_url") or f"{doc.get('hackathon_title')}\0{doc.get('title')}"
+
+
+def _field_text(value):
+    if isinstance(value, list):
+        return " ".join(str(item) for item in value)
+    return str(value) if value else ""
+
+
+class BM25Index:
+    def __init__(self, k1=1.2, b=0.75, field_weights=None, max_query_terms=32, max_document_ratio=0.5):
+        self.k1 = k1
+        self.b = b
+        self.field_weights = field_weights or FIELD_WEIGHTS
+        self.max_query_terms = max_query_terms
+        self.max_document_ratio = max_document_ratio
+        self.docs = {}
+        self.postings = {}
+        self.lengths = {}
+        self._total_length = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _weighted_terms(self, doc):
+        terms = Counter()
+        for field, weight in self.field_weights.items():
+            for token in tokenize(_field_text(doc.get(field))):
+                terms[token] += weight
+        return terms
+
+    def add(self, doc):
+        key = doc_key(doc)
+        stored = {field: doc.get(field) for field in STORED_FIELDS if doc.get(field) is not None}
+        if "_id" in stored:
+            stored["_id"] = str(stored["_id"])
+        terms = self._weighted_terms(doc)
+        with self._lock:
+            self._remove(key)
+            self.docs[key] = stored
+            self.lengths[key] = sum(terms.values())
+            self._total_length += self.lengths[key]
+            for term, weight in terms.items():
+                self.postings.setdefault(term, {})[key] = weight
+
+    def _remove(self, key):
+        stored = self.docs.pop(key, None)
+        if stored is None:
+            return
+        self._total_length -= self.lengths.pop(key)
+        for term in self._weighted_terms(stored):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(key, None)
+                if not posting:
+                    del self.postings[term]
+
+    def remove(self, doc):
+        with self._lock:
+            self._remove(doc_key(doc))
+
+    def update_many(self, docs):
+        """Add or replace documents; usable as ``ingest_summaries(on_change=...)``."""
+        for doc in docs:
+            self.add(doc)
+
+    def _query_terms(self, query):
+        # Terms in over half the corpus score close to nothing but have the longest posting lists
+        limit = max(1, len(self.docs) * self.max_document_ratio)
+        terms = [term for term in set(tokenize(query)) if 0 < len(self.postings.get(term, ())) <= limit]
+        if len(terms) > self.max_query_terms:
+            terms = heapq.nsmallest(self.max_query_terms, terms, key=lambda term: len(self.postings[term]))
+        return terms
+
+    def search(self, query, limit=5, hackathon_filter=None):
+        with self._lock:
+            count = len(self.docs)
+            if not count:
+                return []
+            average = self._total_length / count
+            k1, b = self.k1, self.b
+            scores = {}
+            for term in self._query_terms(query):
+                posting = self.postings[term]
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for key, tf in posting.items():
+                    norm = k1 * (1 - b + b * self.lengths[key] / average)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+            if hackathon_filter:
+                scores = {key: score for key, score in scores.items()
+                          if self.docs[key].get("hackathon_title") == hackathon_filter}
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [dict(self.docs[key], score=score) for key, score in top]
+
+    @classmethod
+    def from_documents(cls, documents, **kwargs):
+        index = cls(**kwargs)
+        index.update_many(documents)
+        return index
+
+    @classmethod
+    def from_collection(cls, collection, **kwargs):
+        return cls.from_documents(collection.find({}, {field: 1 for field in STORED_FIELDS}), **kwargs)
+
+    def save(self, path=DEFAULT_PATH):
+        with self._lock:
+            data = {"version": FORMAT_VERSION, "k1": self.k1, "b": self.b, "docs": list(self.docs.values())}
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH, **kwargs):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported lexical index version {data.get('version')}")
+        return cls.from_documents(data["docs"], k1=data["k1"], b=data["b"], **kwargs)
+
+
+def open_lexical_index(collection, path=DEFAULT_PATH):
+    """The saved index at ``path`` if there is one, otherwise one built from ``collection``."""
+    if path and os.path.exists(path):
+        return BM25Index.load(path)
+    index = BM25Index.from_collection(collection)
+    if path:
+        index.save(path)
+    return index
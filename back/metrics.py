@@ -0,0 +1,223 @@
+"""In-process instrumentation: stage timings, upstream errors and retries, cache hits and tokens.
+
+Code marks the stages it runs with ``with metrics.span("summarize"):``. Each span
+feeds a Prometheus histogram (``hackdavis_stage_seconds{stage=...}``). Inside a
+request (``start_request()`` ... ``request_timings()``), spans are also collected
+for a ``Server-Timing`` header that breaks down where one request spent its time.
+Counters cover upstream errors and retries, cache hits and misses, and model
+tokens. ``render()`` produces the Prometheus text exposition format served on
+``/metrics``.
+
+Batch scripts use the same spans. ``summary()`` prints per-stage throughput and
+latency at the end of a run. With METRICS_TEXTFILE set, the final metrics are
+also written there on exit (for the node_exporter textfile collector).
+
+Metrics are per process. Under a pre-fork server, each worker serves its own.
+"""
+import atexit
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "hackdavis"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; covers parse (ms) through slow model calls (tens of seconds)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple((name, labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple((name, labels.get(name, "")) for name in self.label_names), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple((name, labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {key: {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}
+                    for key, s in self._series.items()}
+
+    def quantile(self, q, **labels):
+        """Upper bucket bound holding the ``q`` quantile (what Prometheus' histogram_quantile approximates)."""
+        series = self.snapshot().get(tuple((name, labels.get(name, "")) for name in self.label_names))
+        if not series or not series["count"]:
+            return None
+        target = q * series["count"]
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), series["counts"]):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series["counts"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_label_text(key + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(key)} {series['sum']}")
+            lines.append(f"{self.name}_count{_label_text(key)} {series['count']}")
+        return lines
+
+
+stage_seconds = Histogram(f"{PREFIX}_stage_seconds", "Time spent per pipeline stage.", ["stage"])
+stage_errors = Counter(f"{PREFIX}_stage_errors_total", "Stages that raised.", ["stage"])
+upstream_errors = Counter(f"{PREFIX}_upstream_errors_total", "Failed calls to an upstream service.", ["upstream"])
+upstream_retries = Counter(f"{PREFIX}_upstream_retries_total", "Retried calls to an upstream service.", ["upstream"])
+cache_requests = Counter(f"{PREFIX}_cache_requests_total", "Cache lookups by outcome.", ["cache", "result"])
+model_tokens = Counter(f"{PREFIX}_model_tokens_total", "Tokens reported by model APIs.", ["model", "kind"])
+items_processed = Counter(f"{PREFIX}_items_total", "Items completed by batch jobs.", ["job"])
+METRICS = [stage_seconds, stage_errors, upstream_errors, upstream_retries, cache_requests, model_tokens,
+           items_processed]
+
+
+@contextmanager
+def span(stage):
+    """Time a stage; recorded in the histogram and in the current request's timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_errors.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def record_error(upstream):
+    upstream_errors.inc(upstream=upstream)
+
+
+def record_retry(upstream):
+    upstream_retries.inc(upstream=upstream)
+
+
+def record_cache(cache, hits=0, misses=0, stale=0):
+    if hits:
+        cache_requests.inc(hits, cache=cache, result="hit")
+    if misses:
+        cache_requests.inc(misses, cache=cache, result="miss")
+    if stale:
+        cache_requests.inc(stale, cache=cache, result="stale")
+
+
+def record_tokens(model, kind, count):
+    if count:
+        model_tokens.inc(count, model=model, kind=kind)
+
+
+def record_items(job, count=1):
+    items_processed.inc(count, job=job)
+
+
+def start_request():
+    """Begin collecting span timings for the current request (context)."""
+    return _request_timings.set([])
+
+
+def request_timings():
+    return list(_request_timings.get() or [])
+
+
+def end_request(token):
+    _request_timings.reset(token)
+
+
+def server_timing_header(timings):
+    """``Server-Timing`` value; repeated stages are summed, in first-seen order."""
+    totals = {}
+    for stage, elapsed in timings:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    return ", ".join(f"{stage};dur={elapsed * 1000:.1f}" for stage, elapsed in totals.items())
+
+
+def server_timing_enabled():
+    return os.getenv("SERVER_TIMING", "").lower() in ("1", "true", "yes")
+
+
+def render():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def summary():
+    """One line per stage: count, throughput over the summed stage time, and p50/p99 bucket bounds."""
+    lines = []
+    for key, series in sorted(stage_seconds.snapshot().items()):
+        stage = dict(key)["stage"]
+        rate = series["count"] / series["sum"] if series["sum"] else float("inf")
+        p50 = stage_seconds.quantile(0.5, stage=stage)
+        p99 = stage_seconds.quantile(0.99, stage=stage)
+        lines.append(f"{stage:<20} n={series['count']:<7} {rate:>9.1f}/s per worker   "
+                     f"p50<={p50}s p99<={p99}s")
+    return "\n".join(lines)
+
+
+def write_textfile(path):
+    with open(path + ".tmp", "w") as f:
+        f.write(render())
+    os.replace(path + ".tmp", path)
+
+
+if os.getenv("METRICS_TEXTFILE"):
+    atexit.register(lambda: write_textfile(os.environ["METRICS_TEXTFILE"]))
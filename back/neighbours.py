@@ -0,0 +1,299 @@
+"""Precomputed nearest neighbours of every stored project, for /analyze on known URLs.
+
+Most URLs sent to /analyze are already in the projects collection. This job
+ranks every project against all others with blocked matrix products over the
+stored embeddings and keeps its top ``k`` (optionally also the top ``k`` within
+its own hackathon). The result is one small document per project in the
+``neighbours`` collection, keyed by the normalized Devpost URL. Each neighbour
+is already trimmed to the result projection, so a known URL is answered with one
+``_id`` lookup instead of scraping, summarizing, embedding and searching.
+
+Refreshes are incremental. Only projects that are new or whose embedding text
+changed (tracked by ``embedding_text_hash``, see ingest.py) are ranked against
+the corpus. Their scores against every other project are merged into the
+stored lists, and only the lists that change are rewritten. Run
+``python neighbours.py`` after an embedding backfill, or ``--full`` to rebuild.
+
+NEIGHBOUR_COLLECTION names the table; set it to an empty string to disable it.
+Lookups give up after NEIGHBOUR_LOOKUP_TIMEOUT_MS (default 300) and fall back to
+the full analysis, so an unreachable database does not stall /analyze.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pymongo
+from pymongo.errors import PyMongoError
+
+from result_cache import normalize_url
+from search_backends import DUPLICATE_FIELD, result_fields_from_env
+
+DEFAULT_K = 25
+NEIGHBOUR_COLLECTION = "neighbours"
+DEFAULT_LOOKUP_TIMEOUT_MS = 300
+# Above this share of changed projects a full rebuild is cheaper than merging
+FULL_REBUILD_RATIO = 0.5
+
+
+def collection_from_env(db):
+    name = os.getenv("NEIGHBOUR_COLLECTION", NEIGHBOUR_COLLECTION)
+    return db[name] if name else None
+
+
+def open_neighbour_table(db):
+    """The NeighbourTable in ``db``, or None when NEIGHBOUR_COLLECTION is empty."""
+    table = collection_from_env(db)
+    if table is None:
+        return None
+    timeout_ms = int(os.getenv("NEIGHBOUR_LOOKUP_TIMEOUT_MS", DEFAULT_LOOKUP_TIMEOUT_MS))
+    return NeighbourTable(table, timeout=timeout_ms / 1000)
+
+
+def top_k_blocked(queries, matrix, k, exclude=None, groups=None, query_groups=None, block_cols=65536):
+    """Top-``k`` column indices and scores per query row, scanning ``matrix`` in column blocks.
+
+    ``exclude`` holds, per query, a column to skip (its own row) or -1. With
+    ``groups`` (one label per matrix row) and ``query_groups``, only columns with
+    the query's label are ranked. Missing neighbours are padded with index -1.
+    """
+    count = len(queries)
+    best_rows = np.full((count, k), -1, dtype=np.int64)
+    best_scores = np.full((count, k), -np.inf, dtype=np.float32)
+    for col_start in range(0, len(matrix), block_cols):
+        cols = np.asarray(matrix[col_start:col_start + block_cols], dtype=np.float32)
+        scores = queries @ cols.T
+        if exclude is not None:
+            local = exclude - col_start
+            hit = (local >= 0) & (local < len(cols))
+            scores[np.nonzero(hit)[0], local[hit]] = -np.inf
+        if groups is not None:
+            scores[query_groups[:, None] != groups[None, col_start:col_start + len(cols)]] = -np.inf
+        rows = np.broadcast_to(np.arange(col_start, col_start + len(cols)), scores.shape)
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_rows = np.concatenate([best_rows, rows], axis=1)
+        keep = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, keep, axis=1)
+        best_rows = np.take_along_axis(merged_rows, keep, axis=1)
+    order = np.argsort(-best_scores, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_rows = np.take_along_axis(best_rows, order, axis=1)
+    best_rows[~np.isfinite(best_scores)] = -1
+    return best_rows, best_scores
+
+
+def _result(doc, score):
+    row = dict(doc)
+    row["score"] = float(score)
+    return row
+
+
+def _entries(docs, rows, scores):
+    return [_result(docs[row], score) for row, score in zip(rows.tolist(), scores.tolist()) if row >= 0]
+
+
+def compute(matrix, docs, query_rows, k=DEFAULT_K, per_hackathon=False, block_rows=1024):
+    """Yield ``(row, neighbours, hackathon_neighbours)`` for each of ``query_rows``."""
+    groups = None
+    if per_hackathon:
+        titles = {}
+        groups = np.array([titles.setdefault(doc.get("hackathon_title"), len(titles)) for doc in docs])
+    query_rows = np.asarray(query_rows, dtype=np.int64)
+    for start in range(0, len(query_rows), block_rows):
+        rows = query_rows[start:start + block_rows]
+        queries = np.asarray(matrix[rows], dtype=np.float32)
+        found, scores = top_k_blocked(queries, matrix, k, exclude=rows)
+        if groups is not None:
+            found_local, scores_local = top_k_blocked(queries, matrix, k, exclude=rows, groups=groups,
+                                                      query_groups=groups[rows])
+        for position, row in enumerate(rows.tolist()):
+            hackathon = _entries(docs, found_local[position], scores_local[position]) if groups is not None else None
+            yield row, _entries(docs, found[position], scores[position]), hackathon
+
+
+def _pairs(entries):
+    return [(entry["_id"], entry["score"]) for entry in entries]
+
+
+def _merge(stored, candidates, k):
+    return sorted(stored + candidates, key=lambda pair: -pair[1])[:k]
+
+
+def merge_changed(matrix, docs, changed_rows, stored, k=DEFAULT_K, per_hackathon=False, block_rows=1024):
+    """Fold the changed projects into the stored lists of every other project.
+
+    ``stored`` maps a row to its table document; none of them may list a changed
+    project (refresh ranks those rows again). The merged list is then exact: it can
+    only gain changed projects. Yields ``(row, neighbours, hackathon_neighbours)``
+    for the lists that change.
+    """
+    changed_rows = np.asarray(changed_rows, dtype=np.int64)
+    changed_ids = [docs[row]["_id"] for row in changed_rows.tolist()]
+    by_id = {doc["_id"]: doc for doc in docs}
+    groups = None
+    if per_hackathon:
+        titles = {}
+        groups = np.array([titles.setdefault(doc.get("hackathon_title"), len(titles)) for doc in docs])
+    columns = np.asarray(matrix[changed_rows], dtype=np.float32)
+    rows = np.array(sorted(stored), dtype=np.int64)
+
+    def candidates(found, scores):
+        return [(changed_ids[column], float(score)) for column, score in zip(found.tolist(), scores.tolist())
+                if column >= 0]
+
+    for start in range(0, len(rows), block_rows):
+        block = rows[start:start + block_rows]
+        queries = np.asarray(matrix[block], dtype=np.float32)
+        found, scores = top_k_blocked(queries, columns, k)
+        if groups is not None:
+            found_local, scores_local = top_k_blocked(
+                queries, columns, k, groups=groups[changed_rows], query_groups=groups[block]
+            )
+        for position, row in enumerate(block.tolist()):
+            entry = stored[row]
+            before = _pairs(entry.get("neighbours", []))
+            neighbours = _merge(before, candidates(found[position], scores[position]), k)
+            changed = neighbours != before
+            hackathon = None
+            if groups is not None:
+                before = _pairs(entry.get("hackathon_neighbours", []))
+                hackathon = _merge(before, candidates(found_local[position], scores_local[position]), k)
+                changed = changed or hackathon != before
+            if changed:
+                yield row, [_result(by_id[i], score) for i, score in neighbours], \
+                    None if hackathon is None else [_result(by_id[i], score) for i, score in hackathon]
+
+
+def load_projects(collection, field="embedding", fields=None):
+    """Projected result docs, table keys, embedding hashes and the unit-vector matrix of embedded projects."""
+    fields = fields or result_fields_from_env()
+    projection = {name: 1 for name in fields + [DUPLICATE_FIELD, "devpost_url", "embedding_text_hash", field]}
+    docs = []
+    keys = []
+    hashes = []
+    vectors = []
+    for doc in collection.find({field: {"$exists": True}, "devpost_url": {"$gt": ""}}, projection):
+        result = {name: doc.get(name) for name in fields}
+        result["_id"] = str(doc["_id"])
+        if doc.get(DUPLICATE_FIELD) is not None:
+            result[DUPLICATE_FIELD] = doc[DUPLICATE_FIELD]
+        docs.append(result)
+        keys.append(normalize_url(doc["devpost_url"]))
+        hashes.append(doc.get("embedding_text_hash"))
+        vectors.append(doc[field])
+    matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return docs, keys, hashes, matrix / norms
+
+
+def _write(table, updates, batch_size=500):
+    from pymongo import ReplaceOne
+
+    operations = []
+    written = 0
+    for document in updates:
+        operations.append(ReplaceOne({"_id": document["_id"]}, document, upsert=True))
+        if len(operations) >= batch_size:
+            table.bulk_write(operations, ordered=False)
+            written += len(operations)
+            operations = []
+    if operations:
+        table.bulk_write(operations, ordered=False)
+        written += len(operations)
+    return written
+
+
+def refresh(collection, table, k=DEFAULT_K, per_hackathon=False, full=False, block_rows=1024):
+    """Bring ``table`` up to date with the embedded projects in ``collection``; returns counts."""
+    docs, keys, hashes, matrix = load_projects(collection)
+    # Only ids and scores of the stored lists; merged lists are rebuilt from the current documents
+    projection = {"embedding_text_hash": 1, "neighbours._id": 1, "neighbours.score": 1}
+    if per_hackathon:
+        projection.update({"hackathon_neighbours._id": 1, "hackathon_neighbours.score": 1})
+    stored = {doc["_id"]: doc for doc in table.find({}, projection)}
+    current_ids = {doc["_id"] for doc in docs}
+    # New projects and projects whose embedding changed
+    changed = [row for row, key in enumerate(keys) if full or key not in stored
+               or stored[key].get("embedding_text_hash") != hashes[row]]
+    stale_keys = set(stored) - set(keys)
+    # A list that held a changed or deleted project may now need one it never stored; rank it again
+    moved = {docs[row]["_id"] for row in changed}
+    ranked = set(changed)
+    for row, key in enumerate(keys):
+        entry = stored.get(key, {})
+        if per_hackathon and "hackathon_neighbours" not in entry:
+            ranked.add(row)
+        elif any(item["_id"] in moved or item["_id"] not in current_ids
+                 for item in entry.get("neighbours", []) + entry.get("hackathon_neighbours", [])):
+            ranked.add(row)
+    ranked = sorted(ranked)
+    if len(ranked) > FULL_REBUILD_RATIO * len(keys):
+        ranked = list(range(len(keys)))
+
+    def document(row, neighbours, hackathon):
+        body = {"_id": keys[row], "project_id": docs[row]["_id"], "embedding_text_hash": hashes[row],
+                "neighbours": neighbours, "updated_at": time.time()}
+        if hackathon is not None:
+            body["hackathon_neighbours"] = hackathon
+        return body
+
+    updates = (document(row, neighbours, hackathon)
+               for row, neighbours, hackathon in compute(matrix, docs, ranked, k, per_hackathon, block_rows))
+    written = _write(table, updates)
+    ranked_set = set(ranked)
+    # Every other list can only gain changed projects: merge their scores in
+    others = {row: stored[key] for row, key in enumerate(keys) if key in stored and row not in ranked_set}
+    if changed and others:
+        merged = (document(row, neighbours, hackathon) for row, neighbours, hackathon
+                  in merge_changed(matrix, docs, changed, others, k, per_hackathon, block_rows))
+        written += _write(table, merged)
+    if stale_keys:
+        table.delete_many({"_id": {"$in": sorted(stale_keys)}})
+    return {"projects": len(keys), "ranked": len(ranked), "written": written, "removed": len(stale_keys)}
+
+
+class NeighbourTable:
+    """Read side of the table: one ``_id`` lookup per known URL."""
+
+    def __init__(self, table, timeout=DEFAULT_LOOKUP_TIMEOUT_MS / 1000):
+        self.table = table
+        self.timeout = timeout
+
+    def lookup(self, url, per_hackathon=False):
+        """Stored neighbours of ``url`` as JSON-ready results, or None when the project is not in the table.
+
+        Database errors, including not reaching a server within ``timeout``
+        seconds, are reported and treated as a miss.
+        """
+        field = "hackathon_neighbours" if per_hackathon else "neighbours"
+        try:
+            # The timeout also bounds server selection, which defaults to 30s
+            with pymongo.timeout(self.timeout):
+                doc = self.table.find_one({"_id": normalize_url(url)}, {field: 1})
+        except PyMongoError as e:
+            print(f"Error reading neighbour table: {e}")
+            return None
+        if doc is None or field not in doc:
+            return None
+        return doc[field]
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Precompute the nearest neighbours of every stored project")
+    parser.add_argument("--k", type=int, default=int(os.getenv("ANALYZE_RESULT_LIMIT", DEFAULT_K)))
+    parser.add_argument("--per-hackathon", action="store_true", help="also store neighbours within each hackathon")
+    parser.add_argument("--full", action="store_true", help="rank every project again instead of only changed ones")
+    parser.add_argument("--block-rows", type=int, default=1024)
+    args = parser.parse_args()
+
+    db = pymongo.MongoClient(os.getenv("MONGODB_URI"))["hackdavis"]
+    table = collection_from_env(db)
+    if table is None:
+        parser.error("NEIGHBOUR_COLLECTION is empty")
+    started = time.perf_counter()
+    stats = refresh(db["projects"], table, args.k, args.per_hackathon, args.full, args.block_rows)
+    print(f"Neighbour table {table.name}: {stats} in {time.perf_counter() - started:.1f}s")
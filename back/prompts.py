@@ -0,0 +1,65 @@
+"""Gemini prompt pieces shared by the batch summarizer and the /analyze endpoints."""
+import json
+from functools import lru_cache
+from typing import List
+
+GEMINI_MODEL = "gemini-2.0-flash"
+
+INSTRUCTIONS = """
+Extract the main points in simple words (basically what the project does) and return the data in the following format:
+{
+    "title": str,
+    "summary": str,
+    "features": List[str]
+}
+"""
+
+@lru_cache(maxsize=None)
+def project_model():
+    """The response schema; pydantic is imported on first use to keep startup fast."""
+    from pydantic import BaseModel
+
+    class Project(BaseModel):
+        title: str
+        summary: str
+        features: List[str]
+
+    return Project
+
+def __getattr__(name):
+    # prompts.Project still works for callers that import the model directly
+    if name == "Project":
+        return project_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def project_prompt(project):
+    return f"""
+Project Title: {project["title"]}
+Project Description: {project["description"]}
+Project Story: {project["story"]}
+"""
+
+def summary_prompt(projects):
+    """Prompt asking for one summary per project, in order."""
+    return "".join(project_prompt(project) for project in projects) + INSTRUCTIONS
+
+def summary_config(many=False):
+    return {
+        "response_mime_type": "application/json",
+        "response_schema": list[project_model()] if many else project_model(),
+    }
+
+def parse_summary(text):
+    """Parse a single-project response into a summary dict, or None."""
+    if not text:
+        return None
+    try:
+        return project_model()(**json.loads(text)).model_dump()
+    except Exception as e:
+        print(f"Error parsing JSON response: {e}")
+        return None
+
+def parse_summaries(text):
+    """Parse a multi-project response into a list of summary dicts (raises on bad JSON)."""
+    Project = project_model()
+    return [Project(**item).model_dump() for item in json.loads(text)]
@@ -0,0 +1,36 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """Thread-safe token bucket: at most ``rate`` acquisitions per ``per`` seconds, with bursts up to ``burst``."""
+
+    def __init__(self, rate, per=60.0, burst=None):
+        self.rate = float(rate)
+        self.per = float(per)
+        self.capacity = float(burst if burst is not None else max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / self.per)
+        self._updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self.per / self.rate
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        pass
@@ -0,0 +1,211 @@
+"""Streaming record files for the scrape -> summarize -> embed pipeline.
+
+Scraped corpora are stored as JSONL: a ``{"type": "hackathon", ...}`` header line
+followed by one ``{"type": "project", ...}`` line per project of that hackathon.
+Summaries are stored one project per line. Readers are generators so callers
+only ever hold one record (or one hackathon) in memory.
+"""
+import json
+import os
+
+HACKATHON_FIELDS = ["title", "location", "url", "submission_dates", "themes", "organization", "winners"]
+
+
+def is_jsonl(path):
+    return path.endswith(".jsonl")
+
+
+def read_records(path):
+    """Yield one dict per non-empty line of a JSONL file."""
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_json_array(path, chunk_size=1 << 16):
+    """Yield the items of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    with open(path, "r") as f:
+        buffer = ""
+        started = False
+        eof = False
+        while True:
+            if not eof and len(buffer) < chunk_size:
+                chunk = f.read(chunk_size)
+                eof = chunk == ""
+                buffer += chunk
+            buffer = buffer.lstrip()
+            if not started:
+                if not buffer:
+                    return
+                if buffer[0] != "[":
+                    raise ValueError(f"{path} is not a JSON array")
+                buffer = buffer[1:]
+                started = True
+                continue
+            if buffer.startswith(","):
+                buffer = buffer[1:]
+                continue
+            if buffer.startswith("]"):
+                return
+            if not buffer:
+                if eof:
+                    raise ValueError(f"{path} ended before the JSON array was closed")
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Item spans the chunk boundary: read more and retry
+                chunk = f.read(chunk_size)
+                eof = chunk == ""
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+
+
+def iter_items(path):
+    """Yield flat records from either a JSONL file or a JSON array file."""
+    if is_jsonl(path):
+        yield from read_records(path)
+    else:
+        yield from iter_json_array(path)
+
+
+class RecordWriter:
+    """Appends one JSON document per line, flushing as it goes so partial output survives a crash."""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "a" if append else "w")
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonArrayWriter:
+    """Streams items into a JSON array file formatted like ``json.dump(items, f, indent=2)``."""
+
+    def __init__(self, path, indent=2):
+        self.path = path
+        self.indent = indent
+        self.count = 0
+        self._file = open(path, "w")
+        self._file.write("[")
+
+    def write(self, record):
+        body = json.dumps(record, indent=self.indent)
+        pad = " " * self.indent
+        body = "\n".join(pad + line for line in body.split("\n"))
+        self._file.write(("," if self.count else "") + "\n" + body)
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def close(self):
+        self._file.write("\n]" if self.count else "]")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(path):
+    """JSONL writer for ``.jsonl`` paths, streamed JSON array writer otherwise."""
+    return RecordWriter(path) if is_jsonl(path) else JsonArrayWriter(path)
+
+
+def hackathon_header(hackathon):
+    header = {"type": "hackathon"}
+    for field in HACKATHON_FIELDS:
+        header[field] = hackathon.get(field)
+    return header
+
+
+def project_record(project, hackathon_url, page):
+    record = {"type": "project", "hackathon_url": hackathon_url, "page": page}
+    record.update(project)
+    return record
+
+
+def hackathon_records(hackathon, pages):
+    """Yield the header and project records for one hackathon given its gallery pages."""
+    yield hackathon_header(hackathon)
+    for page_number, page in enumerate(pages, start=1):
+        for project in page:
+            yield project_record(project, hackathon["url"], page_number)
+
+
+def legacy_records(path):
+    """Yield records from the nested hackathon_data.json layout."""
+    with open(path, "r") as f:
+        data = json.load(f)
+    for hackathon in data["hackathons"]:
+        yield from hackathon_records(hackathon, hackathon["projects"])
+
+
+def iter_hackathons(path):
+    """Yield ``(header, projects)`` one hackathon at a time.
+
+    Works for JSONL corpora and for the legacy nested JSON file. Project records
+    keep their ``page`` field so callers can rebuild gallery pages if needed.
+    """
+    records = read_records(path) if is_jsonl(path) else legacy_records(path)
+    header = None
+    projects = []
+    for record in records:
+        if record.get("type") == "hackathon":
+            if header is not None:
+                yield header, projects
+            header = record
+            projects = []
+        elif record.get("type") == "project":
+            projects.append(record)
+    if header is not None:
+        yield header, projects
+
+
+def convert_legacy(src, dst):
+    """Convert a nested hackathon_data.json into the streaming JSONL layout."""
+    with RecordWriter(dst) as writer:
+        writer.write_all(legacy_records(src))
+    return writer.count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert hackathon_data.json into JSONL records")
+    parser.add_argument("src", nargs="?", default="hackathon_data.json")
+    parser.add_argument("dst", nargs="?", default=None)
+    args = parser.parse_args()
+    dst = args.dst or os.path.splitext(args.src)[0] + ".jsonl"
+    count = convert_legacy(args.src, dst)
+    print(f"Wrote {count} records to {dst}")
@@ -0,0 +1,190 @@
+"""Multi-tier cache for /analyze responses keyed by normalized Devpost URL.
+
+Tier one is an in-process LRU. Tier two is optional and shared between workers:
+a SQLite file (``RESULT_CACHE_PATH``) or a Redis-compatible server
+(``RESULT_CACHE_REDIS_URL``). In front of a shared tier, LRU entries are trusted
+for ``memory_ttl`` seconds before the shared tier is read again, so an
+invalidation by another worker takes effect within that window. Entries are
+fresh for ``ttl`` seconds. For a further ``stale_ttl`` seconds they are still
+served while one background refresh recomputes them.
+"""
+import json
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import metrics
+from kv_cache import SQLiteCache
+from lru import LRUCache
+
+
+def normalize_url(url):
+    """Canonical form of a project URL: https, lowercase host without www, no query, fragment or trailing slash."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https", host, path, "", ""))
+
+
+class SQLiteTier:
+    def __init__(self, path, max_age, max_entries=50000):
+        self.cache = SQLiteCache(path, table="analyze_results", ttl=max_age, max_entries=max_entries)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def put(self, key, value):
+        self.cache.put(key, value)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+
+class RedisTier:
+    def __init__(self, url, max_age, prefix="analyze:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.max_age = max_age
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        return entry["value"], time.time() - entry["created_at"]
+
+    def put(self, key, value):
+        entry = json.dumps({"value": value, "created_at": time.time()})
+        self.client.set(self.prefix + key, entry, ex=max(1, int(self.max_age)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class ResultCache:
+    def __init__(self, ttl=3600, stale_ttl=86400, memory_entries=1024, shared=None, memory_ttl=5):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.memory = LRUCache(memory_entries)
+        self.memory_ttl = memory_ttl
+        self.shared = shared
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        now = time.time()
+        entry = self.memory.get(key)
+        # With a shared tier, a local copy is re-checked after memory_ttl in case another worker invalidated it
+        if entry is not None and (self.shared is None or now - entry[2] <= self.memory_ttl):
+            value, created_at, _ = entry
+            return value, now - created_at
+        if self.shared is None:
+            return None
+        try:
+            found = self.shared.get(key)
+        except Exception as e:
+            print(f"Error reading shared result cache: {e}")
+            return None
+        if found is None:
+            self.memory.pop(key)
+            return None
+        value, age = found
+        self.memory.put(key, (value, now - age, now))
+        return found
+
+    def _store(self, key, value):
+        now = time.time()
+        self.memory.put(key, (value, now, now))
+        if self.shared is not None:
+            try:
+                self.shared.put(key, value)
+            except Exception as e:
+                print(f"Error writing shared result cache: {e}")
+
+    def _refresh(self, key, compute):
+        try:
+            value = compute()
+            if value is not None:
+                self._store(key, value)
+        except Exception as e:
+            print(f"Error refreshing cached result for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def lookup(self, url):
+        """Return ``(value, state)`` where state is "fresh" or "stale", or None on a miss."""
+        found = self._lookup(normalize_url(url))
+        if found is None:
+            self.misses += 1
+            metrics.record_cache("result", misses=1)
+            return None
+        value, age = found
+        if age <= self.ttl:
+            self.hits += 1
+            metrics.record_cache("result", hits=1)
+            return value, "fresh"
+        if age <= self.ttl + self.stale_ttl:
+            self.stale_hits += 1
+            metrics.record_cache("result", stale=1)
+            return value, "stale"
+        self.misses += 1
+        metrics.record_cache("result", misses=1)
+        return None
+
+    def store(self, url, value):
+        self._store(normalize_url(url), value)
+
+    def get_or_compute(self, url, compute):
+        """Return the cached result for ``url`` or compute it. ``None`` results are not cached."""
+        key = normalize_url(url)
+        found = self._lookup(key)
+        if found is not None:
+            value, age = found
+            if age <= self.ttl:
+                self.hits += 1
+                metrics.record_cache("result", hits=1)
+                return value
+            if age <= self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                metrics.record_cache("result", stale=1)
+                with self._lock:
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start:
+                    threading.Thread(target=self._refresh, args=(key, compute), daemon=True).start()
+                return value
+
+        self.misses += 1
+
+        metrics.record_cache("result", misses=1)
+        value = compute()
+        if value is not None:
+            self._store(key, value)
+        return value
+
+    def invalidate(self, url):
+        key = normalize_url(url)
+        self.memory.pop(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def stats(self):
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses}
+
+
+def create_result_cache(ttl=3600, stale_ttl=86400, sqlite_path=None, redis_url=None, memory_ttl=5):
+    """In-process cache plus the shared tier selected by the given path/URL (Redis wins if both are set)."""
+    shared = None
+    if redis_url:
+        shared = RedisTier(redis_url, ttl + stale_ttl)
+    elif sqlite_path:
+        shared = SQLiteTier(sqlite_path, ttl + stale_ttl)
+    return ResultCache(ttl=ttl, stale_ttl=stale_ttl, shared=shared, memory_ttl=memory_ttl)
@@ -0,0 +1,526 @@
+"""Pluggable similarity search over project embeddings.
+
+``SEARCH_BACKEND=atlas`` (default) runs Atlas ``$vectorSearch``. ``SEARCH_BACKEND=local``
+keeps the embeddings in process as one contiguous float32 matrix of unit vectors
+and answers cosine top-k with a single matrix-vector product. ``LOCAL_INDEX=ivf``
+switches the local engine to an inverted-file index (k-means lists probed with
+``IVF_NPROBE``) for corpora where brute force gets too slow. With ``EMBEDDING_STORE``
+set, the local index maps that embedding store instead of reading Mongo.
+``LOCAL_INDEX=int8`` or ``binary`` ranks quantized codes and rescores the best
+``QUANTIZED_RESCORE`` x limit candidates with the full vectors.
+``SEARCH_MODE=hybrid`` adds a BM25 leg over titles, summaries and features and
+fuses both rankings with reciprocal rank fusion.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from compact_embeddings import hamming_scores, quantize_binary, quantize_int8
+
+VECTOR_INDEX_NAME = "vector_index_projects"
+RESULT_FIELDS = ["title", "summary", "features", "hackathon_title"]
+# Set by dedupe.py on projects that have near-duplicates; always returned so results can be collapsed
+DUPLICATE_FIELD = "duplicate_cluster"
+DUPLICATE_OVERFETCH = 3
+
+
+def result_fields_from_env():
+    """SEARCH_RESULT_FIELDS (comma separated) trims what searches return; defaults to RESULT_FIELDS."""
+    fields = os.getenv("SEARCH_RESULT_FIELDS")
+    return [field for field in fields.split(",") if field] if fields else list(RESULT_FIELDS)
+
+
+class AtlasSearchBackend:
+    """$vectorSearch against the Atlas search index.
+
+    With an ``index_manager`` the index name is read from its active-index
+    pointer, so a rebuilt index takes over without restarting the process.
+    """
+
+    def __init__(self, collection, index_name=VECTOR_INDEX_NAME, num_candidates=100, index_manager=None, fields=None):
+        self.collection = collection
+        self._index_name = index_name
+        self.num_candidates = num_candidates
+        self.index_manager = index_manager
+        self.fields = fields or RESULT_FIELDS
+
+    @property
+    def index_name(self):
+        if self.index_manager is not None:
+            return self.index_manager.active_index_name()
+        return self._index_name
+
+    def search(self, query_vector, limit=5, hackathon_filter=None):
+        vector_search_stage = {
+            "$vectorSearch": {
+                "index": self.index_name,
+                "path": "embedding",
+                "queryVector": list(query_vector),
+                "numCandidates": max(self.num_candidates, limit),
+                "limit": limit
+            }
+        }
+
+        # Add filter for hackathon_title if provided
+        if hackathon_filter:
+            vector_search_stage["$vectorSearch"]["filter"] = {
+                "hackathon_title": hackathon_filter
+            }
+
+        projection = {field: 1 for field in self.fields}
+        projection["_id"] = 1
+        projection[DUPLICATE_FIELD] = 1
+        projection["score"] = {"$meta": "vectorSearchScore"}
+        pipeline = [vector_search_stage, {"$project": projection}]
+        return list(self.collection.aggregate(pipeline))
+
+    def search_many(self, query_vectors, limit=5, hackathon_filter=None, workers=8):
+        """Run one $vectorSearch per query, concurrently."""
+        if not len(query_vectors):
+            return []
+        with ThreadPoolExecutor(max_workers=min(workers, len(query_vectors))) as pool:
+            return list(pool.map(lambda vector: self.search(vector, limit, hackathon_filter), query_vectors))
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores, k):
+    if k >= len(scores):
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+class LocalVectorIndex:
+    """Exact cosine search over an in-memory float32 matrix."""
+
+    def __init__(self, vectors, docs, normalized=False):
+        if normalized and getattr(vectors, "dtype", None) in (np.float32, np.float16):
+            # Already unit vectors (e.g. a memory-mapped store): use them without copying
+            matrix = vectors
+        else:
+            matrix = np.ascontiguousarray(_normalize_rows(np.asarray(vectors, dtype=np.float32)))
+        if matrix.ndim != 2 or len(matrix) != len(docs):
+            raise ValueError("vectors must be a 2-D matrix with one row per document")
+        self.matrix = matrix
+        self.docs = docs
+        self.dimensions = self.matrix.shape[1]
+        self._filter_rows = self._build_filter_index(docs)
+
+    @staticmethod
+    def _build_filter_index(docs):
+        rows = {}
+        for row, doc in enumerate(docs):
+            rows.setdefault(doc.get("hackathon_title"), []).append(row)
+        return {title: np.asarray(ids, dtype=np.int64) for title, ids in rows.items()}
+
+    @classmethod
+    def from_documents(cls, documents, field="embedding"):
+        vectors = []
+        docs = []
+        for doc in documents:
+            embedding = doc.get(field)
+            if not embedding:
+                continue
+            vectors.append(embedding)
+            docs.append({key: doc.get(key) for key in ["_id"] + RESULT_FIELDS + [DUPLICATE_FIELD]})
+        if not vectors:
+            return cls(np.zeros((0, 1), dtype=np.float32), [])
+        return cls(vectors, docs)
+
+    @classmethod
+    def from_collection(cls, collection, field="embedding"):
+        projection = {key: 1 for key in RESULT_FIELDS + [DUPLICATE_FIELD]}
+        projection[field] = 1
+        return cls.from_documents(collection.find({field: {"$exists": True}}, projection), field)
+
+    @classmethod
+    def from_store(cls, store):
+        """Index a memory-mapped EmbeddingStore in place."""
+        docs = [
+            {"_id": row["id"], **{key: row.get(key) for key in RESULT_FIELDS + [DUPLICATE_FIELD]}} for row in store.rows
+        ]
+        return cls(store.matrix, docs, normalized=True)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _query(self, query_vector):
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        return query / norm if norm else query
+
+    def candidate_rows(self, hackathon_filter=None):
+        if hackathon_filter:
+            return self._filter_rows.get(hackathon_filter, np.zeros(0, dtype=np.int64))
+        return None
+
+    def search_many(self, query_vectors, limit=5, hackathon_filter=None):
+        """Top-k for several queries with one matrix-matrix product."""
+        if not len(query_vectors):
+            return []
+        if not len(self.docs):
+            return [[] for _ in query_vectors]
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries = queries / norms
+        rows = self.candidate_rows(hackathon_filter)
+        if rows is not None and not len(rows):
+            return [[] for _ in query_vectors]
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        scores = queries @ matrix.T
+        return [self._results(rows, row_scores, limit) for row_scores in scores]
+
+    def _results(self, rows, scores, limit):
+        order = _top_k(scores, limit)
+        results = []
+        for position in order:
+            row = rows[position] if rows is not None else position
+            result = dict(self.docs[row])
+            result["score"] = float(scores[position])
+            results.append(result)
+        return results
+
+    def search(self, query_vector, limit=5, hackathon_filter=None):
+        if not len(self.docs):
+            return []
+        query = self._query(query_vector)
+        rows = self.candidate_rows(hackathon_filter)
+        if rows is None:
+            scores = self.matrix @ query
+        elif not len(rows):
+            return []
+        else:
+            scores = self.matrix[rows] @ query
+        return self._results(rows, scores, limit)
+
+
+class IVFVectorIndex(LocalVectorIndex):
+    """Approximate search: vectors are bucketed by k-means and only ``nprobe`` buckets are scanned."""
+
+    def __init__(self, vectors, docs, nlist=None, nprobe=8, iterations=10, seed=0, normalized=False):
+        super().__init__(vectors, docs, normalized=normalized)
+        count = len(self.docs)
+        self.nlist = max(1, min(nlist or int(np.sqrt(count)) or 1, count or 1))
+        self.nprobe = max(1, min(nprobe, self.nlist))
+        self._train(iterations, seed)
+
+    def _train(self, iterations, seed):
+        if not len(self.docs):
+            self.centroids = np.zeros((0, self.dimensions), dtype=np.float32)
+            self.lists = []
+            self._list_of_row = np.zeros(0, dtype=np.int64)
+            return
+        rng = np.random.default_rng(seed)
+        centroids = np.asarray(self.matrix[rng.choice(len(self.matrix), self.nlist, replace=False)], dtype=np.float32)
+        for _ in range(iterations):
+            assignment = np.argmax(self.matrix @ centroids.T, axis=1)
+            for cluster in range(self.nlist):
+                members = self.matrix[assignment == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+            centroids = _normalize_rows(centroids)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        assignment = np.argmax(self.matrix @ self.centroids.T, axis=1)
+        self._list_of_row = assignment
+        self.lists = [np.flatnonzero(assignment == cluster) for cluster in range(self.nlist)]
+
+    def search(self, query_vector, limit=5, hackathon_filter=None):
+        if not len(self.docs):
+            return []
+        query = self._query(query_vector)
+        probes = _top_k(self.centroids @ query, self.nprobe)
+        rows = np.concatenate([self.lists[probe] for probe in probes])
+        allowed = self.candidate_rows(hackathon_filter)
+        if allowed is not None:
+            rows = rows[np.isin(rows, allowed, assume_unique=True)]
+        if not len(rows):
+            return []
+        return self._results(rows, self.matrix[rows] @ query, limit)
+
+    def search_many(self, query_vectors, limit=5, hackathon_filter=None):
+        # Each query probes its own lists, so there is no shared product to batch
+        return [self.search(query, limit, hackathon_filter) for query in query_vectors]
+
+
+class QuantizedVectorIndex(LocalVectorIndex):
+    """Candidates are ranked on int8 or 1-bit codes, then the best ``rescore`` x ``limit`` are rescored exactly.
+
+    The full-precision matrix is only read for the rescored rows, so with a
+    memory-mapped store most of it never leaves the disk.
+    """
+
+    def __init__(self, vectors, docs, mode="int8", rescore=4, block_rows=4096, normalized=False):
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Unknown quantization {mode!r}, expected 'int8' or 'binary'")
+        super().__init__(vectors, docs, normalized=normalized)
+        self.mode = mode
+        self.rescore = max(1, rescore)
+        self.block_rows = block_rows
+        starts = range(0, len(self.matrix), block_rows)
+        if mode == "int8":
+            self.codes = np.zeros((len(self.matrix), self.dimensions), dtype=np.int8)
+            self.scales = np.zeros(len(self.matrix), dtype=np.float32)
+            for start in starts:
+                codes, scales = quantize_int8(self.matrix[start:start + block_rows])
+                self.codes[start:start + len(codes)] = codes
+                self.scales[start:start + len(codes)] = scales
+        else:
+            self.codes = np.zeros((len(self.matrix), (self.dimensions + 7) // 8), dtype=np.uint8)
+            for start in starts:
+                block = self.matrix[start:start + block_rows]
+                self.codes[start:start + len(block)] = quantize_binary(block)
+
+    @property
+    def code_bytes(self):
+        return self.codes.nbytes + (self.scales.nbytes if self.mode == "int8" else 0)
+
+    def _approximate_scores(self, rows, query):
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.mode == "binary":
+            return hamming_scores(codes, quantize_binary(query[None, :])[0]).astype(np.float32)
+        scales = self.scales if rows is None else self.scales[rows]
+        # Blockwise so the float copy of the int8 codes stays small
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), self.block_rows):
+            block = codes[start:start + self.block_rows].astype(np.float32)
+            scores[start:start + self.block_rows] = (block @ query) * scales[start:start + self.block_rows]
+        return scores
+
+    def search(self, query_vector, limit=5, hackathon_filter=None):
+        if not len(self.docs):
+            return []
+        query = self._query(query_vector)
+        rows = self.candidate_rows(hackathon_filter)
+        if rows is not None and not len(rows):
+            return []
+        approximate = self._approximate_scores(rows, query)
+        candidates = _top_k(approximate, limit * self.rescore)
+        if rows is not None:
+            candidates = rows[candidates]
+        candidates = np.sort(candidates)
+        return self._results(candidates, np.asarray(self.matrix[candidates] @ query, dtype=np.float32), limit)
+
+    def search_many(self, query_vectors, limit=5, hackathon_filter=None):
+        return [self.search(query, limit, hackathon_filter) for query in query_vectors]
+
+
+class LocalSearchBackend:
+    """Serves searches from a LocalVectorIndex built lazily from a loader."""
+
+    def __init__(self, loader, index_type="exact", nprobe=8, rescore=4):
+        self.loader = loader
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.rescore = rescore
+        self._index = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        index = self.loader()
+        if self.index_type == "ivf" and not isinstance(index, IVFVectorIndex):
+            index = IVFVectorIndex(index.matrix, index.docs, nprobe=self.nprobe, normalized=True)
+        elif self.index_type in ("int8", "binary") and not isinstance(index, QuantizedVectorIndex):
+            index = QuantizedVectorIndex(index.matrix, index.docs, self.index_type, self.rescore, normalized=True)
+        return index
+
+    @property
+    def index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._build()
+                    print(f"Loaded local vector index with {len(self._index)} projects")
+        return self._index
+
+    def refresh(self):
+        index = self._build()
+        with self._lock:
+            self._index = index
+
+    def search(self, query_vector, limit=5, hackathon_filter=None):
+        return self.index.search(query_vector, limit=limit, hackathon_filter=hackathon_filter)
+
+    def search_many(self, query_vectors, limit=5, hackathon_filter=None):
+        return self.index.search_many(query_vectors, limit=limit, hackathon_filter=hackathon_filter)
+
+
+def collapse_duplicates(results, limit=None):
+    """Keep the best-ranked result of each duplicate cluster; results without a cluster are kept as is."""
+    seen = set()
+    collapsed = []
+    for result in results:
+        cluster = result.get(DUPLICATE_FIELD)
+        if cluster:
+            if cluster in seen:
+                continue
+            seen.add(cluster)
+        collapsed.append(result)
+        if limit is not None and len(collapsed) >= limit:
+            break
+    return collapsed
+
+
+def _fusion_key(result):
+    # Both legs return the project's _id (the lexical index stores it as a string); titles are not unique
+    if result.get("_id") is not None:
+        return str(result["_id"])
+    return result.get("hackathon_title"), result.get("title")
+
+
+def reciprocal_rank_fusion(result_lists, limit=5, k=60):
+    """Merge ranked lists by summing 1 / (k + rank); each result keeps its per-leg scores."""
+    fused = {}
+    for leg, results in result_lists.items():
+        for rank, result in enumerate(results, start=1):
+            key = _fusion_key(result)
+            entry = fused.setdefault(key, {"doc": dict(result), "score": 0.0})
+            entry["doc"][f"{leg}_score"] = result.get("score")
+            entry["score"] += 1.0 / (k + rank)
+    ranked = sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)[:limit]
+    results = []
+    for entry in ranked:
+        entry["doc"]["score"] = entry["score"]
+        results.append(entry["doc"])
+    return results
+
+
+class HybridSearchBackend:
+    """BM25 and vector retrieval run side by side and are fused with reciprocal rank fusion.
+
+    Without query text (``search`` called with a vector only) this is plain vector search.
+    With ``lexical_path``, the lexical index is loaded again whenever that file
+    changes, e.g. after ``python ingest.py`` saved new documents into it.
+    """
+
+    def __init__(self, vector_backend, lexical_loader, candidates=50, rrf_k=60, workers=4, lexical_path=None):
+        self.vector_backend = vector_backend
+        self.lexical_loader = lexical_loader
+        self.lexical_path = lexical_path
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self._lexical = None
+        self._lexical_mtime = None
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def _mtime(self):
+        try:
+            return os.path.getmtime(self.lexical_path) if self.lexical_path else None
+        except OSError:
+            return None
+
+    @property
+    def lexical(self):
+        if self._lexical is None or self._mtime() != self._lexical_mtime:
+            with self._lock:
+                mtime = self._mtime()
+                if self._lexical is None or mtime != self._lexical_mtime:
+                    self._lexical = self.lexical_loader()
+                    # The loader may have just written the file
+                    self._lexical_mtime = self._mtime() if mtime is None else mtime
+                    print(f"Loaded lexical index with {len(self._lexical)} projects")
+        return self._lexical
+
+    def _fuse(self, vector_results, lexical_results, limit):
+        return reciprocal_rank_fusion({"vector": vector_results, "lexical": lexical_results}, limit, self.rrf_k)
+
+    def search(self, query_vector, limit=5, hackathon_filter=None, query_text=None):
+        if not query_text:
+            return self.vector_backend.search(query_vector, limit=limit, hackathon_filter=hackathon_filter)
+        lexical = self._pool.submit(self.lexical.search, query_text, self.candidates, hackathon_filter)
+        vector_results = self.vector_backend.search(
+            query_vector, limit=self.candidates, hackathon_filter=hackathon_filter
+        )
+        return self._fuse(vector_results, lexical.result(), limit)
+
+    def search_text(self, query_text, embed, limit=5, hackathon_filter=None):
+        """Embed ``query_text`` with ``embed`` while the lexical leg runs; an embedding failure leaves lexical only."""
+        lexical = self._pool.submit(self.lexical.search, query_text, self.candidates, hackathon_filter)
+        query_vector = embed(query_text)
+        vector_results = []
+        if query_vector:
+            vector_results = self.vector_backend.search(
+                query_vector, limit=self.candidates, hackathon_filter=hackathon_filter
+            )
+        return self._fuse(vector_results, lexical.result(), limit)
+
+    def search_many(self, query_vectors, limit=5, hackathon_filter=None, query_texts=None):
+        if not query_texts:
+            return self.vector_backend.search_many(query_vectors, limit=limit, hackathon_filter=hackathon_filter)
+        lexical = [
+            self._pool.submit(self.lexical.search, text, self.candidates, hackathon_filter) for text in query_texts
+        ]
+        vector_results = self.vector_backend.search_many(
+            query_vectors, limit=self.candidates, hackathon_filter=hackathon_filter
+        )
+        return [self._fuse(results, future.result(), limit) for results, future in zip(vector_results, lexical)]
+
+    def update(self, docs):
+        """Apply ingested documents to the lexical index (``ingest_summaries(on_change=...)``)."""
+        self.lexical.update_many(docs)
+
+    def refresh(self):
+        """Reload the lexical index, and the vector index when it is held in memory."""
+        lexical = self.lexical_loader()
+        with self._lock:
+            self._lexical = lexical
+            self._lexical_mtime = self._mtime()
+        if hasattr(self.vector_backend, "refresh"):
+            self.vector_backend.refresh()
+
+
+def create_search_backend(collection, backend=None, mode=None):
+    """Build the backend named by ``backend`` or the SEARCH_BACKEND environment variable.
+
+    ``mode`` (or SEARCH_MODE) ``hybrid`` wraps it in a HybridSearchBackend over the
+    lexical index at LEXICAL_INDEX_PATH.
+    """
+    backend = backend or os.getenv("SEARCH_BACKEND", "atlas")
+    mode = mode or os.getenv("SEARCH_MODE", "vector")
+    if backend == "atlas":
+        from vector_index import VectorIndexManager
+
+        search_backend = AtlasSearchBackend(
+            collection,
+            num_candidates=int(os.getenv("VECTOR_NUM_CANDIDATES", "100")),
+            index_manager=VectorIndexManager(collection),
+            fields=result_fields_from_env(),
+        )
+    elif backend == "local":
+        store_path = os.getenv("EMBEDDING_STORE")
+        if store_path:
+            from embedding_store import open_store
+
+            loader = lambda: LocalVectorIndex.from_store(open_store(store_path))
+        else:
+            loader = lambda: LocalVectorIndex.from_collection(collection)
+        search_backend = LocalSearchBackend(
+            loader,
+            index_type=os.getenv("LOCAL_INDEX", "exact"),
+            nprobe=int(os.getenv("IVF_NPROBE", "8")),
+            rescore=int(os.getenv("QUANTIZED_RESCORE", "4")),
+        )
+    else:
+        raise ValueError(f"Unknown SEARCH_BACKEND {backend!r}, expected 'atlas' or 'local'")
+
+    if mode == "hybrid":
+        from lexical_index import DEFAULT_PATH, open_lexical_index
+
+        path = os.getenv("LEXICAL_INDEX_PATH", DEFAULT_PATH)
+        return HybridSearchBackend(
+            search_backend,
+            lambda: open_lexical_index(collection, path),
+            candidates=int(os.getenv("HYBRID_CANDIDATES", "50")),
+            lexical_path=path,
+        )
+    if mode != "vector":
+        raise ValueError(f"Unknown SEARCH_MODE {mode!r}, expected 'vector' or 'hybrid'")
+    return search_backend
@@ -0,0 +1,96 @@
+"""Search results materialized once, trimmed to a projection, and paged with tokens.
+
+Backends return plain lists of result dicts. ``SearchResults`` builds one
+JSON-ready dict per result, keeping only the projected fields plus ``_id`` (as a
+string), the scores and the duplicate cluster. After that the same list is
+cached, sliced into pages and serialized without another copy. A page token is an opaque base64 string
+holding the offset of the next page and a fingerprint of the query, so a token
+cannot be replayed against another query.
+
+SEARCH_RESULT_FIELDS (comma separated) sets the default projection.
+"""
+import base64
+import hashlib
+import json
+from collections.abc import Sequence
+
+from search_backends import DUPLICATE_FIELD, collapse_duplicates, result_fields_from_env
+
+DEFAULT_PAGE_SIZE = 5
+MAX_PAGE_SIZE = 100
+EXTRA_FIELDS = ("score", "vector_score", "lexical_score", DUPLICATE_FIELD)
+RESULT_PROJECTION = result_fields_from_env()
+
+
+class InvalidPageToken(ValueError):
+    pass
+
+
+def _fingerprint(query_key):
+    return hashlib.sha256(str(query_key).encode("utf-8")).hexdigest()[:12]
+
+
+def encode_page_token(offset, query_key):
+    body = json.dumps({"o": offset, "q": _fingerprint(query_key)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(body.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_page_token(token, query_key):
+    try:
+        body = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        offset = int(body["o"])
+    except Exception:
+        raise InvalidPageToken("Malformed page token")
+    if body.get("q") != _fingerprint(query_key) or offset < 0:
+        raise InvalidPageToken("Page token does not belong to this query")
+    return offset
+
+
+def _project(result, fields):
+    row = {field: result.get(field) for field in fields}
+    if "_id" in result:
+        row["_id"] = str(result["_id"])
+    for field in EXTRA_FIELDS:
+        if field in result:
+            row[field] = result[field]
+    return row
+
+
+class SearchResults(Sequence):
+    def __init__(self, results, fields=None, next_page_token=None):
+        fields = RESULT_PROJECTION if fields is None else fields
+        self.items = [_project(result, fields) for result in results]
+        self.next_page_token = next_page_token
+
+    @classmethod
+    def wrap(cls, items, next_page_token=None):
+        """Use an already materialized list (e.g. from the result cache) as is."""
+        results = cls.__new__(cls)
+        results.items = items
+        results.next_page_token = next_page_token
+        return results
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __len__(self):
+        return len(self.items)
+
+    def to_list(self):
+        return self.items
+
+    def collapse_duplicates(self):
+        """One result per duplicate cluster (see dedupe.py), keeping the best-ranked one."""
+        return SearchResults.wrap(collapse_duplicates(self.items), self.next_page_token)
+
+    def page(self, page_size=DEFAULT_PAGE_SIZE, page_token=None, query_key=""):
+        """The page starting at ``page_token`` (or the first page), carrying the token for the next one."""
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        offset = decode_page_token(page_token, query_key) if page_token else 0
+        end = offset + page_size
+        next_token = encode_page_token(end, query_key) if end < len(self.items) else None
+        return SearchResults.wrap(self.items[offset:end], next_token)
+
+    def iter_ndjson(self):
+        for item in self.items:
+            yield json.dumps(item) + "\n"
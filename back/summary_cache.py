@@ -0,0 +1,73 @@
+"""Persistent cache of Gemini project summaries.
+
+Keys hash the model name, a prompt version and the exact title, description
+and story sent to Gemini, so a project is only re-summarized when its inputs
+change. Bump PROMPT_VERSION when the summarization instructions change.
+"""
+import hashlib
+import threading
+import time
+
+import metrics
+from kv_cache import SQLiteCache
+from lru import LRUCache
+
+PROMPT_VERSION = "1"
+DEFAULT_PATH = "summary_cache.db"
+DEFAULT_TTL = 90 * 24 * 3600
+
+
+def summary_key(project, model):
+    parts = [model, PROMPT_VERSION, project.get("title", ""), project.get("description", ""), project.get("story", "")]
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=200000, memory_entries=2048):
+        self.store = SQLiteCache(path, table="summaries", ttl=ttl, max_entries=max_entries)
+        self.ttl = ttl
+        # Entries keep the time they were created, so the memory tier expires with the store
+        self.memory = LRUCache(memory_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.record_cache("summary", hits=int(hit), misses=int(not hit))
+
+    def get(self, project, model):
+        key = summary_key(project, model)
+        now = time.time()
+        summary = None
+        entry = self.memory.get(key)
+        if entry is not None:
+            if self.ttl is None or now - entry[1] <= self.ttl:
+                summary = entry[0]
+            else:
+                self.memory.pop(key)
+        if summary is None:
+            found = self.store.get(key)
+            if found is not None:
+                summary, age = found
+                self.memory.put(key, (summary, now - age))
+        self._count(summary is not None)
+        return dict(summary) if summary is not None else None
+
+    def put(self, project, model, summary):
+        key = summary_key(project, model)
+        value = {"title": summary["title"], "summary": summary["summary"], "features": list(summary["features"])}
+        self.memory.put(key, (value, time.time()))
+        self.store.put(key, value)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.store)}
+
+
+def open_summary_cache(path, ttl=DEFAULT_TTL):
+    """Open the cache at ``path``, or return None when caching is disabled with an empty path."""
+    return SummaryCache(path, ttl=ttl) if path else None
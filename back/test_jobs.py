@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+import jobs
+from jobs import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = JobQueue(str(tmp_path / "jobs.db"), lease=60)
+    yield q
+    q.close()
+
+
+def expire(queue, job_id):
+    queue._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time() - 3600, job_id))
+
+
+def test_expired_lease_requeues_and_counts_attempt(queue):
+    job_id = queue.submit("analyze", {"url": "https://devpost.com/software/x"})
+    assert queue.claim("a")["attempts"] == 1
+    expire(queue, job_id)
+    job = queue.claim("b")
+    assert job["id"] == job_id
+    assert job["attempts"] == 2
+
+
+def test_expired_lease_fails_after_max_attempts(queue):
+    job_id = queue.submit("analyze", {"url": "https://devpost.com/software/x"}, max_attempts=2)
+    for _ in range(2):
+        assert queue.claim("a")["id"] == job_id
+        expire(queue, job_id)
+    assert queue.claim("a") is None
+    status = queue.status(job_id)
+    assert status["status"] == "failed"
+    assert status["error"] == "lease expired"
+
+
+def test_renewed_lease_is_not_requeued(queue):
+    job_id = queue.submit("analyze", {"url": "https://devpost.com/software/x"})
+    queue.claim("a")
+    queue._conn.execute("UPDATE jobs SET started_at = ? WHERE id = ?", (time.time() - 3600, job_id))
+    assert queue.renew(job_id, "a")
+    assert not queue.renew(job_id, "b")
+    assert queue.claim("b") is None
+
+
+def test_payload_paths_must_stay_in_data_dir(queue, tmp_path, monkeypatch):
+    monkeypatch.setenv("JOBS_DATA_DIR", str(tmp_path))
+    queue.submit("summarize", {"output": "out/summaries.json"})
+    for path in ("../escape.json", "/etc/passwd"):
+        with pytest.raises(ValueError):
+            queue.submit("summarize", {"output": path})
+    assert jobs.job_path({}, "output", "a.json") == str(tmp_path / "a.json")
+
+
+def test_loading_the_scraper_leaves_main_importable():
+    scraper = jobs.load_scraper()
+    assert hasattr(scraper, "iter_crawl_concurrent")
+    import main
+
+    assert hasattr(main, "add_embedding_to_document")
+
+
+def test_failed_analysis_fails_the_job(monkeypatch):
+    import app
+
+    monkeypatch.setattr(app, "run_analysis", lambda url: None)
+    with pytest.raises(RuntimeError):
+        jobs.run_analyze({"url": "https://devpost.com/software/x"})
@@ -0,0 +1,39 @@
+import time
+
+import pymongo
+from pymongo.errors import ServerSelectionTimeoutError
+
+from neighbours import NeighbourTable, open_neighbour_table
+
+
+class UnreachableCollection:
+    def find_one(self, *args, **kwargs):
+        raise ServerSelectionTimeoutError("localhost:1: connection refused")
+
+
+class DictCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find_one(self, query, projection=None):
+        return self.docs.get(query["_id"])
+
+
+def test_lookup_is_a_miss_when_mongo_is_down():
+    assert NeighbourTable(UnreachableCollection(), timeout=0.05).lookup("https://devpost.com/software/x") is None
+
+
+def test_lookup_by_normalized_url():
+    table = NeighbourTable(DictCollection({"https://devpost.com/software/x": {"neighbours": [{"title": "y"}]}}))
+    assert table.lookup("https://devpost.com/software/x/") == [{"title": "y"}]
+    assert table.lookup("https://devpost.com/software/z") is None
+
+
+def test_unreachable_server_times_out_quickly(monkeypatch):
+    monkeypatch.setenv("NEIGHBOUR_COLLECTION", "neighbours")
+    monkeypatch.setenv("NEIGHBOUR_LOOKUP_TIMEOUT_MS", "200")
+    client = pymongo.MongoClient("mongodb://localhost:1", connect=False)
+    start = time.perf_counter()
+    assert open_neighbour_table(client["hackdavis"]).lookup("https://devpost.com/software/x") is None
+    assert time.perf_counter() - start < 5
+    client.close()
@@ -0,0 +1,52 @@
+from result_cache import ResultCache, SQLiteTier, create_result_cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def test_fresh_stale_and_expired(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("result_cache.time.time", clock.time)
+    cache = ResultCache(ttl=10, stale_ttl=20)
+    cache.store("https://devpost.com/software/x", ["a"])
+    assert cache.lookup("https://devpost.com/software/x") == (["a"], "fresh")
+    clock.now += 15
+    assert cache.lookup("https://devpost.com/software/x") == (["a"], "stale")
+    clock.now += 20
+    assert cache.lookup("https://devpost.com/software/x") is None
+
+
+def test_none_results_are_not_cached():
+    cache = ResultCache()
+    calls = []
+    compute = lambda: calls.append(1)
+    assert cache.get_or_compute("https://devpost.com/software/x", compute) is None
+    assert cache.get_or_compute("https://devpost.com/software/x", compute) is None
+    assert len(calls) == 2
+
+
+def test_invalidate_in_memory():
+    cache = create_result_cache()
+    assert cache.get_or_compute("https://devpost.com/software/x", lambda: ["a"]) == ["a"]
+    cache.invalidate("https://www.devpost.com/software/x/")
+    assert cache.get_or_compute("https://devpost.com/software/x", lambda: ["b"]) == ["b"]
+
+
+def test_invalidate_is_seen_by_other_workers(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("result_cache.time.time", clock.time)
+    path = str(tmp_path / "results.db")
+    first = ResultCache(shared=SQLiteTier(path, 100), memory_ttl=5)
+    second = ResultCache(shared=SQLiteTier(path, 100), memory_ttl=5)
+    first.store("https://devpost.com/software/x", ["a"])
+    assert second.get_or_compute("https://devpost.com/software/x", lambda: ["b"]) == ["a"]
+    first.invalidate("https://devpost.com/software/x")
+    # The local copy is served until memory_ttl, then the shared tier is checked again
+    assert second.get_or_compute("https://devpost.com/software/x", lambda: ["b"]) == ["a"]
+    clock.now += 6
+    assert second.get_or_compute("https://devpost.com/software/x", lambda: ["b"]) == ["b"]
@@ -0,0 +1,33 @@
+import os
+
+from bson import ObjectId
+
+from search_backends import HybridSearchBackend, reciprocal_rank_fusion
+
+
+def test_fusion_matches_legs_by_id():
+    first, second = ObjectId(), ObjectId()
+    # Same title within one hackathon: two different projects, not one
+    vector = [
+        {"_id": first, "title": "Recycle", "hackathon_title": "HackDavis", "score": 0.9},
+        {"_id": second, "title": "Recycle", "hackathon_title": "HackDavis", "score": 0.8},
+    ]
+    lexical = [{"_id": str(second), "title": "Recycle", "hackathon_title": "HackDavis", "score": 7.0}]
+    fused = reciprocal_rank_fusion({"vector": vector, "lexical": lexical}, limit=5, k=60)
+    assert [str(result["_id"]) for result in fused] == [str(second), str(first)]
+    assert fused[0]["vector_score"] == 0.8 and fused[0]["lexical_score"] == 7.0
+    assert fused[1]["score"] == 1.0 / 61
+    assert "lexical_score" not in fused[1]
+
+
+def test_lexical_index_reloads_when_its_file_changes(tmp_path):
+    path = tmp_path / "lexical_index.json"
+    path.write_text("1")
+    loads = []
+    backend = HybridSearchBackend(None, lambda: loads.append(path.read_text()) or [], lexical_path=str(path))
+    backend.lexical
+    backend.lexical
+    path.write_text("2")
+    os.utime(path, (0, 0))
+    backend.lexical
+    assert loads == ["1", "2"]
@@ -0,0 +1,148 @@
+"""Idempotent lifecycle for the Atlas vector search index.
+
+The wanted definition (dimensions, similarity, filter fields) is compared with
+what Atlas already has. A matching index is reused as is. On a real change a
+new index is built under a versioned name (``vector_index_projects_<hash>``).
+The readiness wait is bounded and backs off. Only once the new index is READY
+is the active-index pointer in the ``settings`` collection switched and the
+old index dropped, so searches keep using the old index during the rebuild.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from compact_embeddings import shape_from_env
+
+BASE_INDEX_NAME = "vector_index_projects"
+SETTINGS_ID = "active_vector_index"
+DEFAULT_DIMENSIONS = 1536  # OpenAI text-embedding-ada-002 uses 1536 dimensions
+
+
+def index_definition(dimensions=DEFAULT_DIMENSIONS, similarity="cosine", filter_fields=("hackathon_title",),
+                     path="embedding"):
+    fields = [{"type": "vector", "path": path, "numDimensions": dimensions, "similarity": similarity}]
+    fields.extend({"type": "filter", "path": field} for field in filter_fields)
+    return {"fields": fields}
+
+
+def definition_from_env():
+    filters = [f for f in os.getenv("VECTOR_INDEX_FILTERS", "hackathon_title").split(",") if f]
+    return index_definition(
+        dimensions=shape_from_env().dimensions or DEFAULT_DIMENSIONS,
+        similarity=os.getenv("VECTOR_SIMILARITY", "cosine"),
+        filter_fields=filters,
+    )
+
+
+def _canonical(definition):
+    # Field order and extra server-side keys do not matter for equality
+    keys = ("type", "path", "numDimensions", "similarity")
+    fields = [
+        {key: field.get(key) for key in keys if field.get(key) is not None} for field in definition.get("fields", [])
+    ]
+    return sorted(fields, key=lambda field: json.dumps(field, sort_keys=True))
+
+
+def same_definition(a, b):
+    return _canonical(a) == _canonical(b)
+
+
+def versioned_name(definition, base=BASE_INDEX_NAME):
+    digest = hashlib.sha256(json.dumps(_canonical(definition), sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{base}_{digest[:8]}"
+
+
+class VectorIndexManager:
+    def __init__(self, collection, definition=None, base_name=BASE_INDEX_NAME, settings=None, pointer_ttl=30.0):
+        self.collection = collection
+        self.definition = definition or definition_from_env()
+        self.base_name = base_name
+        self.settings = settings if settings is not None else collection.database["settings"]
+        self.pointer_ttl = pointer_ttl
+        self._active = None
+        self._active_read_at = 0.0
+        self._lock = threading.Lock()
+
+    def _indexes(self):
+        return {index["name"]: index for index in self.collection.list_search_indexes()}
+
+    def active_index_name(self):
+        """Name searches should use, cached for ``pointer_ttl`` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            if self._active is None or now - self._active_read_at > self.pointer_ttl:
+                doc = self.settings.find_one({"_id": SETTINGS_ID})
+                self._active = doc["name"] if doc else self.base_name
+                self._active_read_at = now
+            return self._active
+
+    def _set_active(self, name):
+        self.settings.update_one({"_id": SETTINGS_ID}, {"$set": {"name": name, "updated_at": time.time()}}, upsert=True)
+        with self._lock:
+            self._active = name
+            self._active_read_at = time.monotonic()
+
+    def wait_until_ready(self, name, timeout=600.0, initial_delay=1.0, max_delay=30.0):
+        """Poll with exponential backoff until ``name`` is READY; returns False on timeout or failure."""
+        deadline = time.monotonic() + timeout
+        delay = initial_delay
+        while True:
+            index = self._indexes().get(name)
+            status = index.get("status") if index else None
+            if status == "READY":
+                return True
+            if status == "FAILED":
+                print(f"Vector search index {name} failed to build")
+                return False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"Timed out waiting for vector search index {name} (status {status})")
+                return False
+            print(f"Waiting for index {name} to be ready ({status})...")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, max_delay)
+
+    def ensure(self, wait=True, timeout=600.0, drop_old=True):
+        """Make sure an index with the wanted definition exists and is active.
+
+        Returns the name of the index searches will use afterwards.
+        """
+        indexes = self._indexes()
+        active = self.active_index_name()
+        current = indexes.get(active)
+        if current is not None and same_definition(current.get("latestDefinition", {}), self.definition):
+            print(f"Vector search index {active} is up to date")
+            if current.get("status") != "READY" and wait:
+                self.wait_until_ready(active, timeout)
+            return active
+
+        # An index with the wanted definition may already exist (e.g. an interrupted rebuild)
+        target = None
+        for name, index in indexes.items():
+            if name.startswith(self.base_name) and same_definition(index.get("latestDefinition", {}), self.definition):
+                target = name
+                break
+        if target is None:
+            target = versioned_name(self.definition, self.base_name)
+            if target in indexes:
+                # Same name but a stale definition: update it in place
+                self.collection.update_search_index(target, self.definition)
+            else:
+                self.collection.create_search_index(
+                    {"name": target, "type": "vectorSearch", "definition": self.definition}
+                )
+            print(f"Building vector search index {target}; searches keep using {active} until it is ready")
+
+        if not wait:
+            return active
+        if not self.wait_until_ready(target, timeout):
+            return active
+
+        self._set_active(target)
+        print(f"Vector search index {target} is now active")
+        if drop_old and current is not None and active != target:
+            self.collection.drop_search_index(active)
+            print(f"Dropped old vector search index {active}")
+        return target
@@ -0,0 +1,99 @@
+"""Query embedding, similarity search and embedding maintenance, shared by app.py and main.py.
+
+Embedding shapes and the search backends pull in numpy, so they are imported
+when a function first needs them; importing this module (and app.py) stays
+cheap. Clients come from the shared registry (clients.py).
+"""
+import clients
+import metrics
+
+
+# Reuses the index when its definition is unchanged, otherwise builds a new one and swaps it in
+def create_vector_search_index(wait=True, timeout=600):
+    from vector_index import VectorIndexManager
+
+    try:
+        return VectorIndexManager(clients.collection()).ensure(wait=wait, timeout=timeout)
+    except Exception as e:
+        print(f"Error creating vector search index: {e}")
+
+
+# Embed one query text with OpenAI, reusing cached vectors for identical text
+def generate_embedding(text):
+    from embedding_backfill import EMBEDDING_MODEL, EMBEDDING_SHAPE
+
+    embedding_cache = clients.embedding_cache()
+    if embedding_cache is not None:
+        cached = embedding_cache.get(EMBEDDING_SHAPE.cache_model(EMBEDDING_MODEL), text)
+        if cached is not None:
+            return cached
+    try:
+        with metrics.span("embed"):
+            response = clients.openai().embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=text,
+                **EMBEDDING_SHAPE.request_options(EMBEDDING_MODEL)
+            )
+        metrics.record_tokens(EMBEDDING_MODEL, "input", getattr(getattr(response, "usage", None), "total_tokens", 0))
+        embedding = EMBEDDING_SHAPE.apply([response.data[0].embedding], EMBEDDING_MODEL)[0]
+        if embedding_cache is not None:
+            embedding_cache.put(EMBEDDING_SHAPE.cache_model(EMBEDDING_MODEL), text, embedding)
+        return embedding
+    except Exception as e:
+        metrics.record_error("openai")
+        print(f"Error generating embedding: {e}")
+        return None
+
+
+# Embed every document that has no (or a stale) embedding, in batched requests with bulk writes.
+# Returns the backfill counts, or None when it failed.
+def add_embedding_to_document(batch_size=None, max_tokens=None, max_in_flight=None):
+    from embedding_backfill import DEFAULT_BATCH_SIZE, DEFAULT_MAX_IN_FLIGHT, DEFAULT_MAX_TOKENS, backfill_embeddings
+
+    try:
+        stats = backfill_embeddings(
+            clients.collection(),
+            clients.openai(),
+            batch_size=batch_size or DEFAULT_BATCH_SIZE,
+            max_tokens=max_tokens or DEFAULT_MAX_TOKENS,
+            max_in_flight=max_in_flight or DEFAULT_MAX_IN_FLIGHT,
+            cache=clients.embedding_cache(),
+        )
+        print(f"Embedding backfill done: {stats}")
+        return stats
+    except Exception as e:
+        print(f"Error adding embeddings: {e}")
+        return None
+
+
+# Search with the configured backend (Atlas or local); returns SearchResults, or None on failure.
+# With collapse_duplicates, only the best match of each near-duplicate cluster (dedupe.py) is returned
+def perform_vector_search(query_text, limit=5, hackathon_filter=None, collapse_duplicates=False):
+    from search_backends import DUPLICATE_OVERFETCH, HybridSearchBackend
+    from search_results import SearchResults
+
+    # Over-fetch so collapsing clusters still leaves `limit` results
+    fetch = limit * DUPLICATE_OVERFETCH if collapse_duplicates else limit
+    search_backend = clients.search_backend()
+    try:
+        if isinstance(search_backend, HybridSearchBackend):
+            # The lexical leg runs while the query is embedded
+            with metrics.span("search"):
+                results = search_backend.search_text(query_text, generate_embedding, fetch, hackathon_filter)
+        else:
+            query_embedding = generate_embedding(query_text)
+            if not query_embedding:
+                return None
+            with metrics.span("search"):
+                results = search_backend.search(query_embedding, limit=fetch, hackathon_filter=hackathon_filter)
+        # Materialized once, trimmed to SEARCH_RESULT_FIELDS
+        results = SearchResults(results)
+        if collapse_duplicates:
+            results = SearchResults.wrap(results.collapse_duplicates()[:limit])
+        print(f"\nSearch results for query: '{query_text}'")
+        for result in results:
+            print(f"Title: {result.get('title')}, Hackathon: {result.get('hackathon_title')}, Score: {result['score']}")
+        return results
+    except Exception as e:
+        print(f"Error performing vector search: {e}")
+        return None
@@ -0,0 +1,94 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class CheckpointStore:
+    """SQLite-backed crawl progress: gallery pages, project pages and finished hackathons.
+
+    Every write is committed immediately so a crash only loses the page in flight.
+    """
+
+    def __init__(self, path="scrape_checkpoint.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                record TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS galleries (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                links TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS hackathons (
+                url TEXT PRIMARY KEY,
+                pages INTEGER NOT NULL,
+                finished_at REAL NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def _fetchone(self, query, params):
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()
+
+    def _write(self, query, params):
+        with self._lock:
+            self._conn.execute(query, params)
+            self._conn.commit()
+
+    # Project pages
+    def get_page(self, url):
+        row = self._fetchone("SELECT etag, last_modified, record FROM pages WHERE url = ?", (url,))
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "record": json.loads(row[2])}
+
+    def save_page(self, url, record, etag=None, last_modified=None):
+        self._write(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified, record, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (url, etag, last_modified, json.dumps(record), time.time()),
+        )
+
+    # Gallery pages
+    def get_gallery(self, url):
+        row = self._fetchone("SELECT etag, last_modified, links FROM galleries WHERE url = ?", (url,))
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "links": json.loads(row[2])}
+
+    def save_gallery(self, url, links, etag=None, last_modified=None):
+        self._write(
+            "INSERT OR REPLACE INTO galleries (url, etag, last_modified, links, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (url, etag, last_modified, json.dumps(links), time.time()),
+        )
+
+    # Hackathons
+    def is_finished(self, url):
+        return self._fetchone("SELECT 1 FROM hackathons WHERE url = ?", (url,)) is not None
+
+    def mark_finished(self, url, pages):
+        self._write(
+            "INSERT OR REPLACE INTO hackathons (url, pages, finished_at) VALUES (?, ?, ?)",
+            (url, pages, time.time()),
+        )
+
+    def clear_finished(self):
+        self._write("DELETE FROM hackathons", ())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,114 +1,438 @@
+import argparse
 import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urlparse
+
 import requests
-from bs4 import BeautifulSoup
-import re
+from requests.adapters import HTTPAdapter
+
+from checkpoint import CheckpointStore
+
+# Shared modules live one level up in back/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import extractor
+import metrics
+import records
 
 headers = {
     "User-Agent": "Mozilla/5.0 (compatible; WebScraper/1.0)"
 }
 
+PROJECT_LINK_PATTERN = r"^https://devpost\.com/software/"
+REQUEST_TIMEOUT = 30
+# A gallery page that fails this many times leaves its hackathon unfinished in the checkpoint
+GALLERY_ATTEMPTS = 3
+
 hackathon_data = {
     "hackathons": []
 }
 
-def fetch_hackathon_data(url):
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.content, "html.parser")
-
-    # Remove the built-with section entirely
-    built_with = soup.find(id="built-with")
-    if built_with:
-        built_with.decompose()
-
-    # Title
-    og_title_tag = soup.find("meta", attrs={"property": "og:title"})
-    og_title = og_title_tag['content'] if og_title_tag else "No Title"
-
-    og_desc_tag = soup.find("meta", attrs={"property": "og:description"})
-    og_desc = og_desc_tag['content'] if og_desc_tag else "No Description"
-
-    app_details = soup.find(id="app-details-left")
-    story = ""
-    github = ""
-
-    if app_details:
-        divs = app_details.find_all("div", recursive=False)
-        
-        if len(divs) >= 2:
-            info_div = divs[1]
+def fetch_hackathon_data(url, session=requests):
+    with metrics.span("fetch_project"):
+        response = session.get(url, headers=headers)
+    return parse_project_page(response.content, url)
 
-            for i in info_div:
+def parse_project_page(content, url):
+    with metrics.span("parse"):
+        doc = extractor.extract_project(content, url)
+    return project_record(doc, url)
 
-                if i.name == "h2":
-                    story = story + i.get_text(strip=True) + ": "
-
-                if i.name == "p":
-                    story += i.get_text(strip=True)
-
-                if i.name == "ul":
-                    story = story + i.get_text(strip=True) + ","
-
-        for a in app_details.find_all("a", href=True):
-            href = a['href']
-            if "https://github.com/" in href:
-                github = href
-    
+def project_record(doc, url):
     return {
-        "title": og_title,
-        "description": og_desc,
-        "story": story.strip(),
-        "github": github,
+        "title": doc["title"],
+        "description": doc["description"],
+        "story": doc["story"],
+        "github": doc["github"],
         "url": url
     }
 
-def fetch_project_links(url):
-    response = requests.get(url)
+# Returns the project links on a gallery page, or 404 once the gallery runs out
+def parse_project_links(html, pattern=PROJECT_LINK_PATTERN):
+    return extractor.extract_project_links(html, pattern)
+
+def fetch_project_links(url, session=requests, pattern=PROJECT_LINK_PATTERN):
+    response = session.get(url)
 
     if response.status_code == 200:
-        soup = BeautifulSoup(response.text, "html.parser")
-        
-        if "There are no submissions which match your criteria." in soup.text:
+        links = parse_project_links(response.text, pattern)
+        if links == 404:
             return 404
 
-        anchors = soup.find_all("a", href=True)
-        project_data = []
+        return [fetch_hackathon_data(link, session) for link in links]
 
-        for a in anchors:
-            if re.match(r"^https://devpost\.com/software/", a["href"]):
-                project_data.append(fetch_hackathon_data(a["href"]))
-        
-        return project_data
+def gallery_url(hackathon, page):
+    return hackathon["url"] + "project-gallery" + "?page=" + str(page)
 
-if __name__ == "__main__":
-    with open('data.json', 'r') as file:
-        data = json.load(file)
-    
-    i = 1
-    for hackathon in data["hackathons"]:
+def build_hackathon_record(hackathon, projects):
+    return {
+        "title": hackathon["title"],
+        "location": hackathon["displayed_location"]["location"],
+        "url": hackathon["url"],
+        "submission_dates": hackathon["submission_period_dates"],
+        "themes": [theme["name"] for theme in hackathon["themes"]],
+        "organization": hackathon["organization_name"],
+        "winners": hackathon["winners_announced"],
+        "projects": projects,
+    }
+
+# Original one-request-at-a-time crawl, yielding each hackathon as soon as it is done
+def iter_crawl_sequential(hackathons, pattern=PROJECT_LINK_PATTERN):
+    for hackathon in hackathons:
         projects = []
+        i = 1
 
         while True:
-            return_data = fetch_project_links(hackathon["url"] + "project-gallery" + "?page=" + str(i))
-            
-            if return_data == 404 or return_data == []:
-                i = 1
+            return_data = fetch_project_links(gallery_url(hackathon, i), pattern=pattern)
+
+            if return_data == 404 or return_data == [] or return_data is None:
                 break
-            
+
             projects.append(return_data)
             i += 1
-        
-        sample = {
-            "title": hackathon["title"],
-            "location": hackathon["displayed_location"]["location"],
-            "url": hackathon["url"],
-            "submission_dates": hackathon["submission_period_dates"],
-            "themes": [theme["name"] for theme in hackathon["themes"]],
-            "organization": hackathon["organization_name"],
-            "winners": hackathon["winners_announced"],
-            "projects": projects,
-        }
-        
-        hackathon_data['hackathons'].append(sample)
-
-with open("hackathon_data.json", "w") as json_file:
-    json.dump(hackathon_data, json_file, indent=4)
\ No newline at end of file
+
+        yield build_hackathon_record(hackathon, projects)
+
+def crawl_sequential(hackathons, pattern=PROJECT_LINK_PATTERN):
+    return list(iter_crawl_sequential(hackathons, pattern))
+
+# Session whose connection pool is large enough to keep every worker's connection alive
+def create_session(pool_size):
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+class HostLimitedSession:
+    """Wraps a requests.Session so at most `per_host` requests hit any one host at a time."""
+
+    def __init__(self, session, per_host):
+        self.session = session
+        self.per_host = per_host
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def _limit(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._limits:
+                self._limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._limits[host]
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        with self._limit(url):
+            return self.session.get(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+# GET that sends If-None-Match / If-Modified-Since when we have validators for the page
+def conditional_get(session, url, cached):
+    request_headers = dict(headers)
+    if cached:
+        if cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached["last_modified"]
+    return session.get(url, headers=request_headers)
+
+def fetch_project_checkpointed(url, session, checkpoint, revalidate=False):
+    cached = checkpoint.get_page(url)
+    if cached and not revalidate:
+        return cached["record"]
+
+    with metrics.span("fetch_project"):
+        response = conditional_get(session, url, cached)
+    if response.status_code == 304 and cached:
+        return cached["record"]
+
+    record = parse_project_page(response.content, url)
+    checkpoint.save_page(url, record, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return record
+
+def fetch_project_safe(url, session, checkpoint=None, revalidate=False):
+    try:
+        if checkpoint is not None:
+            record = fetch_project_checkpointed(url, session, checkpoint, revalidate)
+        else:
+            record = fetch_hackathon_data(url, session)
+        metrics.record_items("crawl")
+        return record
+    except Exception as e:
+        metrics.record_error("devpost")
+        print(f"Error fetching project {url}: {e}")
+        return None
+
+class ParsePool:
+    """CPU stage of the crawl: project pages are parsed in worker processes, off the fetch threads.
+
+    Fetch threads hand raw page bytes to submit(), which blocks while `max_pending`
+    pages are already waiting to be parsed, so fetching cannot run ahead of parsing.
+    """
+
+    def __init__(self, processes=None, max_pending=None):
+        self.processes = processes or os.cpu_count() or 1
+        # spawn: forking a process that is already running fetch threads is not safe
+        self.executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn"))
+        self._slots = threading.BoundedSemaphore(max_pending or 4 * self.processes)
+
+    def submit(self, content, url, on_parsed=None):
+        """Future of the project record; `on_parsed(record)` runs when it is ready."""
+        self._slots.acquire()
+        record = Future()
+
+        def done(parsed):
+            self._slots.release()
+            try:
+                result = project_record(parsed.result(), url)
+                if on_parsed is not None:
+                    on_parsed(result)
+            except Exception as e:
+                record.set_exception(e)
+                return
+            record.set_result(result)
+
+        try:
+            self.executor.submit(extractor.extract_project, content, url).add_done_callback(done)
+        except Exception:
+            self._slots.release()
+            raise
+        return record
+
+    def close(self):
+        self.executor.shutdown()
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+# I/O stage: fetches one project page and queues its bytes for the parse pool; returns a future of the record
+def fetch_project_staged(url, session, parse_pool, checkpoint=None, revalidate=False):
+    cached = checkpoint.get_page(url) if checkpoint is not None else None
+    if cached and not revalidate:
+        return _resolved(cached["record"])
+    try:
+        with metrics.span("fetch_project"):
+            response = conditional_get(session, url, cached)
+    except Exception as e:
+        metrics.record_error("devpost")
+        print(f"Error fetching project {url}: {e}")
+        return _resolved(None)
+    if response.status_code == 304 and cached:
+        return _resolved(cached["record"])
+
+    def on_parsed(record):
+        if checkpoint is not None:
+            checkpoint.save_page(url, record, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        metrics.record_items("crawl")
+
+    return parse_pool.submit(response.content, url, on_parsed)
+
+def _project_or_none(future, url):
+    try:
+        return future.result()
+    except Exception as e:
+        print(f"Error parsing project {url}: {e}")
+        return None
+
+# Returns the links on one gallery page, reusing the checkpointed list when the page is unchanged
+def fetch_gallery_links(url, session, pattern=PROJECT_LINK_PATTERN, checkpoint=None):
+    cached = checkpoint.get_gallery(url) if checkpoint is not None else None
+    try:
+        with metrics.span("fetch_gallery"):
+            response = conditional_get(session, url, cached)
+    except Exception as e:
+        metrics.record_error("devpost")
+        print(f"Error fetching gallery {url}: {e}")
+        return None
+
+    if response.status_code == 304 and cached:
+        return cached["links"] or 404
+    if response.status_code == 404:
+        return 404
+    if response.status_code != 200:
+        return None
+
+    links = parse_project_links(response.text, pattern)
+    if checkpoint is not None:
+        checkpoint.save_gallery(
+            url, [] if links == 404 else links, response.headers.get("ETag"), response.headers.get("Last-Modified")
+        )
+    return links
+
+# Rebuilds a finished hackathon's pages from the checkpoint without touching the network
+def projects_from_checkpoint(hackathon, checkpoint):
+    projects = []
+    i = 1
+    while True:
+        gallery = checkpoint.get_gallery(gallery_url(hackathon, i))
+        if not gallery or not gallery["links"]:
+            break
+        page = [checkpoint.get_page(link) for link in gallery["links"]]
+        projects.append([cached["record"] for cached in page if cached])
+        i += 1
+    return projects
+
+# Walks one hackathon's gallery pages in order and hands project pages to the shared pool
+def crawl_hackathon(hackathon, session, project_pool, pattern=PROJECT_LINK_PATTERN,
+                    checkpoint=None, revalidate=False, skip_finished=False, parse_pool=None):
+    if checkpoint is not None and skip_finished and checkpoint.is_finished(hackathon["url"]):
+        projects = projects_from_checkpoint(hackathon, checkpoint)
+        print(f"Restored {hackathon['title']} from checkpoint: {sum(len(page) for page in projects)} projects")
+        return build_hackathon_record(hackathon, projects)
+
+    page_futures = []
+    i = 1
+    # Only a walk that reached the real end of the gallery, with every project fetched, is finished
+    complete = True
+
+    while True:
+        for attempt in range(GALLERY_ATTEMPTS):
+            if attempt:
+                time.sleep(attempt)
+            links = fetch_gallery_links(gallery_url(hackathon, i), session, pattern, checkpoint)
+            if links is not None:
+                break
+        if links is None:
+            complete = False
+            break
+        if links == 404 or links == []:
+            break
+
+        if parse_pool is not None:
+            page_futures.append([
+                (link, project_pool.submit(fetch_project_staged, link, session, parse_pool, checkpoint, revalidate))
+                for link in links
+            ])
+        else:
+            page_futures.append([
+                (link, project_pool.submit(fetch_project_safe, link, session, checkpoint, revalidate))
+                for link in links
+            ])
+        i += 1
+
+    projects = []
+    for futures in page_futures:
+        # With a parse pool the fetch future resolves to the future of the parsed record
+        results = (
+            _project_or_none(future.result(), link) if parse_pool is not None else future.result()
+            for link, future in futures
+        )
+        page = [project for project in results if project is not None]
+        complete = complete and len(page) == len(futures)
+        projects.append(page)
+
+    if checkpoint is not None and complete:
+        checkpoint.mark_finished(hackathon["url"], len(projects))
+    elif not complete:
+        print(f"Incomplete crawl of {hackathon['title']}; it will be fetched again on the next run")
+    print(f"Crawled {hackathon['title']}: {sum(len(page) for page in projects)} projects")
+    return build_hackathon_record(hackathon, projects)
+
+def iter_crawl_concurrent(hackathons, workers=16, per_host=8, session=None, pattern=PROJECT_LINK_PATTERN,
+                          checkpoint=None, revalidate=False, skip_finished=False, parse_processes=0,
+                          parse_queue=None):
+    """Crawl all hackathons with a bounded worker pool over a shared keep-alive session.
+
+    Hackathons are yielded in input order, and only a small window of them is in
+    flight at once so memory does not grow with the number of hackathons.
+    With a checkpoint store, known project pages are skipped (or revalidated with
+    conditional GETs) and progress is persisted as each page completes.
+    With `parse_processes`, fetch threads only download pages and a ParsePool of
+    that many processes parses them, at most `parse_queue` pages waiting at once.
+    """
+    owns_session = session is None
+    if owns_session:
+        session = HostLimitedSession(create_session(workers), per_host)
+    parse_pool = ParsePool(parse_processes, parse_queue) if parse_processes else None
+
+    # Gallery walkers block on their project futures, so they get their own pool
+    gallery_workers = max(1, min(len(hackathons), per_host))
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as project_pool, \
+                ThreadPoolExecutor(max_workers=gallery_workers) as gallery_pool:
+            pending = deque()
+            for hackathon in hackathons:
+                pending.append(gallery_pool.submit(
+                    crawl_hackathon, hackathon, session, project_pool, pattern, checkpoint, revalidate, skip_finished,
+                    parse_pool,
+                ))
+                if len(pending) > gallery_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    finally:
+        if parse_pool is not None:
+            parse_pool.close()
+        if owns_session:
+            session.close()
+
+def crawl_concurrent(hackathons, **kwargs):
+    return list(iter_crawl_concurrent(hackathons, **kwargs))
+
+# Streams hackathons to disk as they finish: JSONL records, or the nested JSON layout
+def write_output(path, crawled):
+    if records.is_jsonl(path):
+        with records.RecordWriter(path) as writer:
+            for hackathon in crawled:
+                writer.write_all(records.hackathon_records(hackathon, hackathon["projects"]))
+        return
+
+    hackathon_data["hackathons"] = list(crawled)
+    with open(path, "w") as json_file:
+        json.dump(hackathon_data, json_file, indent=4)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape Devpost project galleries into hackathon_data.json")
+    parser.add_argument("--input", default="data.json")
+    parser.add_argument("--output", default="hackathon_data.json",
+                        help="a .jsonl path streams one record per line instead of one nested JSON document")
+    parser.add_argument("--concurrent", action="store_true", help="fetch pages with a pooled worker crawler")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--per-host", type=int, default=8, help="max in-flight requests per host")
+    parser.add_argument("--parse-processes", type=int, default=0,
+                        help="parse pages in this many processes instead of the fetch threads (0: off)")
+    parser.add_argument("--parse-queue", type=int, help="max fetched pages waiting to be parsed (default 4 per process)")
+    parser.add_argument("--project-link-pattern", default=PROJECT_LINK_PATTERN)
+    parser.add_argument("--incremental", action="store_true", help="resume from and record progress in a checkpoint")
+    parser.add_argument("--checkpoint", default="scrape_checkpoint.db")
+    parser.add_argument("--revalidate", action="store_true",
+                        help="re-check known project pages with conditional GETs instead of skipping them")
+    parser.add_argument("--skip-finished", action="store_true",
+                        help="restore hackathons finished in an earlier run without re-walking their galleries")
+    args = parser.parse_args()
+
+    with open(args.input, 'r') as file:
+        data = json.load(file)
+
+    checkpoint = CheckpointStore(args.checkpoint) if args.incremental else None
+    try:
+        if args.incremental or args.concurrent or args.parse_processes:
+            crawled = iter_crawl_concurrent(
+                data["hackathons"],
+                workers=args.workers if args.concurrent else 1,
+                per_host=args.per_host if args.concurrent else 1,
+                pattern=args.project_link_pattern,
+                checkpoint=checkpoint,
+                revalidate=args.revalidate,
+                skip_finished=args.skip_finished,
+                parse_processes=args.parse_processes,
+                parse_queue=args.parse_queue,
+            )
+        else:
+            crawled = iter_crawl_sequential(data["hackathons"], pattern=args.project_link_pattern)
+
+        write_output(args.output, crawled)
+        print(metrics.summary())
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()